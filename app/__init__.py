@@ -1,29 +1,125 @@
-import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from config import Config
-from app import logging_config
+from app.logging_config import configure_logging
 
 
 db = SQLAlchemy()
-migrate = Migrate()
 
 
-def create_app():
+def create_app(config=None):
+    """
+        Create and configure the Flask application.
+
+        Args:
+            config (dict): Settings that override Config, e.g. the database URI of a benchmark run.
+
+        Returns:
+            Flask: The application.
+        """
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    configure_logging(app)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     db.init_app(app)
-    migrate.init_app(app, db)
+    # The schema is managed by the migrations in migrations/, applied with `flask db upgrade`
+    if app.config['LOAD_MIGRATIONS']:
+        from flask_migrate import Migrate
+        Migrate(app, db)
     from app import models
-    # Create or upgrade the database when the app starts
-    with app.app_context():
-        try:
-            db.create_all()
-        except Exception as e:
-            logging.error(f"Error initializing database: {e}")
+
+    from app.cache import AggregateCache
+    app.extensions['markr_aggregate_cache'] = AggregateCache(app.config['AGGREGATE_CACHE_SIZE'],
+                                                             app.config['AGGREGATE_CACHE_TTL'])
+
+    # Cap the imports running at once, keeping capacity for the read endpoints
+    from app.admission import ImportAdmission, import_limits
+    max_concurrent, queue_size = import_limits(app.config)
+    for name, limit in (('IMPORT_MAX_CONCURRENT', max_concurrent), ('IMPORT_QUEUE_SIZE', queue_size)):
+        if limit < app.config[name]:
+            app.logger.warning(f"{name}={app.config[name]} lowered to {limit} to keep READ_RESERVED_SLOTS "
+                               f"request threads and connections free for reads, raise GUNICORN_THREADS "
+                               f"or the pool size to allow more")
+    app.extensions['markr_import_admission'] = ImportAdmission(max_concurrent, app.config['IMPORT_MAX_INFLIGHT_BYTES'],
+                                                               queue_size, app.config['IMPORT_QUEUE_TIMEOUT'])
+
+    # Push aggregate updates to the /results/<test_id>/stream subscribers of this process, and
+    # invalidate its cache when other processes import
+    from app.events import AggregateEvents
+    app.extensions['markr_aggregate_events'] = AggregateEvents(app, app.extensions['markr_aggregate_cache'],
+                                                               app.config['STREAM_INTERVAL'],
+                                                               app.config['STREAM_MAX_SUBSCRIBERS'])
+
+    # Time every request and count its SQL statements for /metrics
+    from app.metrics import Metrics, count_statement, finish_request, start_request
+    app.extensions['markr_metrics'] = Metrics()
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    if not event.contains(Engine, 'before_cursor_execute', count_statement):
+        event.listen(Engine, 'before_cursor_execute', count_statement)
 
     from app.routes import bp as main_bp
     app.register_blueprint(main_bp)
+
+    from app.cli import markr_cli
+    app.cli.add_command(markr_cli)
+
+    # Run queued imports in the background when asynchronous imports are enabled. Threads do
+    # not survive a fork, so under a pre-fork server they are started by post_fork instead.
+    if not app.config['PREFORK']:
+        start_background_workers(app)
     return app
 
+
+def engine_options(config):
+    """
+        Build the SQLAlchemy engine options from the DB_POOL_* settings.
+
+        SQLite databases keep the pools chosen for them by SQLAlchemy, which do not accept
+        sizing options.
+
+        Args:
+            config (dict): The application config.
+
+        Returns:
+            dict: The keyword arguments for create_engine.
+        """
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def start_background_workers(app):
+    """
+        Start the background import workers if asynchronous imports are enabled.
+        """
+    if app.config['IMPORT_ASYNC'] and app.config['IMPORT_WORKERS'] > 0:
+        from app.jobs import start_workers
+        start_workers(app)
+
+
+def post_fork(app):
+    """
+        Prepare an app loaded before forking for use in a worker process.
+
+        Connections opened by the master must not be shared with the workers, so the pool is
+        replaced without closing them (the master still owns them), and the background import
+        workers are started in the worker.
+
+        Args:
+            app (Flask): The application created by the master process.
+        """
+    with app.app_context():
+        db.engine.dispose(close=False)
+    start_background_workers(app)
+
@@ -0,0 +1,167 @@
+# app/admission.py
+from functools import wraps
+import logging
+import threading
+from flask import current_app, jsonify, request
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """
+        Raised when an import cannot be admitted.
+
+        Attributes:
+            status (int): 429 if the import was turned away at once, 503 if it timed out waiting.
+            reason (str): 'concurrency', 'bytes' or 'timeout', the label of the rejection metric.
+        """
+
+    def __init__(self, status, reason):
+        super().__init__(f'Import rejected ({reason})')
+        self.status = status
+        self.reason = reason
+
+
+class ImportAdmission:
+    """
+        Limit the imports running in a process, by count and by payload bytes.
+
+        An import that does not fit waits in a bounded queue until a running import finishes.
+        When the queue is full it is rejected at once, and when it has waited for queue_timeout
+        it is rejected as timed out. A payload larger than max_bytes is admitted only when no
+        other import is running, so that it can still be imported.
+
+        Attributes:
+            max_concurrent (int): The most imports running at once.
+            max_bytes (int): The most payload bytes of the running imports, 0 for no limit.
+            queue_size (int): The most imports waiting to be admitted.
+            queue_timeout (float): Seconds an import waits before it is rejected.
+            active (int): The number of running imports.
+            waiting (int): The number of imports waiting to be admitted.
+            inflight_bytes (int): The payload bytes of the running imports.
+        """
+
+    def __init__(self, max_concurrent, max_bytes=0, queue_size=0, queue_timeout=10.0):
+        self.max_concurrent = max_concurrent
+        self.max_bytes = max_bytes
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.inflight_bytes = 0
+        self._condition = threading.Condition()
+
+    def _fits(self, size):
+        if self.active >= self.max_concurrent:
+            return False
+        return not self.max_bytes or self.active == 0 or self.inflight_bytes + size <= self.max_bytes
+
+    def acquire(self, size):
+        """
+            Admit an import, waiting in the queue if needed.
+
+            Args:
+                size (int): The payload bytes of the import, 0 if unknown.
+
+            Raises:
+                AdmissionRejected: If the import is not admitted.
+            """
+        with self._condition:
+            if not self._fits(size):
+                if self.waiting >= self.queue_size:
+                    raise AdmissionRejected(429, 'concurrency' if self.active >= self.max_concurrent else 'bytes')
+                self.waiting += 1
+                try:
+                    admitted = self._condition.wait_for(lambda: self._fits(size), self.queue_timeout)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    raise AdmissionRejected(503, 'timeout')
+            self.active += 1
+            self.inflight_bytes += size
+
+    def release(self, size):
+        """
+            Finish an admitted import and wake the imports waiting for its capacity.
+            """
+        with self._condition:
+            self.active -= 1
+            self.inflight_bytes -= size
+            self._condition.notify_all()
+
+    def gauges(self):
+        """
+            Sample the admission state as (name, help, value) gauges for Metrics.render.
+            """
+        with self._condition:
+            return [
+                ('markr_import_active', 'Imports running in this process.', self.active),
+                ('markr_import_queue_depth', 'Imports waiting to be admitted.', self.waiting),
+                ('markr_import_inflight_bytes', 'Payload bytes of the running imports.', self.inflight_bytes),
+                ('markr_import_max_concurrent', 'The most imports admitted at once.', self.max_concurrent),
+            ]
+
+
+def import_limits(config):
+    """
+        Work out the import limits that leave READ_RESERVED_SLOTS for the read endpoints.
+
+        Running and queued imports each hold one of the REQUEST_THREADS serving requests, and a
+        running import holds a pooled connection, as does each background import worker. Imports
+        are capped so that at least READ_RESERVED_SLOTS threads and connections stay free for
+        reads, however many imports arrive.
+
+        Args:
+            config (dict): The application config.
+
+        Returns:
+            int: The most imports running at once, at least 1.
+            int: The most imports waiting to be admitted.
+        """
+    reserved = config['READ_RESERVED_SLOTS']
+    thread_slots = config['REQUEST_THREADS'] - reserved
+    slots = thread_slots
+    if not config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        connections = config['DB_POOL_SIZE'] + config['DB_MAX_OVERFLOW'] - reserved
+        if config['IMPORT_ASYNC']:
+            connections -= config['IMPORT_WORKERS']
+        slots = min(slots, connections)
+    max_concurrent = max(1, min(config['IMPORT_MAX_CONCURRENT'], slots))
+    queue_size = max(0, min(config['IMPORT_QUEUE_SIZE'], thread_slots - max_concurrent))
+    return max_concurrent, queue_size
+
+
+def import_admission():
+    """
+        Return the import admission control of the current application.
+        """
+    return current_app.extensions['markr_import_admission']
+
+
+def admission_controlled(view):
+    """
+        Decorate an import view so that it only runs once the import is admitted.
+
+        Rejected imports are answered with 429 or 503 and a Retry-After header, and counted in
+        markr_import_rejections_total.
+        """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        admission = import_admission()
+        size = request.content_length or 0
+        try:
+            admission.acquire(size)
+        except AdmissionRejected as e:
+            logger.warning(f"Rejected import of {size} bytes with {e.status} ({e.reason}): "
+                           f"{admission.active} running, {admission.waiting} waiting")
+            current_app.extensions['markr_metrics'].inc('markr_import_rejections_total',
+                                                        (('reason', e.reason), ('status', str(e.status))))
+            response = jsonify({'error': 'Too many imports in progress, retry later'})
+            response.headers['Retry-After'] = str(current_app.config['IMPORT_RETRY_AFTER'])
+            return response, e.status
+        try:
+            return view(*args, **kwargs)
+        finally:
+            admission.release(size)
+    return wrapper
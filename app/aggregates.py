@@ -0,0 +1,306 @@
+# app/aggregates.py
+import logging
+import math
+from sqlalchemy import func, select, true
+from app.models import TestResults, TestAggregate
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+
+def lock_aggregates(session, test_ids, insert=None):
+    """
+        Lock the aggregate rows of tests until the end of the transaction, creating empty rows
+        for the tests without one.
+
+        An import takes these locks before it reads the results it may replace, so concurrent
+        imports of the same test run their writes one after the other: the second one reads
+        the results the first one committed, rather than counting the same student twice.
+        The rows are created with INSERT ... ON CONFLICT DO NOTHING, which waits for a
+        concurrent import creating the same row instead of failing, and all rows are locked in
+        test_id order, so that imports of overlapping sets of tests do not deadlock within a
+        batch. An import whose batches lock the same tests in a different order than another
+        import can still deadlock; PostgreSQL detects this and fails one of them.
+
+        Args:
+            session (Session): The session the import is running in.
+            test_ids (iterable): The tests to lock.
+            insert (callable): The dialect's insert construct with ON CONFLICT support (see
+                app.upsert.INSERT_CONSTRUCTS), or None to only lock the existing rows.
+
+        Returns:
+            dict: The locked TestAggregate of each test, keyed by test ID.
+        """
+    test_ids = sorted(set(test_ids))
+    if not test_ids:
+        return {}
+    if insert is not None:
+        table = TestAggregate.__table__
+        session.execute(insert(table).on_conflict_do_nothing(index_elements=[table.c.test_id]),
+                        [{'test_id': test_id, 'count': 0, 'sum_marks': 0, 'sum_squares': 0, 'histogram': {},
+                          'version': 0} for test_id in test_ids])
+    # populate_existing replaces any aggregates the session holds with the locked rows
+    return {aggregate.test_id: aggregate for aggregate in
+            session.query(TestAggregate).filter(TestAggregate.test_id.in_(test_ids))
+            .order_by(TestAggregate.test_id).with_for_update().populate_existing()}
+
+
+def apply_changes(session, changes, aggregates=None):
+    """
+        Fold a batch of result changes into the test_aggregates table.
+
+        Runs inside the caller's transaction so the aggregates always match the stored results.
+        Empty aggregate rows that no change reached are removed again.
+
+        Args:
+            session (Session): The session the import is running in.
+            changes (list): Tuples of (test_id, old_marks, new_marks, available_marks), where
+                old_marks is None for a new result and otherwise the score being replaced.
+            aggregates (dict): The aggregates locked with lock_aggregates before the replaced
+                scores were read, or None to lock them here.
+        """
+    if aggregates is None:
+        aggregates = lock_aggregates(session, {change[0] for change in changes})
+    if not changes and not aggregates:
+        return
+
+    histograms = {}
+    for test_id, old_marks, new_marks, available_marks in changes:
+        aggregate = aggregates.get(test_id)
+        if aggregate is None:
+            aggregate = TestAggregate(test_id=test_id, count=0, sum_marks=0, sum_squares=0, histogram={},
+                                      version=0)
+            session.add(aggregate)
+            aggregates[test_id] = aggregate
+        if test_id not in histograms:
+            histograms[test_id] = dict(aggregate.histogram)
+        histogram = histograms[test_id]
+
+        if old_marks is None:
+            aggregate.count += 1
+        else:
+            # Take the replaced score back out before adding the new one
+            aggregate.sum_marks -= old_marks
+            aggregate.sum_squares -= old_marks * old_marks
+            remaining = histogram.get(str(old_marks), 0) - 1
+            if remaining > 0:
+                histogram[str(old_marks)] = remaining
+            else:
+                histogram.pop(str(old_marks), None)
+
+        aggregate.sum_marks += new_marks
+        aggregate.sum_squares += new_marks * new_marks
+        histogram[str(new_marks)] = histogram.get(str(new_marks), 0) + 1
+        aggregate.available_marks = available_marks
+
+    for test_id, histogram in histograms.items():
+        aggregate = aggregates[test_id]
+        # Assign a new dict so the JSON column is flagged as modified
+        aggregate.histogram = histogram
+        aggregate.version += 1
+        marks = [int(mark) for mark in histogram]
+        aggregate.min_marks = min(marks) if marks else None
+        aggregate.max_marks = max(marks) if marks else None
+
+    for test_id, aggregate in aggregates.items():
+        if test_id not in histograms and aggregate.count == 0:
+            session.delete(aggregate)
+
+
+def histogram_percentiles(histogram, percentiles):
+    """
+        Calculate exact percentiles from a mark histogram.
+
+        Uses the same linear interpolation between order statistics as numpy.percentile.
+
+        Args:
+            histogram (dict): The number of results for each mark, keyed by the mark as a string.
+            percentiles (list): The percentiles to calculate, between 0 and 100.
+
+        Returns:
+            list: The value of each percentile.
+        """
+    marks = sorted((int(mark), count) for mark, count in histogram.items())
+    count = sum(c for _, c in marks)
+
+    def order_statistic(k):
+        # Return the k-th smallest mark (0-based)
+        seen = 0
+        for mark, c in marks:
+            seen += c
+            if k < seen:
+                return mark
+        return marks[-1][0]
+
+    values = []
+    for percentile in percentiles:
+        position = (count - 1) * percentile / 100
+        lower = math.floor(position)
+        low_value = order_statistic(lower)
+        high_value = order_statistic(min(lower + 1, count - 1))
+        values.append(low_value + (position - lower) * (high_value - low_value))
+    return values
+
+
+def summarize(aggregate):
+    """
+        Build the aggregate response for a test from its running statistics.
+
+        Args:
+            aggregate (TestAggregate): The statistics of the test.
+
+        Returns:
+            dict: The mean, stddev, min, max, p25, p50, p75 and count of the obtained marks,
+                with the percentiles as a percentage of the available marks.
+        """
+    count = aggregate.count
+    # Marks are integers, so the variance numerator is exact
+    variance = (count * aggregate.sum_squares - aggregate.sum_marks ** 2) / (count * count)
+    percentiles = histogram_percentiles(aggregate.histogram, [25, 50, 75])
+    percentiles_percentage = [p * 100 / aggregate.available_marks for p in percentiles]
+
+    return {
+        'mean': aggregate.sum_marks / count,
+        'stddev': math.sqrt(variance),
+        'min': aggregate.min_marks,
+        'max': aggregate.max_marks,
+        'p25': percentiles_percentage[0],
+        'p50': percentiles_percentage[1],
+        'p75': percentiles_percentage[2],
+        'count': count
+    }
+
+
+def rebuild_aggregates(session, test_id=None):
+    """
+        Recalculate the test_aggregates table from test_results.
+
+        Args:
+            session (Session): The session to rebuild in. The caller commits.
+            test_id (str): Only rebuild this test, or every test if None.
+
+        Returns:
+            int: The number of tests aggregated.
+        """
+    # Let the database count each distinct mark, so only the histograms leave it
+    query = (
+        select(TestResults.test_id, TestResults.obtained_marks, func.count(), func.max(TestResults.available_marks))
+        .where(TestResults.obtained_marks.isnot(None))
+        .group_by(TestResults.test_id, TestResults.obtained_marks)
+    )
+    existing = session.query(TestAggregate)
+    if test_id is not None:
+        query = query.where(TestResults.test_id == test_id)
+        existing = existing.filter(TestAggregate.test_id == test_id)
+    # Carry the versions over, so that ETags issued before the rebuild are not reused
+    versions = dict(existing.with_entities(TestAggregate.test_id, TestAggregate.version))
+    existing.delete()
+    rows = session.execute(query)
+
+    aggregates = {}
+    for test_id, marks, count, available_marks in rows:
+        aggregate = aggregates.get(test_id)
+        if aggregate is None:
+            aggregate = aggregates[test_id] = TestAggregate(test_id=test_id, count=0, sum_marks=0, sum_squares=0,
+                                                            available_marks=available_marks, histogram={},
+                                                            version=versions.get(test_id, 0) + 1)
+        aggregate.count += count
+        aggregate.sum_marks += marks * count
+        aggregate.sum_squares += marks * marks * count
+        aggregate.histogram[str(marks)] = count
+        aggregate.available_marks = max(aggregate.available_marks, available_marks)
+
+    for aggregate in aggregates.values():
+        marks = [int(mark) for mark in aggregate.histogram]
+        aggregate.min_marks = min(marks)
+        aggregate.max_marks = max(marks)
+        session.add(aggregate)
+
+    logger.info(f"Rebuilt aggregates for {len(aggregates)} tests")
+    return len(aggregates)
+
+
+def _grouped_summary(count, mean, stddev, min_value, max_value, available_marks, percentiles):
+    return {
+        'mean': float(mean),
+        'stddev': float(stddev),
+        'min': int(min_value),
+        'max': int(max_value),
+        'p25': float(percentiles[0]) * 100 / available_marks,
+        'p50': float(percentiles[1]) * 100 / available_marks,
+        'p75': float(percentiles[2]) * 100 / available_marks,
+        'count': int(count)
+    }
+
+
+def _grouped_aggregates_postgresql(session, condition):
+    marks = TestResults.obtained_marks
+    rows = session.execute(
+        select(TestResults.test_id, func.count(marks), func.avg(marks), func.stddev_pop(marks), func.min(marks),
+               func.max(marks), func.max(TestResults.available_marks),
+               *[func.percentile_cont(p).within_group(marks) for p in (0.25, 0.5, 0.75)])
+        .where(marks.isnot(None), condition)
+        .group_by(TestResults.test_id)
+    )
+    return {test_id: _grouped_summary(count, mean, stddev, min_value, max_value, available_marks, percentiles)
+            for test_id, count, mean, stddev, min_value, max_value, available_marks, *percentiles in rows}
+
+
+def _grouped_aggregates_numpy(session, condition):
+    # numpy is imported here so that it is not loaded at startup when PostgreSQL is used
+    import numpy as np
+
+    # Fetch the marks sorted by test and mark, then reduce every test at once over the group boundaries
+    rows = session.execute(
+        select(TestResults.test_id, TestResults.obtained_marks, TestResults.available_marks)
+        .where(TestResults.obtained_marks.isnot(None), condition)
+        .order_by(TestResults.test_id, TestResults.obtained_marks)
+    ).all()
+    if not rows:
+        return {}
+
+    test_ids, marks, available = zip(*rows)
+    test_ids = np.array(test_ids, dtype=object)
+    marks = np.array(marks, dtype=np.float64)
+    available = np.array(available, dtype=np.int64)
+
+    starts = np.flatnonzero(np.r_[True, test_ids[1:] != test_ids[:-1]])
+    counts = np.diff(np.r_[starts, len(marks)])
+    means = np.add.reduceat(marks, starts) / counts
+    stddevs = np.sqrt(np.add.reduceat((marks - np.repeat(means, counts)) ** 2, starts) / counts)
+    available_marks = np.maximum.reduceat(available, starts)
+
+    # Linear interpolation between order statistics, as percentile_cont and numpy.percentile do
+    percentiles = []
+    for p in (0.25, 0.5, 0.75):
+        position = (counts - 1) * p
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        low_value, high_value = marks[starts + lower], marks[starts + upper]
+        percentiles.append(low_value + (position - lower) * (high_value - low_value))
+
+    return {test_ids[start]: _grouped_summary(counts[i], means[i], stddevs[i], marks[start],
+                                              marks[start + counts[i] - 1], available_marks[i],
+                                              [p[i] for p in percentiles])
+            for i, start in enumerate(starts)}
+
+
+def grouped_aggregates(session, test_ids=None):
+    """
+        Aggregate many tests directly from test_results with one grouped query.
+
+        On PostgreSQL the statistics are calculated in the database with avg, stddev_pop, min,
+        max and percentile_cont. Other databases return the marks sorted by test, which are
+        reduced per test with numpy.
+
+        Args:
+            session (Session): The session to query in.
+            test_ids (list): The tests to aggregate, or None for every test.
+
+        Returns:
+            dict: The summarize() fields of each test that has results, keyed by test ID.
+        """
+    condition = TestResults.test_id.in_(test_ids) if test_ids is not None else true()
+    if session.get_bind().dialect.name == 'postgresql':
+        return _grouped_aggregates_postgresql(session, condition)
+    return _grouped_aggregates_numpy(session, condition)
@@ -0,0 +1,149 @@
+# app/cache.py
+from collections import OrderedDict, namedtuple
+import logging
+import threading
+import time
+from flask import current_app
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# A cached response: its ETag value, serialized JSON body and expiry time (time.monotonic)
+CacheEntry = namedtuple('CacheEntry', ['etag', 'body', 'expires'])
+
+
+class AggregateCache:
+    """
+        An in-process LRU cache of serialized aggregate responses, keyed by test ID.
+
+        Entries are invalidated when an import changes the test: directly by imports in this
+        process and, on PostgreSQL, through the NOTIFY listener of app.events.AggregateEvents for
+        imports made by other processes. They also expire after the TTL, which bounds staleness
+        while the listener is disconnected or on other databases.
+
+        Every invalidation advances a generation counter. A reader takes the generation before
+        it reads the aggregate and passes it to put, which drops the response if the test was
+        invalidated meanwhile, so a response read before an import cannot be cached after it.
+        The generations of the last max_entries invalidated tests are remembered; older ones
+        are folded into a floor below which every put is dropped.
+
+        Attributes:
+            max_entries (int): The number of tests kept before the least recently used is evicted.
+            ttl (float): Seconds an entry is served for.
+            hits (int): The number of lookups answered from the cache.
+            misses (int): The number of lookups that were not.
+            evictions (int): The number of entries dropped because the cache was full.
+            invalidations (int): The number of entries dropped because their test changed.
+        """
+
+    def __init__(self, max_entries=1024, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._invalidated = OrderedDict()
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, test_id):
+        """
+            Look up the cached response of a test.
+
+            Returns:
+                CacheEntry: The entry, or None if it is missing or expired.
+            """
+        with self._lock:
+            entry = self._entries.get(test_id)
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(test_id)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[test_id]
+            self.misses += 1
+            return None
+
+    def generation(self):
+        """
+            Return the current generation, to be passed to put by a reader about to read an aggregate.
+            """
+        with self._lock:
+            return self._generation
+
+    def put(self, test_id, etag, body, generation=None):
+        """
+            Cache the response of a test, evicting the least recently used entries if full.
+
+            Args:
+                test_id (str): The test.
+                etag (str): The ETag value of the response.
+                body (bytes): The serialized response.
+                generation (int): The generation taken before the aggregate was read. The response
+                    is not cached if the test has been invalidated since.
+
+            Returns:
+                CacheEntry: The new entry, returned even if it was not cached.
+            """
+        entry = CacheEntry(etag, body, time.monotonic() + self.ttl)
+        with self._lock:
+            if generation is not None and (generation < self._floor or
+                                           self._invalidated.get(test_id, -1) > generation):
+                return entry
+            self._entries[test_id] = entry
+            self._entries.move_to_end(test_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, test_ids):
+        """
+            Drop the entries of tests whose results have changed.
+            """
+        with self._lock:
+            self._generation += 1
+            for test_id in test_ids:
+                self._invalidated[test_id] = self._generation
+                self._invalidated.move_to_end(test_id)
+                if self._entries.pop(test_id, None) is not None:
+                    self.invalidations += 1
+            while len(self._invalidated) > self.max_entries:
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+    def clear(self):
+        """
+            Drop every entry.
+            """
+        with self._lock:
+            self._generation += 1
+            self._floor = self._generation
+            self._invalidated.clear()
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """
+            Return the cache counters.
+            """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def aggregate_cache():
+    """
+        Return the aggregate cache of the current application.
+        """
+    return current_app.extensions['markr_aggregate_cache']
@@ -0,0 +1,60 @@
+# app/cli.py
+import logging
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app import db
+from app.aggregates import rebuild_aggregates
+from app.cache import aggregate_cache
+from app.loader import LoadState, expand_paths, load_files
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Administrative commands, available as `flask markr <command>`
+markr_cli = AppGroup('markr', help='Markr administration commands.')
+
+
+@markr_cli.command('rebuild-aggregates')
+@click.option('--test-id', default=None, help='Only rebuild the aggregate of this test.')
+def rebuild_aggregates_command(test_id):
+    """
+        Recalculate the test_aggregates table from test_results.
+        """
+    count = rebuild_aggregates(db.session, test_id)
+    db.session.commit()
+    aggregate_cache().clear()
+    click.echo(f'Rebuilt aggregates for {count} test(s)')
+
+
+@markr_cli.command('load')
+@click.argument('patterns', nargs=-1, required=True)
+@click.option('--jobs', type=int, default=None, help='Number of parser processes. Defaults to the CPU count.')
+@click.option('--chunk-files', type=int, default=50, show_default=True,
+              help='Number of files parsed and committed together.')
+@click.option('--state', 'state_path', default='.markr-load-state.json', show_default=True,
+              help='File recording the files already loaded, so that an interrupted load can resume.')
+@click.option('--restart', is_flag=True, help='Ignore the state file and load every file again.')
+def load_command(patterns, jobs, chunk_files, state_path, restart):
+    """
+        Bulk load XML result files, given as paths or glob patterns.
+        """
+    paths = expand_paths(patterns)
+    if not paths:
+        raise click.UsageError('No files match the given paths.')
+    state = LoadState(state_path)
+    if restart:
+        state.files = {}
+
+    summary = load_files(db.session, paths, state, rule=current_app.config['IMPORT_CONFLICT_RULE'],
+                         batch_size=current_app.config['IMPORT_BATCH_SIZE'], jobs=jobs,
+                         chunk_files=chunk_files, progress=click.echo)
+    aggregate_cache().clear()
+
+    for path, errors in summary['errors'].items():
+        click.echo(f"Skipped invalid file {path}: {'; '.join(error['error'] for error in errors)}", err=True)
+    click.echo(f"Loaded {summary['records']} records ({summary['written']} rows written) from {summary['files']} "
+               f"file(s) in {summary['seconds']:.1f}s; {summary['skipped']} already loaded, "
+               f"{summary['invalid']} invalid")
+    if summary['invalid']:
+        raise SystemExit(1)
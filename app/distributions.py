@@ -0,0 +1,94 @@
+# app/distributions.py
+from datetime import datetime
+import logging
+from sqlalchemy import Numeric, cast, func, select
+from app.models import TestResults
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Timeline intervals, mapping each to the strftime format that truncates a timestamp on SQLite
+TIMELINE_INTERVALS = {
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d 00:00:00',
+}
+
+# The most bins a histogram may have
+MAX_BINS = 1000
+
+
+def _bucket(session, bins):
+    # The bin of each result, from 1 to bins, by its obtained marks as a share of the available marks.
+    # A full score falls in the last bin rather than the overflow bin of width_bucket.
+    marks, available = TestResults.obtained_marks, TestResults.available_marks
+    if session.get_bind().dialect.name == 'postgresql':
+        # Numeric operands keep the bin edges exact, where double precision could round a mark down
+        return func.least(func.width_bucket(cast(marks, Numeric), 0, cast(available, Numeric), bins), bins)
+    return func.min((marks * bins) // available + 1, bins)
+
+
+def mark_histogram(session, test_id, bins=10):
+    """
+        Count the results of a test in equal-width bins of the percentage of marks obtained.
+
+        Only the count of each bin is returned by the database, grouped with width_bucket on
+        PostgreSQL and integer division elsewhere.
+
+        Args:
+            session (Session): The session to query in.
+            test_id (str): The test to count.
+            bins (int): The number of bins between 0% and 100%.
+
+        Returns:
+            list: A dict with the lower and upper bound (as percentages) and count of each bin,
+                including empty bins, or an empty list if the test has no results.
+        """
+    bucket = _bucket(session, bins).label('bucket')
+    counts = dict(session.execute(
+        select(bucket, func.count())
+        .where(TestResults.test_id == test_id, TestResults.obtained_marks.isnot(None),
+               TestResults.available_marks > 0)
+        # Grouped by the label, since PostgreSQL would not match the repeated expression's parameters
+        .group_by('bucket')
+    ).all())
+    if not counts:
+        return []
+    return [{'lower': (i - 1) * 100 / bins, 'upper': i * 100 / bins, 'count': counts.get(i, 0)}
+            for i in range(1, bins + 1)]
+
+
+def score_timeline(session, test_id, interval='day'):
+    """
+        Summarise the results of a test per hour or day they were scanned on.
+
+        The results are grouped with date_trunc on PostgreSQL and strftime on SQLite, reading
+        the (test_id, scanned_on) index, so only one row per period is returned.
+
+        Args:
+            session (Session): The session to query in.
+            test_id (str): The test to summarise.
+            interval (str): The length of each period, a key of TIMELINE_INTERVALS.
+
+        Returns:
+            list: The start (in ISO 8601) and the count, mean, min and max obtained marks of each
+                period with results, in order.
+        """
+    if session.get_bind().dialect.name == 'postgresql':
+        period = func.date_trunc(interval, TestResults.scanned_on)
+    else:
+        period = func.strftime(TIMELINE_INTERVALS[interval], TestResults.scanned_on)
+    period = period.label('period')
+    marks = TestResults.obtained_marks
+    rows = session.execute(
+        select(period, func.count(marks), func.avg(marks), func.min(marks), func.max(marks))
+        .where(TestResults.test_id == test_id, TestResults.scanned_on.isnot(None), marks.isnot(None))
+        .group_by('period')
+        .order_by('period')
+    )
+    return [{
+        'start': (start if isinstance(start, datetime) else datetime.fromisoformat(start)).isoformat(),
+        'count': count,
+        'mean': float(mean),
+        'min': min_marks,
+        'max': max_marks,
+    } for start, count, mean, min_marks, max_marks in rows]
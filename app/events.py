@@ -0,0 +1,301 @@
+# app/events.py
+import json
+import logging
+import select
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from app import db
+from app.aggregates import summarize
+from app.models import TestAggregate
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# The PostgreSQL channel that imports notify the changed tests on
+CHANNEL = 'markr_aggregates'
+
+# Notification payloads must stay below PostgreSQL's limit of 8000 bytes
+NOTIFY_PAYLOAD_BYTES = 7000
+
+# Seconds between attempts to reconnect the PostgreSQL listener
+RECONNECT_DELAY = 5
+
+
+def notify_changes(session, test_ids):
+    """
+        On PostgreSQL, notify every listening process of the tests changed by the current transaction.
+
+        Notifications are delivered when the transaction commits, and dropped if it rolls back,
+        so listeners only hear about committed changes. Nothing is sent on other databases.
+
+        Args:
+            session (Session): The session of the transaction.
+            test_ids (iterable): The changed tests.
+        """
+    if session.get_bind().dialect.name != 'postgresql':
+        return
+    chunk = []
+    for test_id in sorted(test_ids):
+        if chunk and len(json.dumps(chunk + [test_id])) > NOTIFY_PAYLOAD_BYTES:
+            session.execute(sql_select(func.pg_notify(CHANNEL, json.dumps(chunk))))
+            chunk = []
+        chunk.append(test_id)
+    if chunk:
+        session.execute(sql_select(func.pg_notify(CHANNEL, json.dumps(chunk))))
+
+
+def aggregate_snapshots(session, test_ids):
+    """
+        Serialize the aggregates of the given tests as they are sent to subscribers.
+
+        Returns:
+            dict: A (version, JSON body) pair for each test with an aggregate row, keyed by test ID.
+        """
+    dumps = current_app.json.dumps
+    return {aggregate.test_id: (str(aggregate.version), dumps(summarize(aggregate)))
+            for aggregate in session.query(TestAggregate).filter(TestAggregate.test_id.in_(test_ids))}
+
+
+class Topic:
+    """
+        The latest aggregate snapshot of one test, shared by all of its subscribers.
+
+        Attributes:
+            test_id (str): The test.
+            snapshot (tuple): The (version, JSON body) of the latest aggregate.
+            subscribers (int): The number of open streams.
+        """
+
+    def __init__(self, test_id):
+        self.test_id = test_id
+        self.snapshot = None
+        self.subscribers = 0
+        self._condition = threading.Condition()
+
+    def update(self, snapshot):
+        """
+            Replace the snapshot and wake every subscriber.
+            """
+        with self._condition:
+            self.snapshot = snapshot
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """
+            Wait for a snapshot other than the given version.
+
+            Returns:
+                tuple: The new snapshot, or None if there was none before the timeout.
+            """
+        with self._condition:
+            changed = self._condition.wait_for(
+                lambda: self.snapshot is not None and self.snapshot[0] != version, timeout)
+            return self.snapshot if changed else None
+
+
+class Subscription:
+    """
+        A Server-Sent Events response body following one topic.
+
+        Each new snapshot is sent as an `aggregate` event whose ID is the aggregate version, so
+        that a reconnecting EventSource (which sends Last-Event-ID) only receives a snapshot it
+        has not seen. A comment is sent after keepalive seconds without events, which also
+        detects clients that have gone away. Closing the body ends the subscription.
+        """
+
+    def __init__(self, events, topic, last_event_id, keepalive):
+        self._events = events
+        self._topic = topic
+        self._version = last_event_id
+        self._keepalive = keepalive
+        self._closed = False
+
+    def __iter__(self):
+        while not self._closed:
+            snapshot = self._topic.wait(self._version, self._keepalive)
+            if snapshot is None:
+                yield ': keepalive\n\n'
+                continue
+            self._version, body = snapshot
+            yield f'id: {self._version}\nevent: aggregate\ndata: {body}\n\n'
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._events.unsubscribe(self._topic)
+
+
+class AggregateEvents:
+    """
+        Push aggregate snapshots to the subscribers of each test when its results change.
+
+        Imports publish the tests they committed, in process and, on PostgreSQL, to every other
+        process through NOTIFY (see notify_changes), which a listener thread receives. A
+        dispatcher thread reads the changed aggregates of subscribed tests with one query and
+        shares each snapshot with all of the test's subscribers, then waits for interval
+        seconds, so a burst of imports produces at most one update per interval. The cost of
+        an update therefore depends on the number of changed tests, not on the number of
+        subscribers. The listener also invalidates the changed tests in the aggregate cache of
+        this process, clearing it whenever it (re)connects since notifications may have been
+        missed. The threads are started by start, which the first subscription and the first
+        cache miss call in the process that serves them.
+
+        Attributes:
+            app (Flask): The application the snapshots are read in.
+            cache (AggregateCache): The cache invalidated by notifications from other processes.
+            interval (float): The shortest time between updates.
+            max_subscribers (int): The most open streams in this process.
+            subscribers (int): The number of open streams.
+            updates (int): The number of snapshots dispatched.
+        """
+
+    def __init__(self, app, cache, interval=1.0, max_subscribers=500):
+        self.app = app
+        self.cache = cache
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self.subscribers = 0
+        self.updates = 0
+        self._lock = threading.Lock()
+        self._topics = {}
+        self._dirty = set()
+        self._wakeup = threading.Event()
+        self._started = False
+
+    def subscribe(self, test_id, snapshot):
+        """
+            Follow the aggregate of a test.
+
+            Args:
+                test_id (str): The test.
+                snapshot (tuple): The (version, JSON body) read by the request, sent first.
+
+            Returns:
+                Topic: The test's topic, or None if the process has max_subscribers streams open.
+            """
+        with self._lock:
+            if self.subscribers >= self.max_subscribers:
+                return None
+            topic = self._topics.get(test_id)
+            if topic is None:
+                topic = self._topics[test_id] = Topic(test_id)
+            if topic.snapshot is None or int(snapshot[0]) > int(topic.snapshot[0]):
+                topic.update(snapshot)
+            topic.subscribers += 1
+            self.subscribers += 1
+        self.start()
+        return topic
+
+    def unsubscribe(self, topic):
+        """
+            End a subscription, forgetting the topic once it has no subscribers.
+            """
+        with self._lock:
+            topic.subscribers -= 1
+            self.subscribers -= 1
+            if topic.subscribers == 0 and self._topics.get(topic.test_id) is topic:
+                del self._topics[topic.test_id]
+
+    def publish(self, test_ids):
+        """
+            Mark tests as changed, waking the dispatcher if any of them has subscribers.
+            """
+        with self._lock:
+            changed = {test_id for test_id in test_ids if test_id in self._topics}
+            self._dirty.update(changed)
+        if changed:
+            self._wakeup.set()
+
+    def gauges(self):
+        """
+            Sample the subscriptions as (name, help, value) gauges for Metrics.render.
+            """
+        with self._lock:
+            return [
+                ('markr_stream_subscribers', 'Open aggregate streams in this process.', self.subscribers),
+                ('markr_stream_topics', 'Tests with open aggregate streams in this process.', len(self._topics)),
+                ('markr_stream_updates', 'Aggregate snapshots dispatched to streams by this process.', self.updates),
+            ]
+
+    def start(self):
+        """
+            Start the dispatcher and, on PostgreSQL, the listener, unless this process already has.
+            """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._dispatch, name='markr-stream-dispatch', daemon=True).start()
+        if self.app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+            threading.Thread(target=self._listen, name='markr-stream-listen', daemon=True).start()
+
+    def _dispatch(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                topics = [self._topics[test_id] for test_id in dirty if test_id in self._topics]
+            if topics:
+                try:
+                    with self.app.app_context():
+                        snapshots = aggregate_snapshots(db.session, [topic.test_id for topic in topics])
+                except Exception as e:
+                    logger.error(f"Could not read aggregates for streams: {e}")
+                    snapshots = {}
+                for topic in topics:
+                    snapshot = snapshots.get(topic.test_id)
+                    if snapshot is not None and snapshot != topic.snapshot:
+                        topic.update(snapshot)
+                        self.updates += 1
+            # Changes published meanwhile are dispatched together after the interval
+            time.sleep(self.interval)
+
+    def _listen(self):
+        with self.app.app_context():
+            engine = db.engine
+        while True:
+            connection = None
+            try:
+                # A connection of its own rather than a pooled one, since it is held indefinitely
+                args, kwargs = engine.dialect.create_connect_args(engine.url)
+                connection = engine.dialect.connect(*args, **kwargs)
+                if not hasattr(connection, 'poll'):
+                    logger.warning("The database driver does not support LISTEN, streams only follow "
+                                   "imports made by this process")
+                    return
+                connection.autocommit = True
+                connection.cursor().execute(f'LISTEN {CHANNEL}')
+                # Catch up with changes made while no listener was connected
+                self.cache.clear()
+                with self._lock:
+                    self._dirty.update(self._topics)
+                self._wakeup.set()
+                while True:
+                    if select.select([connection], [], [], 60) == ([], [], []):
+                        continue
+                    connection.poll()
+                    test_ids = []
+                    while connection.notifies:
+                        test_ids.extend(json.loads(connection.notifies.pop(0).payload))
+                    self.cache.invalidate(test_ids)
+                    self.publish(test_ids)
+            except Exception as e:
+                logger.error(f"Aggregate stream listener disconnected: {e}")
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+            time.sleep(RECONNECT_DELAY)
+
+
+def aggregate_events():
+    """
+        Return the aggregate event broadcaster of the current application.
+        """
+    return current_app.extensions['markr_aggregate_events']
@@ -0,0 +1,109 @@
+# app/export.py
+import csv
+import io
+import json
+import logging
+from sqlalchemy import select
+from app.models import TestResults
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# The exported columns, in output order. The packed answers are not exported.
+EXPORT_COLUMNS = ['student_number', 'test_id', 'first_name', 'last_name', 'scanned_on', 'available_marks',
+                  'obtained_marks']
+
+# Supported export formats and their media types
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _page(test_id, after):
+    condition = TestResults.test_id == test_id
+    if after is not None:
+        condition = condition & (TestResults.student_number > after)
+    return condition
+
+
+def export_partitions(session, test_id, after=None, limit=None, batch_size=2000):
+    """
+        Read the results of a test in student_number order, a batch of rows at a time.
+
+        Rows are fetched with yield_per, which streams them from a server-side cursor where the
+        driver supports one (e.g. psycopg2), so only one batch is held in memory at a time. The
+        order follows the (test_id, student_number) index, so each page starts with an index
+        seek rather than skipping earlier rows.
+
+        Args:
+            session (Session): The session to read in.
+            test_id (str): The test to export.
+            after (str): Only export students after this student number, the last one received.
+            limit (int): The maximum number of rows, or None for every remaining row.
+            batch_size (int): The number of rows per batch.
+
+        Yields:
+            list: Each batch of rows, as tuples in EXPORT_COLUMNS order.
+        """
+    stmt = (select(*[getattr(TestResults, column) for column in EXPORT_COLUMNS])
+            .where(_page(test_id, after))
+            .order_by(TestResults.student_number)
+            .limit(limit)
+            .execution_options(yield_per=batch_size))
+    # Executed on the connection, since the rows are plain tuples that need no ORM processing
+    result = session.connection().execute(stmt)
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def next_cursor(session, test_id, after, limit):
+    """
+        Return the cursor of the page after a limited export, or None if it is the last page.
+
+        Only the student numbers of the page are read, from the index.
+        """
+    keys = session.execute(
+        select(TestResults.student_number)
+        .where(_page(test_id, after))
+        .order_by(TestResults.student_number)
+        .offset(limit - 1)
+        .limit(2)
+    ).scalars().all()
+    return keys[0] if len(keys) == 2 else None
+
+
+def _formatted(rows):
+    # scanned_on is the only column that needs converting, to an ISO 8601 string
+    for student_number, test_id, first_name, last_name, scanned_on, available_marks, obtained_marks in rows:
+        yield (student_number, test_id, first_name, last_name, scanned_on and scanned_on.isoformat(),
+               available_marks, obtained_marks)
+
+
+def csv_chunks(partitions, header=True):
+    """
+        Format batches of rows as CSV, one string per batch.
+        """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for rows in partitions:
+        writer.writerows(_formatted(rows))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(partitions):
+    """
+        Format batches of rows as newline-delimited JSON objects, one string per batch.
+        """
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    for rows in partitions:
+        yield ''.join(dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in _formatted(rows))
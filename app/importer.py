@@ -0,0 +1,127 @@
+# app/importer.py
+import logging
+import time
+from flask import current_app
+from app import db
+from app.cache import aggregate_cache
+from app.events import aggregate_events, notify_changes
+from app.ledger import check_payload, record_payload, spool_payload
+from app.metrics import CountingReader, RequestTimings, current_timings
+from app.parser import iter_results
+from app.payloads import MARKR_CONTENT_TYPE, open_documents
+from app.upsert import ResultUpserter
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+
+def import_documents(documents, timings=None, digest=None, payload_bytes=None):
+    """
+        Import a sequence of Markr XML documents in a single transaction.
+
+        Each document is parsed as a stream, validating each record and writing it through a
+        batched bulk upsert in a single pass. Every document is validated, but if any record of
+        any document is incomplete, or a document cannot be decoded, the whole transaction is
+        rolled back. Once committed, the cached aggregates of the changed tests are invalidated
+        and their aggregate streams are notified.
+        If the payload's fingerprint is given, it is added to the import ledger in the same
+        transaction.
+
+        The time spent in each phase and the number of records are recorded in the timings for
+        /metrics.
+
+        Args:
+            documents (iterable): A (name, stream) pair for each document, see open_documents.
+            timings (RequestTimings): The timings to record in, those of the request by default.
+            digest (str): The fingerprint of the payload, see app.ledger.fingerprint.
+            payload_bytes (int): The size of the payload.
+
+        Returns:
+            int: The number of records imported.
+            list: The name, record count and incomplete records of each document, in order.
+
+        Raises:
+            PayloadError: If the payload cannot be decoded, after the transaction is rolled back.
+            Exception: Any error writing to the database, after the transaction is rolled back.
+        """
+    timings = timings or current_timings() or RequestTimings()
+    phases = timings.phases
+    clock = time.perf_counter
+
+    results = []
+    valid = True
+    upserter = ResultUpserter(db.session,
+                              batch_size=current_app.config['IMPORT_BATCH_SIZE'],
+                              rule=current_app.config['IMPORT_CONFLICT_RULE'],
+                              phases=phases,
+                              hash_records=current_app.config['IMPORT_RECORD_HASHES'])
+
+    try:
+        for name, stream in documents:
+            incomplete_records = []
+            records = 0
+            for record in iter_results(stream, incomplete_records, phases):
+                records += 1
+                if valid:
+                    upserter.add(record)
+            results.append({'document': len(results), 'name': name, 'records': records,
+                            'incomplete_records': incomplete_records})
+            valid = valid and not incomplete_records
+
+        # Write the last partial batch and commit changes to the database
+        if valid and results:
+            upserter.flush()
+            if digest is not None:
+                record_payload(db.session, digest, payload_bytes, upserter.count,
+                               current_app.config['IMPORT_LEDGER_RETENTION'])
+            notify_changes(db.session, upserter.test_ids)
+            started = clock()
+            db.session.commit()
+            phases['commit'] += clock() - started
+            aggregate_cache().invalidate(upserter.test_ids)
+            aggregate_events().publish(upserter.test_ids)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if not valid or not results:
+        db.session.rollback()
+        return 0, results
+
+    timings.rows += upserter.count
+    return upserter.count, results
+
+
+def import_payload(stream, content_type=MARKR_CONTENT_TYPE, content_encoding=None, digest=None):
+    """
+        Import a payload holding one Markr XML document, or several as a multipart body.
+
+        When IMPORT_LEDGER is enabled the payload is fingerprinted before it is parsed, spooling
+        it as it is read, and a payload the ledger has already seen is not imported again.
+
+        Args:
+            stream (file-like): The binary payload, as sent.
+            content_type (str): The Content-Type header, see is_supported.
+            content_encoding (str): The Content-Encoding header, if any.
+            digest (str): The fingerprint of the payload, if it was taken while spooling it.
+
+        Returns:
+            int: The number of records imported.
+            list: The name, record count and incomplete records of each document, in order.
+
+        Raises:
+            AlreadyImported: If the ledger records the payload as imported.
+        """
+    timings = current_timings() or RequestTimings()
+    stream = CountingReader(stream, timings)
+    payload_bytes = None
+    if current_app.config['IMPORT_LEDGER']:
+        started = time.perf_counter()
+        if digest is None:
+            stream, digest, payload_bytes = spool_payload(stream, content_type, content_encoding,
+                                                          current_app.config['IMPORT_SPOOL_MEMORY'])
+        check_payload(db.session, digest, current_app.config['IMPORT_LEDGER_RETENTION'])
+        timings.phases['fingerprint'] += time.perf_counter() - started
+    documents = open_documents(stream, content_type, content_encoding)
+    return import_documents(documents, timings, digest, payload_bytes)
+
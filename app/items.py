@@ -0,0 +1,100 @@
+# app/items.py
+import logging
+import numpy as np
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# numpy view of the answers packed by app.parser.ANSWER_STRUCT
+ANSWER_DTYPE = np.dtype([('question', '<u2'), ('available', '<i2'), ('awarded', '<i2'), ('choice', 'S1')])
+
+
+def unpack_answers(blobs):
+    """
+        Unpack the answers of many students into flat arrays without a Python loop per answer.
+
+        Args:
+            blobs (list): The packed answers of each student, as bytes-like objects.
+
+        Returns:
+            numpy.ndarray: Every answer as an ANSWER_DTYPE record.
+            numpy.ndarray: The index into blobs of the student each answer belongs to.
+        """
+    lengths = np.fromiter((len(blob) for blob in blobs), dtype=np.int64, count=len(blobs))
+    answers = np.frombuffer(b''.join(blobs), dtype=ANSWER_DTYPE)
+    students = np.repeat(np.arange(len(blobs)), lengths // ANSWER_DTYPE.itemsize)
+    return answers, students
+
+
+def item_analysis(blobs):
+    """
+        Calculate per-question statistics for a test from its students' packed answers.
+
+        The awarded marks are scattered into a students x questions matrix, with unanswered
+        questions scoring zero, and every statistic is a column-wise numpy reduction over it.
+        The matrix has a column per distinct question number, however large the numbers are.
+        If a student answered a question more than once, the last answer counts.
+
+        - difficulty: the share of the available marks that were awarded (the facility index).
+        - discrimination: the correlation between the question's score and the student's score
+          on the rest of the test (corrected item-total correlation), None if either is constant.
+        - distribution: how many students chose each option, with blank answers under 'blank'.
+
+        Args:
+            blobs (list): The packed answers of each student, as bytes-like objects.
+
+        Returns:
+            list: A dict of statistics per question, ordered by question number.
+        """
+    answers, students = unpack_answers(blobs)
+    # Number the distinct questions from 0, the column of each in the matrices
+    question_numbers, questions = np.unique(answers['question'], return_inverse=True)
+    question_count = len(question_numbers)
+
+    # Keep the last answer of each student to each question
+    cells = students * question_count + questions
+    _, last = np.unique(cells[::-1], return_index=True)
+    if len(last) < len(cells):
+        keep = np.sort(len(cells) - 1 - last)
+        answers, students, questions = answers[keep], students[keep], questions[keep]
+
+    scores = np.zeros((len(blobs), question_count))
+    scores[students, questions] = answers['awarded']
+
+    available = np.zeros((len(blobs), question_count), dtype=ANSWER_DTYPE['available'])
+    available[students, questions] = answers['available']
+
+    # Per-question counts, sums and maxima for difficulty and marks available
+    answered = np.bincount(questions, minlength=question_count)
+    awarded_sum = scores.sum(axis=0)
+    available_sum = available.sum(axis=0, dtype=np.int64)
+    available_max = available.max(axis=0)
+
+    # Corrected item-total correlation, from the covariance of each column with the total
+    totals = scores.sum(axis=1)
+    item_var = scores.var(axis=0)
+    total_var = totals.var()
+    item_total_cov = scores.T @ totals / len(blobs) - scores.mean(axis=0) * totals.mean()
+    item_rest_cov = item_total_cov - item_var
+    rest_var = total_var - 2 * item_total_cov + item_var
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difficulty = awarded_sum / available_sum
+        discrimination = item_rest_cov / np.sqrt(item_var * rest_var)
+
+    # Count each option per question with a single bincount over (question, option byte)
+    choices = answers['choice'].view(np.uint8).astype(np.int64)
+    distribution = np.bincount(questions * 256 + choices, minlength=question_count * 256).reshape(question_count, 256)
+
+    items = []
+    for question in range(question_count):
+        counts = distribution[question]
+        items.append({
+            'question': int(question_numbers[question]),
+            'answered': int(answered[question]),
+            'marks_available': int(available_max[question]),
+            'difficulty': float(difficulty[question]) if np.isfinite(difficulty[question]) else None,
+            'discrimination': float(discrimination[question]) if np.isfinite(discrimination[question]) else None,
+            'distribution': {(chr(choice) if choice else 'blank'): int(counts[choice])
+                             for choice in np.flatnonzero(counts)},
+        })
+    return items
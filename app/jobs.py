@@ -0,0 +1,233 @@
+# app/jobs.py
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import threading
+import uuid
+from flask import current_app
+from sqlalchemy import and_, or_, update
+from app import db
+from app.importer import import_payload
+from app.ledger import AlreadyImported, check_payload, fingerprint
+from app.models import ImportJob
+from app.payloads import MARKR_CONTENT_TYPE, MULTIPART_CONTENT_TYPE, PayloadError
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+
+def utcnow():
+    """
+        Return the current UTC time as a naive datetime, as stored in the import_jobs table.
+        """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def spool_dir():
+    """
+        Return the directory that queued payloads are written to, creating it if needed.
+        """
+    path = current_app.config['IMPORT_SPOOL_DIR'] or os.path.join(current_app.instance_path, 'spool')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def submit_job(stream, content_type=MARKR_CONTENT_TYPE, content_encoding=None):
+    """
+        Spool an import payload to disk, as sent, and queue it for the import workers.
+
+        When IMPORT_LEDGER is enabled the payload is fingerprinted as it is spooled, and a
+        payload the ledger has already seen is discarded instead of queued.
+
+        Args:
+            stream (file-like): A binary stream containing the payload.
+            content_type (str): The Content-Type header, see is_supported.
+            content_encoding (str): The Content-Encoding header, if any.
+
+        Returns:
+            ImportJob: The queued job.
+
+        Raises:
+            AlreadyImported: If the ledger records the payload as imported.
+        """
+    job_id = uuid.uuid4().hex
+    path = os.path.join(spool_dir(), f'{job_id}.xml')
+    with open(path, 'wb') as payload:
+        digest, payload_bytes = fingerprint(stream, payload, content_type, content_encoding)
+
+    if current_app.config['IMPORT_LEDGER']:
+        try:
+            check_payload(db.session, digest, current_app.config['IMPORT_LEDGER_RETENTION'])
+        except AlreadyImported:
+            os.remove(path)
+            raise
+    else:
+        digest = None
+
+    job = ImportJob(id=job_id, status='queued', payload_path=path, payload_bytes=payload_bytes,
+                    content_type=content_type, content_encoding=content_encoding, payload_digest=digest,
+                    created_at=utcnow())
+    db.session.add(job)
+    db.session.commit()
+    logger.info(f"Queued import job {job_id} ({job.payload_bytes} bytes)")
+
+    workers = current_app.extensions.get('markr_import_workers')
+    if workers is not None:
+        workers.notify()
+    return job
+
+
+def claim_next_job():
+    """
+        Claim the oldest runnable job for this worker.
+
+        A job is runnable if it is queued, or if it has been running for longer than
+        IMPORT_JOB_TIMEOUT, which means the worker that claimed it died (e.g. on a restart).
+        The claim is a conditional UPDATE, so only one worker across all processes wins it.
+
+        Returns:
+            ImportJob: The claimed job, or None if there is nothing to do.
+        """
+    stale = utcnow() - timedelta(seconds=current_app.config['IMPORT_JOB_TIMEOUT'])
+    runnable = or_(ImportJob.status == 'queued',
+                   and_(ImportJob.status == 'running', ImportJob.started_at < stale))
+
+    candidates = db.session.query(ImportJob.id).filter(runnable).order_by(ImportJob.created_at).limit(10).all()
+    for (job_id,) in candidates:
+        claimed = db.session.execute(
+            update(ImportJob).where(ImportJob.id == job_id, runnable).values(status='running', started_at=utcnow())
+        )
+        db.session.commit()
+        if claimed.rowcount == 1:
+            return db.session.get(ImportJob, job_id)
+    return None
+
+
+def run_job(job):
+    """
+        Import the payload of a claimed job and record the outcome.
+
+        The payload is removed once the job has succeeded or been rejected as invalid, and kept
+        for inspection if the import failed. A payload that was imported while the job was queued
+        (e.g. a retry queued twice) succeeds without being imported again.
+
+        Args:
+            job (ImportJob): The job to run.
+        """
+    logger.info(f"Running import job {job.id}")
+    try:
+        with open(job.payload_path, 'rb') as payload:
+            records, documents = import_payload(payload, job.content_type or MARKR_CONTENT_TYPE,
+                                                job.content_encoding, job.payload_digest)
+    except AlreadyImported as e:
+        job.status = 'succeeded'
+        job.records = e.entry.records
+    except PayloadError as e:
+        job.status = 'invalid'
+        job.incomplete_records = [{'error': str(e)}]
+    except Exception as e:
+        logger.error(f"Import job {job.id} failed: {e}")
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.records = records
+        if (job.content_type or '').startswith(MULTIPART_CONTENT_TYPE):
+            # Report the documents that were rejected, with their own errors
+            incomplete_records = [document for document in documents if document['incomplete_records']]
+            if not documents:
+                incomplete_records = [{'error': 'No documents found'}]
+        else:
+            incomplete_records = documents[0]['incomplete_records']
+        if incomplete_records:
+            job.status = 'invalid'
+            job.incomplete_records = incomplete_records
+        else:
+            job.status = 'succeeded'
+
+    job.finished_at = utcnow()
+    db.session.commit()
+
+    if job.status != 'failed':
+        try:
+            os.remove(job.payload_path)
+        except OSError as e:
+            logger.warning(f"Could not remove payload of import job {job.id}: {e}")
+
+
+def process_next_job():
+    """
+        Claim and run a single job.
+
+        Returns:
+            ImportJob: The job that was run, or None if the queue was empty.
+        """
+    job = claim_next_job()
+    if job is not None:
+        run_job(job)
+    return job
+
+
+class ImportWorkerPool:
+    """
+        A fixed-size pool of threads that run queued import jobs.
+
+        Workers are woken as soon as a job is submitted in this process, and otherwise poll the
+        import_jobs table so that jobs queued by other processes or left over from a restart
+        are picked up.
+
+        Attributes:
+            app (Flask): The application the workers run in.
+            size (int): The number of worker threads.
+            poll_interval (float): Seconds between polls of the queue when idle.
+        """
+
+    def __init__(self, app, size, poll_interval):
+        self.app = app
+        self.size = size
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """
+            Start the worker threads.
+            """
+        for i in range(self.size):
+            thread = threading.Thread(target=self._run, name=f'markr-import-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """
+            Wake the idle workers to look for new jobs.
+            """
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    job = process_next_job()
+                except Exception as e:
+                    logger.error(f"Import worker error: {e}")
+                    job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+def start_workers(app):
+    """
+        Start the import worker pool of an application.
+
+        Args:
+            app (Flask): The application to run jobs for.
+
+        Returns:
+            ImportWorkerPool: The started pool.
+        """
+    workers = ImportWorkerPool(app, app.config['IMPORT_WORKERS'], app.config['IMPORT_POLL_INTERVAL'])
+    app.extensions['markr_import_workers'] = workers
+    workers.start()
+    logger.info(f"Started {workers.size} import worker(s)")
+    return workers
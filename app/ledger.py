@@ -0,0 +1,121 @@
+# app/ledger.py
+from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+import tempfile
+from sqlalchemy import delete, select
+from app.models import ImportedPayload
+from app.upsert import INSERT_CONSTRUCTS
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# The number of bytes read from a payload at a time while fingerprinting it
+READ_SIZE = 1024 * 1024
+
+
+class AlreadyImported(Exception):
+    """
+        Raised instead of importing a payload that the ledger records as already imported.
+
+        Attributes:
+            entry (ImportedPayload): The ledger entry of the earlier import.
+        """
+
+    def __init__(self, entry):
+        super().__init__(f'Payload {entry.digest} already imported')
+        self.entry = entry
+
+
+def fingerprint(stream, target, content_type, content_encoding=None):
+    """
+        Copy a payload to a file while computing its fingerprint.
+
+        The fingerprint is the SHA-256 of the content type and encoding followed by the bytes as
+        sent, so a re-sent payload is recognised without decompressing or parsing it.
+
+        Args:
+            stream (file-like): The binary payload.
+            target (file-like): The file the payload is copied to.
+            content_type (str): The Content-Type header.
+            content_encoding (str): The Content-Encoding header, if any.
+
+        Returns:
+            str: The hexadecimal fingerprint.
+            int: The size of the payload in bytes.
+        """
+    digest = hashlib.sha256(f'{content_type}\0{content_encoding or ""}\0'.encode('utf-8'))
+    size = 0
+    while True:
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        target.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def spool_payload(stream, content_type, content_encoding=None, max_memory=16 * 1024 * 1024):
+    """
+        Fingerprint a payload, spooling it so that it can be parsed afterwards.
+
+        Payloads up to max_memory bytes are kept in memory, larger ones in a temporary file.
+
+        Returns:
+            file-like: The spooled payload, positioned at its start.
+            str: The hexadecimal fingerprint.
+            int: The size of the payload in bytes.
+        """
+    payload = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    digest, size = fingerprint(stream, payload, content_type, content_encoding)
+    payload.seek(0)
+    return payload, digest, size
+
+
+def check_payload(session, digest, retention):
+    """
+        Raise AlreadyImported if the ledger holds the payload with the given fingerprint.
+
+        Entries older than the retention are ignored even if they have not been pruned yet, since
+        entries are only pruned when a later import is recorded.
+
+        Args:
+            session (Session): The session to read in.
+            digest (str): The fingerprint of the payload.
+            retention (float): Seconds that entries are kept for.
+        """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    entry = session.execute(
+        select(ImportedPayload).where(ImportedPayload.digest == digest,
+                                      ImportedPayload.imported_at >= now - timedelta(seconds=retention))
+    ).scalar_one_or_none()
+    if entry is not None:
+        logger.info(f"Payload {digest} already imported at {entry.imported_at}, skipping")
+        raise AlreadyImported(entry)
+
+
+def record_payload(session, digest, payload_bytes, records, retention):
+    """
+        Add an imported payload to the ledger and prune the entries older than the retention.
+
+        Identical payloads imported concurrently are both recorded without error. Nothing is
+        committed, so the entry is committed with the imported records.
+
+        Args:
+            session (Session): The session of the import.
+            digest (str): The fingerprint of the payload.
+            payload_bytes (int): The size of the payload.
+            records (int): The number of records imported.
+            retention (float): Seconds that entries are kept for.
+        """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    # Pruned first, so that an expired entry of the same payload is replaced rather than kept
+    session.execute(delete(ImportedPayload).where(ImportedPayload.imported_at < now - timedelta(seconds=retention)))
+    values = {'digest': digest, 'payload_bytes': payload_bytes, 'records': records, 'imported_at': now}
+    insert = INSERT_CONSTRUCTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        session.merge(ImportedPayload(**values))
+    else:
+        session.execute(insert(ImportedPayload.__table__).values(values).on_conflict_do_nothing())
+
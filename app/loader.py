@@ -0,0 +1,267 @@
+# app/loader.py
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import glob
+import io
+import json
+import logging
+import os
+import time
+import sqlalchemy as sa
+from app.aggregates import apply_changes, lock_aggregates
+from app.events import notify_changes
+from app.models import TestResults
+from app.parser import iter_results
+from app.upsert import CONFLICT_RULES, INSERT_CONSTRUCTS, key_of, upsert_results
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# The TestResults columns, in the order records are passed between processes and copied
+COLUMNS = ['student_number', 'test_id', 'scanned_on', 'first_name', 'last_name', 'available_marks',
+           'obtained_marks', 'answers']
+
+
+def expand_paths(patterns):
+    """
+        Expand file paths and glob patterns into a sorted list of unique absolute paths.
+        """
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        paths.update(os.path.abspath(path) for path in (matches or [pattern]) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def parse_file(path):
+    """
+        Validate and extract every record of an XML file. Runs in a worker process.
+
+        Args:
+            path (str): The file to parse.
+
+        Returns:
+            str: The path.
+            list: The records as tuples in COLUMNS order, empty if the file is invalid.
+            list: The validation errors.
+        """
+    errors = []
+    records = []
+    with open(path, 'rb') as f:
+        for record in iter_results(f, errors):
+            records.append(tuple(record[column] for column in COLUMNS))
+    return path, ([] if errors else records), errors
+
+
+class LoadState:
+    """
+        The files already loaded by earlier runs, so that an interrupted load can be resumed.
+
+        A file counts as loaded while its size and modification time are unchanged. The state
+        is saved after every committed chunk.
+
+        Attributes:
+            path (str): The JSON file the state is kept in.
+            files (dict): The size and mtime of each loaded file, keyed by path.
+        """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.files = json.load(f)
+
+    @staticmethod
+    def signature(path):
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def is_loaded(self, path):
+        return self.files.get(path) == self.signature(path)
+
+    def mark_loaded(self, paths):
+        for path in paths:
+            self.files[path] = self.signature(path)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.files, f)
+        os.replace(temporary, self.path)
+
+
+def staging_table():
+    """
+        Build the temporary table records are copied into before being merged, dropped on commit.
+
+        scanned_on is staged as timestamptz so that offsets are converted as the ORM path does.
+        """
+    table = TestResults.__table__
+    return sa.Table(
+        'markr_load_staging', sa.MetaData(),
+        *[sa.Column(column, sa.DateTime(timezone=True) if column == 'scanned_on' else table.c[column].type)
+          for column in COLUMNS],
+        prefixes=['TEMPORARY'], postgresql_on_commit='DROP',
+    )
+
+
+def merge_staged(session, staging, test_ids, rule):
+    """
+        Merge the staged records into test_results with a single INSERT ... SELECT ... ON CONFLICT
+        DO UPDATE, folding the changes into the aggregates of their tests.
+
+        As in ResultUpserter, the aggregate rows are locked first, then the scores the staged
+        records replace are read with one join against test_results, so the aggregates are
+        corrected by the rows that change rather than recalculated from every result of the
+        touched tests.
+
+        Args:
+            session (Session): The session to write in.
+            staging (Table): The staging table holding the records, unique by primary key.
+            test_ids (set): The tests of the staged records.
+            rule (str): The name of the conflict rule.
+        """
+    connection = session.connection()
+    table = TestResults.__table__
+    where = CONFLICT_RULES[rule][1]
+    dialect = session.get_bind().dialect.name
+    aggregates = lock_aggregates(session, test_ids, INSERT_CONSTRUCTS.get(dialect))
+
+    # Staged records without a stored row are inserted; the others replace it if the rule allows
+    replaces = sa.or_(table.c.student_number.is_(None), where(table, staging.c)) if where is not None else sa.true()
+    changes = connection.execute(
+        sa.select(staging.c.test_id, table.c.obtained_marks, staging.c.obtained_marks, staging.c.available_marks)
+        .select_from(staging.outerjoin(table, sa.and_(table.c.student_number == staging.c.student_number,
+                                                      table.c.test_id == staging.c.test_id)))
+        .where(replaces)
+        .order_by(staging.c.test_id, staging.c.student_number)
+    ).all()
+    apply_changes(session, [tuple(change) for change in changes], aggregates)
+
+    # The WHERE clause lets SQLite tell the upsert clause from a join constraint
+    stmt = INSERT_CONSTRUCTS[dialect](table)
+    stmt = stmt.from_select(COLUMNS, sa.select(*[staging.c[column] for column in COLUMNS]).where(sa.true()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.student_number, table.c.test_id],
+        # The loader does not hash records, so any stored hash no longer describes the row
+        set_={**{column: stmt.excluded[column] for column in COLUMNS if not table.c[column].primary_key},
+              'record_hash': None},
+        where=where(table, stmt.excluded) if where is not None else None,
+    )
+    connection.execute(stmt)
+
+
+def _copy_merge(session, records, rule):
+    """
+        Write records with COPY into a temporary staging table, then merge them (see merge_staged).
+
+        Returns:
+            bool: False if the connection does not support COPY, in which case nothing was written.
+        """
+    connection = session.connection()
+    cursor = connection.connection.cursor()
+    if not hasattr(cursor, 'copy_expert'):
+        return False
+
+    staging = staging_table()
+    staging.create(connection)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        writer.writerow(['\\x' + value.hex() if isinstance(value, bytes) else
+                         value.isoformat() if hasattr(value, 'isoformat') else value
+                         for value in (record[column] for column in COLUMNS)])
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY markr_load_staging ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    merge_staged(session, staging, {record['test_id'] for record in records}, rule)
+    return True
+
+
+def write_records(session, records, rule, batch_size):
+    """
+        Write a chunk of de-duplicated records and bring the aggregates of their tests up to date.
+
+        PostgreSQL connections use COPY and one set-based merge, which corrects the aggregates
+        by the rows it changes. Other databases go through the batched ResultUpserter, which
+        maintains the aggregates itself. The caller commits.
+
+        Args:
+            session (Session): The session to write in.
+            records (list): The record dicts, unique by primary key.
+            rule (str): The name of the conflict rule.
+            batch_size (int): The upsert batch size, for databases without COPY.
+        """
+    if session.get_bind().dialect.name == 'postgresql' and _copy_merge(session, records, rule):
+        return
+    upsert_results(session, records, batch_size=batch_size, rule=rule)
+
+
+def load_files(session, paths, state, rule='last-write-wins', batch_size=1000, jobs=None, chunk_files=50,
+               progress=None):
+    """
+        Bulk load XML files into test_results.
+
+        Files are parsed in a process pool, in chunks of chunk_files. The records of each chunk
+        are collapsed by primary key with the conflict rule, in file order, then written and
+        committed together, and the chunk's files are recorded in the load state. Duplicates
+        across chunks are resolved by the same rule in the database, so the outcome is the
+        same as merging every file at once. Invalid files are skipped and reported.
+
+        Args:
+            session (Session): The session to write in.
+            paths (list): The files to load.
+            state (LoadState): The files loaded by earlier runs, which are skipped.
+            rule (str): The name of the conflict rule.
+            batch_size (int): The upsert batch size, for databases without COPY.
+            jobs (int): The number of parser processes, the CPU count by default.
+            chunk_files (int): The number of files committed together.
+            progress (callable): Called with a message after every chunk.
+
+        Returns:
+            dict: The number of files loaded, skipped and invalid, the records read and written,
+                the validation errors of each invalid file and the elapsed seconds.
+        """
+    merge = CONFLICT_RULES[rule][0]
+    pending = [path for path in paths if not state.is_loaded(path)]
+    summary = {'files': 0, 'skipped': len(paths) - len(pending), 'invalid': 0, 'records': 0, 'written': 0,
+               'errors': {}, 'seconds': 0.0}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for start in range(0, len(pending), chunk_files):
+            chunk = pending[start:start + chunk_files]
+            merged = {}
+            for path, records, errors in pool.map(parse_file, chunk):
+                if errors:
+                    summary['invalid'] += 1
+                    summary['errors'][path] = errors
+                    continue
+                summary['records'] += len(records)
+                for values in records:
+                    record = dict(zip(COLUMNS, values))
+                    key = key_of(record)
+                    current = merged.get(key)
+                    merged[key] = record if current is None else merge(current, record)
+
+            try:
+                write_records(session, list(merged.values()), rule, batch_size)
+                # Let the aggregate streams of the serving processes know
+                notify_changes(session, {record['test_id'] for record in merged.values()})
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            state.mark_loaded(path for path in chunk if path not in summary['errors'])
+
+            summary['files'] += len(chunk) - sum(path in summary['errors'] for path in chunk)
+            summary['written'] += len(merged)
+            summary['seconds'] = time.perf_counter() - started
+            if progress is not None:
+                progress(f"{min(start + chunk_files, len(pending))}/{len(pending)} files, "
+                         f"{summary['records']} records, {summary['records'] / summary['seconds']:.0f} records/sec")
+
+    summary['seconds'] = time.perf_counter() - started
+    return summary
@@ -1,25 +1,41 @@
 import os
 import logging
-from flask import Flask
+from flask.logging import default_handler
 
 # Create a logs directory if it doesn't exist
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
-os.makedirs(log_dir, exist_ok=True)
 
-app = Flask(__name__)
+# Log format
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-# Configure Flask logger
-app.logger.setLevel(logging.INFO)  # Set log level
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')  # Log format
 
-# Log to console
-stream_handler = logging.StreamHandler()
-stream_handler.setFormatter(formatter)
-app.logger.addHandler(stream_handler)
+def configure_logging(app):
+    """
+        Configure the Flask application logger.
 
-# Log to file
-file_handler = logging.FileHandler(os.path.join(log_dir, 'flask_app.log'))
-file_handler.setFormatter(formatter)
-app.logger.addHandler(file_handler)
+        The module loggers of the app package (app.routes, app.importer, ...) are children of
+        the application logger, so its handlers receive their records too. The handlers are
+        only added once per process, however many applications are created.
 
-app.logger.info('Flask application started')
+        Args:
+            app (Flask): The application to configure.
+        """
+    if getattr(app.logger, 'markr_configured', False):
+        return
+
+    os.makedirs(log_dir, exist_ok=True)
+    app.logger.setLevel(logging.INFO)  # Set log level
+    app.logger.removeHandler(default_handler)  # Replaced by the console handler below
+
+    # Log to console
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    app.logger.addHandler(stream_handler)
+
+    # Log to file
+    file_handler = logging.FileHandler(os.path.join(log_dir, 'flask_app.log'))
+    file_handler.setFormatter(formatter)
+    app.logger.addHandler(file_handler)
+
+    app.logger.markr_configured = True
+    app.logger.info('Flask application started')
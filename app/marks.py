@@ -0,0 +1,71 @@
+# app/marks.py
+import io
+from itertools import chain, groupby
+import logging
+from operator import itemgetter
+import zipfile
+import numpy as np
+from sqlalchemy import String, cast, select
+from app.models import TestResults
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# numpy record of one result. Timestamps are naive, as stored, with NaT for a missing scan time.
+MARKS_DTYPE = np.dtype([('obtained_marks', '<i4'), ('available_marks', '<i4'), ('scanned_on', '<M8[us]')])
+
+
+def read_marks(session, test_ids, batch_size=2000):
+    """
+        Read the marks of tests into MARKS_DTYPE arrays, in student_number order.
+
+        The rows are fetched from the cursor a batch at a time with yield_per and packed with
+        numpy.fromiter as they arrive, so no TestResults objects or intermediate lists are
+        built. scanned_on is read as text, which numpy parses an order of magnitude faster than
+        it converts datetime objects.
+
+        Args:
+            session (Session): The session to read in.
+            test_ids (list): The tests to read.
+            batch_size (int): The number of rows fetched at a time.
+
+        Returns:
+            dict: An array for each test with results, keyed by test ID.
+        """
+    stmt = (select(TestResults.test_id, TestResults.obtained_marks, TestResults.available_marks,
+                   cast(TestResults.scanned_on, String))
+            .where(TestResults.test_id.in_(test_ids), TestResults.obtained_marks.isnot(None),
+                   TestResults.available_marks.isnot(None))
+            .order_by(TestResults.test_id, TestResults.student_number)
+            .execution_options(yield_per=batch_size))
+    # Executed on the connection, since the rows are plain tuples that need no ORM processing
+    result = session.connection().execute(stmt)
+    values = itemgetter(1, 2, 3)
+    try:
+        return {test_id: np.fromiter(map(values, rows), dtype=MARKS_DTYPE)
+                for test_id, rows in groupby(chain.from_iterable(result.partitions()), key=itemgetter(0))}
+    finally:
+        result.close()
+
+
+def npy_bytes(marks):
+    """
+        Serialize an array in the .npy format, which np.load can memory-map once saved to a file.
+        """
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, marks, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def npz_bytes(arrays):
+    """
+        Serialize arrays as an uncompressed .npz archive with one member per key, as np.savez does.
+
+        Written here rather than with np.savez, whose own arguments could clash with a key.
+        """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, marks in arrays.items():
+            with archive.open(f'{name}.npy', 'w', force_zip64=True) as member:
+                np.lib.format.write_array(member, marks, allow_pickle=False)
+    return buffer.getvalue()
@@ -0,0 +1,241 @@
+# app/metrics.py
+from collections import defaultdict
+import logging
+import threading
+import time
+from flask import current_app, g, has_app_context, request
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the request duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Type and help text of every metric, in the order they are rendered
+METRICS = {
+    'markr_requests_total': ('counter', 'Requests handled, by endpoint and status code.'),
+    'markr_request_duration_seconds': ('histogram', 'Request duration, by endpoint.'),
+    'markr_phase_seconds_total': ('counter', 'Time spent in each phase of a request, by endpoint and phase.'),
+    'markr_sql_statements_total': ('counter', 'SQL statements executed, by endpoint.'),
+    'markr_import_rows_total': ('counter', 'Records imported.'),
+    'markr_import_payload_bytes_total': ('counter', 'XML payload bytes read by imports.'),
+    'markr_import_rows': ('histogram', 'Records per import.'),
+    'markr_import_rejections_total': ('counter', 'Imports rejected by admission control, by reason and status code.'),
+}
+
+# Upper bounds of the records per import histogram buckets
+ROWS_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+
+class RequestTimings:
+    """
+        The phase breakdown of a single request.
+
+        Phases are accumulated with time.perf_counter by the code doing the work, so recording
+        one costs a couple of clock reads and a dict update.
+
+        Attributes:
+            phases (dict): Seconds spent in each named phase.
+            statements (int): The number of SQL statements executed.
+            rows (int): The number of records imported.
+            payload_bytes (int): The number of payload bytes read.
+        """
+    __slots__ = ('phases', 'statements', 'rows', 'payload_bytes', 'start')
+
+    def __init__(self):
+        self.phases = defaultdict(float)
+        self.statements = 0
+        self.rows = 0
+        self.payload_bytes = 0
+        self.start = time.perf_counter()
+
+
+class CountingReader:
+    """
+        A binary stream wrapper that counts the bytes read through it.
+        """
+
+    def __init__(self, stream, timings):
+        self._stream = stream
+        self._timings = timings
+
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        self._timings.payload_bytes += len(data)
+        return data
+
+
+class Metrics:
+    """
+        A thread-safe registry of counters and histograms, rendered in the Prometheus text format.
+
+        Values are kept per process.
+        """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    def inc(self, name, labels=(), value=1):
+        """
+            Increment a counter.
+
+            Args:
+                name (str): The metric name, a key of METRICS.
+                labels (tuple): (label, value) pairs.
+                value (float): The amount to add.
+            """
+        with self._lock:
+            self._counters[name, labels] += value
+
+    def observe(self, name, value, buckets, labels=()):
+        """
+            Record a value in a histogram.
+
+            Args:
+                name (str): The metric name, a key of METRICS.
+                value (float): The observed value.
+                buckets (tuple): The bucket upper bounds.
+                labels (tuple): (label, value) pairs.
+            """
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[name, labels] = [buckets, [0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[1][i] += 1
+            histogram[2] += value
+            histogram[3] += 1
+
+    def render(self, gauges=(), counters=()):
+        """
+            Render every metric in the Prometheus text exposition format.
+
+            Args:
+                gauges (list): Extra (name, help, value) gauges sampled at render time.
+                counters (list): Extra (name, help, value) counters sampled at render time, for
+                    totals kept elsewhere, such as by the aggregate cache. Names end in _total.
+
+            Returns:
+                str: The metrics.
+            """
+        with self._lock:
+            totals = dict(self._counters)
+            histograms = {key: (buckets, list(counts), total, count)
+                          for key, (buckets, counts, total, count) in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(totals.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_labels(labels)} {value:g}')
+            else:
+                for (metric, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, bucket_count in zip(buckets, counts):
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", f"{bound:g}"),))} {bucket_count}')
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {count}')
+                    lines.append(f'{name}_sum{_labels(labels)} {total:g}')
+                    lines.append(f'{name}_count{_labels(labels)} {count}')
+
+        for name, help_text, value in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name} {value:g}')
+        for name, help_text, value in gauges:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def pool_gauges(engine):
+    """
+        Sample the connection pool of an engine, to show how close it is to saturation.
+
+        Args:
+            engine (Engine): The engine whose pool is sampled.
+
+        Returns:
+            list: (name, help, value) gauges for Metrics.render, empty for pools without a size
+                (e.g. SQLite's).
+        """
+    pool = engine.pool
+    if not hasattr(pool, 'overflow'):
+        return []
+    return [
+        ('markr_db_pool_size', 'Connections kept open by the pool.', pool.size()),
+        ('markr_db_pool_checked_out', 'Connections in use by requests and workers.', pool.checkedout()),
+        ('markr_db_pool_overflow', 'Connections open beyond the pool size, negative while the pool is filling.',
+         pool.overflow()),
+        ('markr_db_pool_max_connections', 'The most connections the pool will open.',
+         pool.size() + pool._max_overflow),
+    ]
+
+
+def current_timings():
+    """
+        Return the phase timings of the current request, or None outside a request.
+        """
+    return g.get('markr_timings') if has_app_context() else None
+
+
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    """
+        SQLAlchemy before_cursor_execute listener counting statements per request.
+        """
+    timings = current_timings()
+    if timings is not None:
+        timings.statements += 1
+
+
+def start_request():
+    """
+        before_request hook starting the phase timings of a request.
+        """
+    g.markr_timings = RequestTimings()
+
+
+def finish_request(response):
+    """
+        after_request hook recording the metrics of a request and logging it if slow.
+        """
+    timings = g.pop('markr_timings', None)
+    if timings is None:
+        return response
+
+    duration = time.perf_counter() - timings.start
+    endpoint = request.endpoint or 'unknown'
+    metrics = current_app.extensions['markr_metrics']
+
+    metrics.inc('markr_requests_total', (('endpoint', endpoint), ('status', str(response.status_code))))
+    metrics.observe('markr_request_duration_seconds', duration, DURATION_BUCKETS, (('endpoint', endpoint),))
+    metrics.inc('markr_sql_statements_total', (('endpoint', endpoint),), timings.statements)
+    for phase, seconds in timings.phases.items():
+        metrics.inc('markr_phase_seconds_total', (('endpoint', endpoint), ('phase', phase)), seconds)
+    if timings.payload_bytes:
+        metrics.inc('markr_import_payload_bytes_total', value=timings.payload_bytes)
+    if timings.rows:
+        metrics.inc('markr_import_rows_total', value=timings.rows)
+        metrics.observe('markr_import_rows', timings.rows, ROWS_BUCKETS)
+
+    threshold = current_app.config['SLOW_REQUEST_SECONDS']
+    if threshold and duration >= threshold:
+        phases = ', '.join(f'{phase}={seconds * 1000:.1f}ms' for phase, seconds in timings.phases.items())
+        logger.warning(f"Slow request {request.method} {request.path} -> {response.status_code} in "
+                       f"{duration * 1000:.1f}ms [{phases}] statements={timings.statements} "
+                       f"rows={timings.rows} payload_bytes={timings.payload_bytes}")
+    return response
@@ -17,7 +17,24 @@ class TestResults(db.Model):
            last_name (str): The last name of the student.
            available_marks (int): Total marks available for the test.
            obtained_marks (int): Marks obtained by the student in the test.
+           answers (bytes): The student's answers packed with app.parser.ANSWER_STRUCT.
+               Deferred, so it is only loaded when accessed.
+           record_hash (bytes): A hash of the other columns, set by imports when
+               IMPORT_RECORD_HASHES is enabled so that unchanged records are not rewritten
+               (see app.upsert.record_hash). Null for rows written any other way.
+
+       The primary key leads with student_number, so lookups by test use a separate index on
+       (test_id, student_number), which also returns a test's results in student_number order for
+       exports. On PostgreSQL it includes the marks, letting aggregates run as index-only scans.
+       A second index on (test_id, scanned_on) serves the timeline of a test in the same way.
        """
+    __table_args__ = (
+        db.Index('ix_test_results_test_id_student_number', 'test_id', 'student_number',
+                 postgresql_include=['obtained_marks', 'available_marks']),
+        db.Index('ix_test_results_test_id_scanned_on', 'test_id', 'scanned_on',
+                 postgresql_include=['obtained_marks']),
+    )
+
     student_number = db.Column(db.String(20), primary_key=True)
     test_id = db.Column(db.String(20), primary_key=True)
     scanned_on = db.Column(db.DateTime)
@@ -25,3 +42,104 @@ class TestResults(db.Model):
     last_name = db.Column(db.String(50))
     available_marks = db.Column(db.Integer)
     obtained_marks = db.Column(db.Integer)
+    answers = db.deferred(db.Column(db.LargeBinary))
+    record_hash = db.deferred(db.Column(db.LargeBinary(16)))
+
+
+class TestAggregate(db.Model):
+    """
+       Model class for the running statistics of each test, maintained by every import.
+
+       Attributes:
+           test_id (str): The unique identifier for the test.
+           count (int): The number of results stored for the test.
+           sum_marks (int): The sum of the obtained marks.
+           sum_squares (int): The sum of the squared obtained marks.
+           min_marks (int): The lowest obtained mark.
+           max_marks (int): The highest obtained mark.
+           available_marks (int): Total marks available for the test, as of the latest import.
+           histogram (dict): The number of results for each obtained mark, keyed by the mark as a string.
+           version (int): Incremented whenever the statistics change, used as the response ETag.
+       """
+    __tablename__ = 'test_aggregates'
+
+    test_id = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    sum_marks = db.Column(db.BigInteger, nullable=False, default=0)
+    sum_squares = db.Column(db.BigInteger, nullable=False, default=0)
+    min_marks = db.Column(db.Integer)
+    max_marks = db.Column(db.Integer)
+    available_marks = db.Column(db.Integer)
+    histogram = db.Column(db.JSON, nullable=False, default=dict)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ImportedPayload(db.Model):
+    """
+       Model class for the ledger of imported payloads, used to recognise re-sent payloads.
+
+       Attributes:
+           digest (str): The SHA-256 fingerprint of the payload, see app.ledger.PayloadFingerprint.
+           payload_bytes (int): The size of the payload.
+           records (int): The number of records it imported.
+           imported_at (datetime): When it was imported (UTC). Entries older than
+               IMPORT_LEDGER_RETENTION are pruned.
+       """
+    __tablename__ = 'imported_payloads'
+
+    digest = db.Column(db.String(64), primary_key=True)
+    payload_bytes = db.Column(db.BigInteger)
+    records = db.Column(db.Integer, nullable=False)
+    imported_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class ImportJob(db.Model):
+    """
+       Model class for the durable queue of background imports.
+
+       Attributes:
+           id (str): The job ID returned to the client.
+           status (str): One of 'queued', 'running', 'succeeded', 'invalid' or 'failed'.
+           payload_path (str): The spooled XML document.
+           payload_bytes (int): The size of the spooled document.
+           content_type (str): The Content-Type the payload was sent with.
+           content_encoding (str): The Content-Encoding the payload was sent with, if any.
+           payload_digest (str): The fingerprint of the payload, if the import ledger is enabled.
+           records (int): The number of records imported.
+           incomplete_records (list): The validation errors, if the document was rejected.
+           error (str): The error message, if the import failed.
+           created_at (datetime): When the job was queued (UTC).
+           started_at (datetime): When a worker last claimed the job (UTC).
+           finished_at (datetime): When the job finished (UTC).
+       """
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    payload_path = db.Column(db.String(255), nullable=False)
+    payload_bytes = db.Column(db.BigInteger)
+    content_type = db.Column(db.String(255))
+    content_encoding = db.Column(db.String(20))
+    payload_digest = db.Column(db.String(64))
+    records = db.Column(db.Integer)
+    incomplete_records = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        """
+            Return the job as the JSON body of GET /imports/<job_id>.
+            """
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'payload_bytes': self.payload_bytes,
+            'records': self.records,
+            'incomplete_records': self.incomplete_records or [],
+            'error': self.error,
+            'created_at': self.created_at.isoformat() + 'Z',
+            'started_at': self.started_at.isoformat() + 'Z' if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() + 'Z' if self.finished_at else None,
+        }
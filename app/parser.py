@@ -0,0 +1,293 @@
+# app/parser.py
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+import logging
+import os
+import struct
+import threading
+import time
+from lxml import etree
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Child elements that every mcq-test-result must contain with a non-empty value
+MANDATORY_FIELDS = ['first-name', 'last-name', 'student-number', 'test-id']
+
+# Layout of one packed answer: question number, marks available, marks awarded and the chosen
+# option as a single byte (a zero byte when blank). The marks are signed, since negative marking
+# awards marks below zero. Kept in step with app.items.ANSWER_DTYPE.
+ANSWER_STRUCT = struct.Struct('<Hhhc')
+
+# The range of each answer attribute in ANSWER_STRUCT
+ANSWER_LIMITS = {'question': (0, 0xFFFF), 'marks-available': (-0x8000, 0x7FFF), 'marks-awarded': (-0x8000, 0x7FFF)}
+
+# The bundled XML Schema of the Markr format
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schemas', 'markr.xsd')
+_schema_document = etree.parse(SCHEMA_PATH)
+
+# Compiled schemas, one per thread, since a schema's error log is shared by its callers
+_schemas = threading.local()
+
+
+def schema():
+    """
+        Return the compiled Markr schema of the current thread, compiling it on first use.
+        """
+    compiled = getattr(_schemas, 'schema', None)
+    if compiled is None:
+        compiled = _schemas.schema = etree.XMLSchema(_schema_document)
+    return compiled
+
+
+def check_result(element):
+    """
+        Check a single mcq-test-result element against the import rules, one field at a time.
+
+        This is slower than the schema and only used to describe why a record that failed it is
+        invalid, with the messages clients already handle.
+
+        Args:
+            element (lxml.etree._Element): The mcq-test-result element to check.
+
+        Returns:
+            list: The errors found in the element, empty if the record is complete.
+        """
+    errors = []
+
+    missing_fields = [field for field in MANDATORY_FIELDS if element.find(field) is None]
+    if missing_fields:
+        errors.append({'error': f'Missing fields: {", ".join(missing_fields)}'})
+        return errors
+
+    # Check if the summary-marks element exists
+    summary_marks = element.find('summary-marks')
+    if summary_marks is None:
+        errors.append({'error': 'Missing summary-marks element'})
+        return errors
+
+    # Check if available and obtained attributes exist and have values
+    if not summary_marks.get('available') or not summary_marks.get('obtained'):
+        errors.append({'error': 'Missing or empty available or obtained attributes in summary-marks'})
+
+    # Check if any mandatory fields have missing values
+    missing_values = [field for field in MANDATORY_FIELDS if not element.find(field).text]
+    if missing_values:
+        errors.append({'error': f'Missing values for fields: {", ".join(missing_values)}'})
+
+    return errors
+
+
+def validate_result(element, validate=None):
+    """
+        Validate a single mcq-test-result element against the Markr schema.
+
+        Valid records are checked entirely by libxml2. For an invalid record the field checks
+        of check_result name what is missing, and any other violation (e.g. a malformed
+        scanned-on timestamp or non-integer marks) is reported with the schema's first message,
+        which names the cause; later messages tend to follow from it.
+
+        Args:
+            element (lxml.etree._Element): The mcq-test-result element to validate.
+            validate (callable): The validate method of the compiled schema, to save looking it
+                up for every record.
+
+        Returns:
+            list: The errors found in the element, each with the line of the record and its
+                student number (None if missing), empty if the record is valid.
+        """
+    if validate is None:
+        validate = schema().validate
+    if validate(element):
+        return []
+
+    errors = check_result(element)
+    if not errors:
+        errors = [{'error': f'Invalid record: {validate.__self__.error_log[0].message}'}]
+    return _located(element, errors)
+
+
+def _located(element, errors):
+    # Add the line of the record and its student number to each of its errors
+    line = element.sourceline
+    student_number = element.findtext('student-number') or None
+    return [dict(error, line=line, student_number=student_number) for error in errors]
+
+
+def check_answers(element):
+    """
+        Check the question numbers and marks of a record's answers against ANSWER_LIMITS.
+
+        The schema leaves these attributes untyped, since checking them there costs more than
+        converting them; this only runs when converting a record's answers failed, to say why.
+
+        Args:
+            element (lxml.etree._Element): The mcq-test-result element.
+
+        Returns:
+            list: The errors found in the answers, empty if they can be packed.
+        """
+    errors = []
+    for answer in element.iterfind('answer'):
+        for name, (low, high) in ANSWER_LIMITS.items():
+            value = answer.get(name)
+            if not value:
+                continue
+            try:
+                valid = low <= int(value) <= high
+            except ValueError:
+                valid = False
+            if not valid:
+                errors.append({'error': f'Invalid answer on line {answer.sourceline}: {name} "{value}" '
+                                        f'must be an integer from {low} to {high}'})
+    return errors
+
+
+# Structs packing the answers of a record at once, by number of answers. Records hold the
+# same number of answers, so the cache stays small.
+_answer_structs = {}
+
+# The packed option of each answer text seen, e.g. 'A' -> b'A', '' -> b'\0'
+_options = {}
+
+
+def _answers_struct(count):
+    packer = _answer_structs.get(count)
+    if packer is None:
+        packer = _answer_structs[count] = struct.Struct('<' + ANSWER_STRUCT.format[1:] * count)
+    return packer
+
+
+def _option(text):
+    option = _options.get(text)
+    if option is None:
+        option = (text or '').strip().encode('ascii', 'replace')[:1] or b'\0'
+        if len(_options) < 1024:
+            _options[text] = option
+    return option
+
+
+# Scanners stamp many records with the same time, so each distinct value is parsed once
+@lru_cache(maxsize=4096)
+def _parse_timestamp(value):
+    # fromisoformat only accepts a 'Z' offset, and offsets without a colon, from Python 3.11
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    elif value[-5] in '+-':
+        value = f'{value[:-2]}:{value[-2:]}'
+    return datetime.fromisoformat(value)
+
+
+# The position in a record's values of each text field, see extract_result
+_FIELD_POSITIONS = {'student-number': 0, 'test-id': 1, 'first-name': 2, 'last-name': 3}
+
+
+def extract_result(element):
+    """
+        Extract the column values of a validated mcq-test-result element.
+
+        Every field is read in a single pass over the element's children, the answers are packed
+        with one struct call and scanned-on timestamps are parsed with datetime.fromisoformat,
+        once per distinct value. Answers without a question number are numbered by their position.
+
+        Args:
+            element (lxml.etree._Element): A mcq-test-result element that passed validate_result.
+
+        Returns:
+            dict: The values keyed by TestResults column name.
+        """
+    # Read every column of a record in one pass over its children
+    values = [None, None, None, None]
+    available_marks = obtained_marks = 0
+    answers = []
+    for child in element:
+        tag = child.tag
+        if tag == 'answer':
+            get = child.get
+            question, marks_available, marks_awarded = get('question'), get('marks-available'), get('marks-awarded')
+            answers += (int(question) if question else len(answers) // 4,
+                        int(marks_available) if marks_available else 0,
+                        int(marks_awarded) if marks_awarded else 0,
+                        _option(child.text))
+        elif tag == 'summary-marks':
+            available_marks = int(child.get('available'))
+            obtained_marks = int(child.get('obtained'))
+        else:
+            position = _FIELD_POSITIONS.get(tag)
+            if position is not None and values[position] is None:
+                values[position] = child.text
+    student_number, test_id, first_name, last_name = values
+    return {
+        'student_number': student_number,
+        'test_id': test_id,
+        'first_name': first_name,
+        'last_name': last_name,
+        'scanned_on': _parse_timestamp(element.get('scanned-on')),
+        'available_marks': available_marks,
+        'obtained_marks': obtained_marks,
+        'answers': _answers_struct(len(answers) // 4).pack(*answers) if answers else None,
+    }
+
+
+def iter_results(source, errors, phases=None):
+    """
+        Validate and yield mcq-test-result elements from an XML stream in a single pass.
+
+        The document is read incrementally with iterparse. Each element is validated, its
+        values are extracted and it is released, so memory use stays flat regardless of the
+        document size. Answers whose question number or marks do not fit the packed layout
+        are reported as invalid records (see check_answers).
+        Once an invalid record has been seen no further records are yielded, but the rest of
+        the document is still checked so that the error report is complete.
+
+        Args:
+            source (file-like): A binary stream containing the XML document.
+            errors (list): A list that validation errors are appended to, in document order.
+                Each error carries the line of the offending record (see validate_result).
+            phases (dict): If given, the seconds spent parsing, validating and extracting are
+                added to its 'parse', 'validate' and 'extract' entries, excluding the time the
+                caller holds a record.
+
+        Yields:
+            dict: The values of each complete record, see extract_result.
+        """
+    if phases is None:
+        phases = defaultdict(float)
+    clock = time.perf_counter
+    validate = schema().validate
+    found = False
+    try:
+        started = clock()
+        for _, element in etree.iterparse(source, events=('end',), tag='mcq-test-result'):
+            parsed = clock()
+            phases['parse'] += parsed - started
+            found = True
+            record_errors = validate_result(element, validate)
+            validated = clock()
+            phases['validate'] += validated - parsed
+            record = None
+            if not record_errors:
+                try:
+                    record = extract_result(element)
+                except (ValueError, struct.error) as e:
+                    record_errors = _located(element, check_answers(element)
+                                             or [{'error': f'Invalid record: {e}'}])
+                phases['extract'] += clock() - validated
+            if record_errors:
+                errors.extend(record_errors)
+            elif not errors:
+                yield record
+
+            # Release the element and any siblings already processed
+            started = clock()
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        logger.error("Invalid XML syntax")
+        errors[:] = [{'error': 'Invalid XML syntax', 'line': e.lineno}]
+        return
+
+    if not found:
+        errors.append({'error': 'No mcq-test-result elements found'})
@@ -0,0 +1,174 @@
+# app/payloads.py
+import gzip
+import logging
+import zlib
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# The content type of a single Markr XML document
+MARKR_CONTENT_TYPE = 'text/xml+markr'
+
+# The content type of a request carrying several documents, one per part
+MULTIPART_CONTENT_TYPE = 'multipart/form-data'
+
+# Content encodings that payloads and multipart parts may use, in lower case
+CONTENT_ENCODINGS = (None, '', 'identity', 'gzip', 'x-gzip')
+
+# Content encodings decompressed with gzip; x-gzip is the legacy name of gzip
+GZIP_ENCODINGS = ('gzip', 'x-gzip')
+
+# The number of bytes read from the request at a time when splitting a multipart body
+READ_SIZE = 64 * 1024
+
+
+class PayloadError(ValueError):
+    """
+        Raised when a payload cannot be decoded, e.g. corrupt gzip data or a malformed multipart body.
+        """
+
+
+def content_coding(content_encoding):
+    """
+        Normalise a Content-Encoding header for comparison with CONTENT_ENCODINGS.
+
+        Content codings are case-insensitive, so `GZIP` and `gzip` are the same coding.
+
+        Args:
+            content_encoding (str): The Content-Encoding header, if any.
+
+        Returns:
+            str: The coding in lower case without surrounding whitespace, or None if there is no header.
+        """
+    return content_encoding.strip().lower() if content_encoding is not None else None
+
+
+def is_supported(content_type, content_encoding=None):
+    """
+        Check whether an import payload with the given headers can be decoded.
+
+        Args:
+            content_type (str): The Content-Type header, including any parameters.
+            content_encoding (str): The Content-Encoding header, if any.
+
+        Returns:
+            bool: True if the payload is a Markr document or a multipart body with a boundary.
+        """
+    if content_coding(content_encoding) not in CONTENT_ENCODINGS:
+        return False
+    mimetype, options = parse_options_header(content_type)
+    if mimetype == MULTIPART_CONTENT_TYPE:
+        return bool(options.get('boundary'))
+    return content_type == MARKR_CONTENT_TYPE
+
+
+class GzipReader:
+    """
+        A binary stream that decompresses gzip data as it is read, so that the payload is
+        never held in memory as a whole. Corrupt data raises PayloadError.
+        """
+
+    def __init__(self, stream):
+        self._file = gzip.GzipFile(fileobj=stream, mode='rb')
+
+    def read(self, size=-1):
+        try:
+            return self._file.read(size)
+        except (gzip.BadGzipFile, EOFError, zlib.error) as e:
+            raise PayloadError('Invalid gzip data') from e
+
+
+def decode(stream, content_encoding=None):
+    """
+        Wrap a stream so that reading it undoes its content encoding.
+        """
+    return GzipReader(stream) if content_coding(content_encoding) in GZIP_ENCODINGS else stream
+
+
+class _PartReader:
+    """
+        A binary stream over the body of the current part of a MultipartDocuments iterator.
+        """
+
+    def __init__(self, documents):
+        self._documents = documents
+        self._buffer = b''
+        self.finished = False
+
+    def read(self, size=-1):
+        while not self.finished and (size < 0 or len(self._buffer) < size):
+            event = self._documents.next_event()
+            if not isinstance(event, Data):
+                raise PayloadError('Invalid multipart body')
+            self._buffer += event.data
+            self.finished = not event.more_data
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def drain(self):
+        while not self.finished:
+            self.read(READ_SIZE)
+
+
+class MultipartDocuments:
+    """
+        Split a multipart/form-data body into one stream per part, reading it incrementally.
+
+        Each part is a document. Parts are yielded in order and must be consumed (or abandoned)
+        before the next one is read; whatever is left of an abandoned part is skipped. A part
+        with a `Content-Encoding: gzip` (or `x-gzip`, in any case) header is decompressed as it is read.
+        """
+
+    def __init__(self, stream, boundary):
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary.encode('latin-1'))
+
+    def next_event(self):
+        """
+            Return the next multipart event, reading more of the body as needed.
+            """
+        try:
+            while True:
+                event = self._decoder.next_event()
+                if not isinstance(event, NeedData):
+                    return event
+                self._decoder.receive_data(self._stream.read(READ_SIZE) or None)
+        except ValueError as e:
+            raise PayloadError('Invalid multipart body') from e
+
+    def __iter__(self):
+        while True:
+            event = self.next_event()
+            if isinstance(event, Epilogue):
+                return
+            if isinstance(event, (Field, File)):
+                content_encoding = event.headers.get('Content-Encoding')
+                if content_coding(content_encoding) not in CONTENT_ENCODINGS:
+                    raise PayloadError(f'Unsupported Content-Encoding: {content_encoding}')
+                part = _PartReader(self)
+                yield getattr(event, 'filename', None) or event.name, decode(part, content_encoding)
+                part.drain()
+
+
+def open_documents(stream, content_type, content_encoding=None):
+    """
+        Split an import payload into the documents it contains.
+
+        Args:
+            stream (file-like): The binary payload, as sent.
+            content_type (str): The Content-Type header, see is_supported.
+            content_encoding (str): The Content-Encoding header, if any.
+
+        Returns:
+            iterable: A (name, stream) pair for each document, in payload order. The name is the
+                part's filename or field name, or None for a single document.
+        """
+    stream = decode(stream, content_encoding)
+    mimetype, options = parse_options_header(content_type)
+    if mimetype == MULTIPART_CONTENT_TYPE:
+        return MultipartDocuments(stream, options['boundary'])
+    return [(None, stream)]
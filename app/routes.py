@@ -1,12 +1,24 @@
 # app/routes.py
-from datetime import datetime
+import hashlib
 import logging
-from flask import Blueprint, request, jsonify
+import time
+from flask import Blueprint, current_app, request, jsonify, stream_with_context, url_for
 from app import db
-from app.models import TestResults
-from lxml import etree
+from app.admission import admission_controlled, import_admission
+from app.aggregates import grouped_aggregates, summarize
+from app.cache import aggregate_cache
+from app.distributions import MAX_BINS, TIMELINE_INTERVALS, mark_histogram, score_timeline
+from app.events import Subscription, aggregate_events, aggregate_snapshots
+from app.export import EXPORT_FORMATS, csv_chunks, export_partitions, ndjson_chunks, next_cursor
+from app.importer import import_payload
+from app.metrics import RequestTimings, current_timings, pool_gauges
+from app.jobs import submit_job
+from app.ledger import AlreadyImported
+from app.models import TestResults, TestAggregate, ImportJob
+from app.parser import iter_results
+from app.payloads import MULTIPART_CONTENT_TYPE, PayloadError, is_supported
 from io import BytesIO
-import numpy as np
+from sqlalchemy import select
 
 bp = Blueprint('main', __name__)
 
@@ -14,6 +26,75 @@ bp = Blueprint('main', __name__)
 logger = logging.getLogger(__name__)
 
 
+def not_modified(etag):
+    """
+        Build a 304 Not Modified response for the given ETag.
+        """
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def versioned_etag(test_id, *parts):
+    """
+        Build the ETag of a response derived from a test's results, from its aggregate version.
+
+        Every import that changes the test's results increments the version, so the ETag
+        changes with the results. Returns None for a test without an aggregate row.
+        """
+    version = db.session.execute(
+        select(TestAggregate.version).where(TestAggregate.test_id == test_id)
+    ).scalar_one_or_none()
+    if version is None:
+        return None
+    return '-'.join(str(part) for part in (test_id, version, *parts))
+
+
+def unaggregated_summary(test_id):
+    """
+        Aggregate a test without an aggregate row from test_results, without saving the result.
+
+        The read endpoints never write: rows are created by imports and by
+        `flask markr rebuild-aggregates`. Whether the test has any results is answered from the
+        test_id index first, so requests for unknown tests only cost one index lookup.
+
+        Returns:
+            dict: The summarize() fields of the test, or None if it has no results.
+        """
+    exists = db.session.execute(select(TestResults.test_id).where(TestResults.test_id == test_id).limit(1)).first()
+    if exists is None:
+        return None
+    return grouped_aggregates(db.session, [test_id]).get(test_id)
+
+
+def marks_etag(test_ids):
+    """
+        Build the ETag of the marks of several tests, from their aggregate versions.
+
+        Returns None if none of the tests has an aggregate row.
+        """
+    versions = dict(db.session.execute(
+        select(TestAggregate.test_id, TestAggregate.version).where(TestAggregate.test_id.in_(test_ids))
+    ).all())
+    if not versions:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    for test_id in test_ids:
+        digest.update(f"{test_id}\0{versions.get(test_id, '')}\0".encode('utf-8'))
+    return f'marks-{digest.hexdigest()}'
+
+
+def marks_response(body, etag, filename):
+    """
+        Build the response of a marks array endpoint, as a download of a numpy file.
+        """
+    response = current_app.response_class(body, mimetype='application/octet-stream')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if etag is not None:
+        response.set_etag(etag)
+    return response
+
+
 def validate_xml(xml_content):
     """
         Validate the XML content to ensure it meets the required format.
@@ -25,161 +106,417 @@ def validate_xml(xml_content):
             bool: True if the XML is valid, False otherwise.
             list: A list of incomplete records if any.
         """
-    try:
-        root = etree.parse(BytesIO(xml_content))
-        incomplete_records = []
-
-        # Check if there are any mcq-test-result elements
-        test_results = root.findall('.//mcq-test-result')
-        if not test_results:
-            return False, [{'error': 'No mcq-test-result elements found'}]
-
-        # Define a list of mandatory fields
-        mandatory_fields = ['first-name', 'last-name', 'student-number', 'test-id']
-
-        # Check if all mandatory fields are present in each mcq-test-result element
-        for element in test_results:
-            missing_fields = [field for field in mandatory_fields if element.find(field) is None]
-            if missing_fields:
-                incomplete_records.append({'error': f'Missing fields: {", ".join(missing_fields)}'})
-            else:
-                # Check if the summary-marks element exists
-                summary_marks = element.find('summary-marks')
-                if summary_marks is None:
-                    incomplete_records.append({'error': 'Missing summary-marks element'})
-                else:
-                    # Check if available and obtained attributes exist and have values
-                    available = summary_marks.get('available')
-                    obtained = summary_marks.get('obtained')
-                    if not available or not obtained:
-                        incomplete_records.append(
-                            {'error': 'Missing or empty available or obtained attributes in summary-marks'})
-
-                    # Check if any mandatory fields have missing values
-                    missing_values = [field for field in mandatory_fields if not element.find(field).text]
-                    if missing_values:
-                        incomplete_records.append({'error': f'Missing values for fields: {", ".join(missing_values)}'})
-
-        return not incomplete_records, incomplete_records
-    except etree.XMLSyntaxError:
-        logger.error("Invalid XML syntax")
-        return False, [{'error': 'Invalid XML syntax'}]
+    incomplete_records = []
+    for _ in iter_results(BytesIO(xml_content), incomplete_records):
+        pass
+    return not incomplete_records, incomplete_records
+
+
+def already_imported(entry, multipart):
+    """
+        Build the 200 response to a payload that the import ledger has already seen.
+        """
+    logger.info(f"Skipped re-sent payload {entry.digest}")
+    if multipart:
+        return jsonify({'message': 'Results already imported', 'records': entry.records}), 200
+    return 'Results already imported', 200
 
 
 @bp.route('/import', methods=['POST'])
+@admission_controlled
 def import_results():
     """
         Import test results from XML data into the database.
+
+        The body is either a single text/xml+markr document or a multipart/form-data body
+        with one document per part, and may be sent with `Content-Encoding: gzip`, as may
+        each part. Every document is imported in one transaction and, for multipart bodies,
+        the record count and validation errors of each document are returned.
+
+        By default the payload is imported in the request (see import_documents). When
+        IMPORT_ASYNC is enabled the payload is spooled and queued for the import workers
+        instead, and 202 is returned with the job ID to poll at /imports/<job_id>.
+
+        A payload identical to one imported within IMPORT_LEDGER_RETENTION (e.g. a scanner
+        retrying after a timeout) is answered with 200 "Results already imported" without
+        being parsed or queued.
+
+        Imports are subject to admission control (see app.admission): when IMPORT_MAX_CONCURRENT
+        imports or IMPORT_MAX_INFLIGHT_BYTES are in progress, an import waits in a bounded queue,
+        and is rejected with 429 (queue full) or 503 (timed out) and a Retry-After header.
         """
+    content_encoding = request.headers.get('Content-Encoding')
 
     # Check if the request contains XML data
-    if request.content_type != 'text/xml+markr':
+    if not is_supported(request.content_type, content_encoding):
         return 'Unsupported Media Type', 415
+    multipart = request.mimetype == MULTIPART_CONTENT_TYPE
 
-    # Get the XML data from the request
-    xml_data = request.data
-
-    is_valid, incomplete_records = validate_xml(xml_data)
+    if current_app.config['IMPORT_ASYNC']:
+        try:
+            job = submit_job(request.stream, request.content_type, content_encoding)
+        except AlreadyImported as e:
+            return already_imported(e.entry, multipart)
+        response = jsonify({'job_id': job.id, 'status': job.status})
+        response.headers['Location'] = url_for('main.import_status', job_id=job.id)
+        return response, 202
 
-    if is_valid:
+    try:
+        count, documents = import_payload(request.stream, request.content_type, content_encoding)
+    except AlreadyImported as e:
+        return already_imported(e.entry, multipart)
+    except PayloadError as e:
+        logger.error(f"Invalid import payload: {e}")
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error committing changes to the database: {e}")
+        return 'Error committing changes to the database', 500
+
+    if not documents:
+        return jsonify({'error': 'No documents found'}), 400
+
+    if any(document['incomplete_records'] for document in documents):
+        logger.error("Incomplete record(s) in XML data")
+        if multipart:
+            return jsonify({'error': 'Incomplete record(s)', 'documents': documents}), 400
+        return jsonify({'error': 'Incomplete record(s)', 'incomplete_records': documents[0]['incomplete_records']}), 400
 
-        # Parse the XML data
-        try:
-            tree = etree.parse(BytesIO(xml_data))
-        except etree.XMLSyntaxError:
-            logger.error("Invalid XML data")
-            return 'Invalid XML data', 400
-
-        # Extract student data from the XML
-        results = tree.xpath('//mcq-test-result')
-
-        for result in results:
-            first_name = result.find('first-name').text
-            last_name = result.find('last-name').text
-            student_number = result.find('student-number').text
-            test_id = result.find('test-id').text
-            available_marks = int(result.find('summary-marks').get('available'))
-            obtained_marks = int(result.find('summary-marks').get('obtained'))
-
-            # Extract and parse the scanned-on attribute
-            scanned_on_str = result.get('scanned-on')
-            scanned_on = datetime.strptime(scanned_on_str, '%Y-%m-%dT%H:%M:%S%z')
-
-            # Check if the record already exists in the database
-            existing_record = TestResults.query.filter_by(student_number=student_number, test_id=test_id).first()
-
-            if existing_record:
-                # If the record already exists, update it
-                existing_record.scanned_on = scanned_on
-                existing_record.first_name = first_name
-                existing_record.last_name = last_name
-                existing_record.available_marks = available_marks
-                existing_record.obtained_marks = obtained_marks
-            else:
-                # If the record doesn't exist, create a new TestResults object
-                new_result = TestResults(student_number=student_number, test_id=test_id,
-                                         first_name=first_name, last_name=last_name,
-                                         available_marks=available_marks, obtained_marks=obtained_marks,
-                                         scanned_on=scanned_on)
-                db.session.add(new_result)
-
-            # Commit changes to the database
-        try:
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error committing changes to the database: {e}")
-            return 'Error committing changes to the database', 500
+    if multipart:
+        return jsonify({'message': 'Results imported successfully', 'records': count, 'documents': documents}), 200
+    return 'Results imported successfully', 200
 
-        return 'Results imported successfully', 200
 
-    else:
-        logger.error("Incomplete record(s) in XML data")
-        return jsonify({'error': 'Incomplete record(s)', 'incomplete_records': incomplete_records}), 400
+@bp.route('/imports/<job_id>', methods=['GET'])
+def import_status(job_id):
+    """
+        Report the status of a background import job.
+        """
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown import job'}), 404
+    return jsonify(job.to_dict()), 200
 
 
 @bp.route('/results/<test_id>/aggregate', methods=['GET'])
 def aggregate_results(test_id):
     """
        Aggregate results for a given test ID.
+
+       The statistics are read from the test's row in test_aggregates, which every import keeps
+       up to date, so the cost does not depend on the number of results. A test whose results
+       were written without going through the importer is aggregated from test_results on every
+       request, without an ETag, until `flask markr rebuild-aggregates` creates its row.
+
+       Serialized responses are cached per test and carry the aggregate version as their ETag,
+       so a matching If-None-Match is answered with 304 without touching the database. Imports
+       in any process invalidate the test (see app.cache.AggregateCache).
+       """
+
+    cache = aggregate_cache()
+    entry = cache.get(test_id)
+
+    if entry is None:
+        phases = (current_timings() or RequestTimings()).phases
+        started = time.perf_counter()
+        # Follow imports made by other processes before caching anything, and only cache the
+        # response if no import has invalidated the test since it was read
+        aggregate_events().start()
+        generation = cache.generation()
+        aggregate = db.session.get(TestAggregate, test_id)
+
+        if aggregate is None:
+            summary = unaggregated_summary(test_id)
+            if summary is None:
+                return jsonify({'error': 'No results found for test'}), 404
+            return jsonify(summary), 200
+        queried = time.perf_counter()
+        phases['query'] += queried - started
+
+        # Serialize once and keep the body until an import changes the test
+        entry = cache.put(test_id, f'{test_id}-{aggregate.version}',
+                          current_app.json.response(summarize(aggregate)).get_data(), generation)
+        phases['compute'] += time.perf_counter() - queried
+
+    if request.if_none_match.contains(entry.etag):
+        return not_modified(entry.etag)
+
+    # Return the response as JSON
+    response = current_app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    return response, 200
+
+
+@bp.route('/results/<test_id>/stream', methods=['GET'])
+def stream_aggregate(test_id):
+    """
+       Stream the aggregate of a test as Server-Sent Events.
+
+       The current aggregate is sent first, then a new `aggregate` event (with the fields of
+       /results/<test_id>/aggregate) whenever an import commits changes to the test, at most once
+       per STREAM_INTERVAL (see app.events.AggregateEvents). A client reconnecting with
+       Last-Event-ID only receives the aggregate if it changed meanwhile. When
+       STREAM_MAX_SUBSCRIBERS streams are open, 503 is returned with a Retry-After header.
+       """
+    snapshot = aggregate_snapshots(db.session, [test_id]).get(test_id)
+    if snapshot is None:
+        # Version 0 comes before the first version an import or rebuild gives the test
+        summary = unaggregated_summary(test_id)
+        if summary is None:
+            return jsonify({'error': 'No results found for test'}), 404
+        snapshot = ('0', current_app.json.dumps(summary))
+
+    events = aggregate_events()
+    topic = events.subscribe(test_id, snapshot)
+    if topic is None:
+        response = jsonify({'error': 'Too many open streams, retry later'})
+        response.headers['Retry-After'] = str(int(current_app.config['STREAM_KEEPALIVE']))
+        return response, 503
+
+    # The body is not run in the request context, so that open streams hold no database connection
+    body = Subscription(events, topic, request.headers.get('Last-Event-ID'), current_app.config['STREAM_KEEPALIVE'])
+    response = current_app.response_class(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response, 200
+
+
+@bp.route('/results/aggregate', methods=['GET'])
+def batch_aggregate_results():
+    """
+       Aggregate many tests in one request.
+
+       The test_ids query parameter is a comma-separated list of test IDs; without it every
+       test is aggregated. Tests are read from test_aggregates in chunks of
+       BATCH_AGGREGATE_CHUNK_SIZE, and tests with results but no aggregate row yet are
+       calculated together by grouped_aggregates. The response is a streamed JSON object
+       mapping each test ID to the fields of /results/<test_id>/aggregate, or to null for a
+       requested test without results.
        """
+    test_ids = request.args.get('test_ids')
+    if test_ids is not None:
+        # Drop empty and repeated IDs, keeping the requested order
+        test_ids = list(dict.fromkeys(test_id for test_id in test_ids.split(',') if test_id))
+    chunk_size = current_app.config['BATCH_AGGREGATE_CHUNK_SIZE']
+
+    def chunks(items):
+        for start in range(0, len(items), chunk_size):
+            yield items[start:start + chunk_size]
+
+    def generate():
+        dumps = current_app.json.dumps
+        separator = ''
+        yield '{'
+
+        if test_ids is None:
+            for aggregate in TestAggregate.query.order_by(TestAggregate.test_id).yield_per(chunk_size):
+                yield f'{separator}{dumps(aggregate.test_id)}:{dumps(summarize(aggregate))}'
+                separator = ','
+            missing = db.session.execute(
+                select(TestResults.test_id).distinct()
+                .where(TestResults.test_id.not_in(select(TestAggregate.test_id)))
+            ).scalars().all()
+        else:
+            missing = []
+            for chunk in chunks(test_ids):
+                found = set()
+                for aggregate in TestAggregate.query.filter(TestAggregate.test_id.in_(chunk)):
+                    found.add(aggregate.test_id)
+                    yield f'{separator}{dumps(aggregate.test_id)}:{dumps(summarize(aggregate))}'
+                    separator = ','
+                missing.extend(test_id for test_id in chunk if test_id not in found)
+
+        for chunk in chunks(missing):
+            summaries = grouped_aggregates(db.session, chunk)
+            for test_id in chunk:
+                yield f'{separator}{dumps(test_id)}:{dumps(summaries.get(test_id))}'
+                separator = ','
+
+        yield '}'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json'), 200
+
+
+@bp.route('/results/<test_id>/export', methods=['GET'])
+def export_results(test_id):
+    """
+       Stream every result of a test as CSV (the default) or newline-delimited JSON.
+
+       Rows are written in student_number order as they are read from the cursor, so memory use
+       does not grow with the size of the test (see app.export.export_partitions). Downloads are
+       resumable with keyset pagination: `after` skips to the students after the last student
+       number received, and `limit` caps the rows of a page, in which case the Link header
+       points to the next page. The CSV header row is only written when `after` is not given,
+       so that resumed pages can be appended to a partial file.
+       """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format, expected one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    after = request.args.get('after')
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    found = db.session.execute(select(TestResults.student_number).where(TestResults.test_id == test_id).limit(1))
+    if found.first() is None:
+        return jsonify({'error': 'No results found for test'}), 404
+
+    partitions = export_partitions(db.session, test_id, after, limit, current_app.config['EXPORT_BATCH_SIZE'])
+    if export_format == 'csv':
+        chunks = csv_chunks(partitions, header=after is None)
+    else:
+        chunks = ndjson_chunks(partitions)
 
-    # Query the database to get marks obtained for the given test_id
-    obtained_marks_list = [result.obtained_marks for result in TestResults.query.filter_by(test_id=test_id).all()]
+    response = current_app.response_class(stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{test_id}.{export_format}"'
+    if limit is not None:
+        cursor = next_cursor(db.session, test_id, after, limit)
+        if cursor is not None:
+            url = url_for('main.export_results', test_id=test_id, format=export_format, after=cursor, limit=limit)
+            response.headers['Link'] = f'<{url}>; rel="next"'
+    return response, 200
 
-    # Calculate mean
-    mean = np.mean(obtained_marks_list)
 
-    # Calculate count
-    count = len(obtained_marks_list)
+@bp.route('/results/<test_id>/histogram', methods=['GET'])
+def histogram_results(test_id):
+    """
+       Count the results of a test in `bins` equal-width bins (10 by default) of the percentage of
+       available marks obtained.
+
+       The counts are grouped in the database, see app.distributions.mark_histogram.
+       """
+    bins = request.args.get('bins', 10, type=int)
+    if not 1 <= bins <= MAX_BINS:
+        return jsonify({'error': f'bins must be an integer between 1 and {MAX_BINS}'}), 400
 
-    # Calculate standard deviation
-    stddev = np.std(obtained_marks_list)
+    etag = versioned_etag(test_id, 'histogram', bins)
+    if etag is not None and request.if_none_match.contains(etag):
+        return not_modified(etag)
 
-    # Calculate minimum value
-    min_value = int(np.min(obtained_marks_list))
+    histogram = mark_histogram(db.session, test_id, bins)
+    if not histogram:
+        return jsonify({'error': 'No results found for test'}), 404
+    response = jsonify({'test_id': test_id, 'bins': histogram})
+    if etag is not None:
+        response.set_etag(etag)
+    return response, 200
 
-    # Calculate maximum value
-    max_value = int(np.max(obtained_marks_list))
 
-    # Calculate percentiles
-    percentiles = np.percentile(obtained_marks_list, [25, 50, 75])
+@bp.route('/results/<test_id>/timeline', methods=['GET'])
+def timeline_results(test_id):
+    """
+       Summarise the marks of a test per `interval` (hour or day, the default) of scanned_on.
 
-    # Calculate percentiles as a percentage of available marks
-    available_marks = TestResults.query.filter_by(test_id=test_id).first().available_marks
-    percentiles_percentage = [p * 100 / available_marks for p in percentiles]
+       The periods are grouped in the database, see app.distributions.score_timeline.
+       """
+    interval = request.args.get('interval', 'day')
+    if interval not in TIMELINE_INTERVALS:
+        return jsonify({'error': f"Unsupported interval, expected one of: {', '.join(TIMELINE_INTERVALS)}"}), 400
 
-    # Construct the response
-    response = {
-        'mean': mean,
-        'stddev': stddev,
-        'min': min_value,
-        'max': max_value,
-        'p25': percentiles_percentage[0],
-        'p50': percentiles_percentage[1],
-        'p75': percentiles_percentage[2],
-        'count': count
-    }
+    etag = versioned_etag(test_id, 'timeline', interval)
+    if etag is not None and request.if_none_match.contains(etag):
+        return not_modified(etag)
 
-    # Return the response as JSON
-    return jsonify(response), 200
+    timeline = score_timeline(db.session, test_id, interval)
+    if not timeline:
+        return jsonify({'error': 'No results found for test'}), 404
+    response = jsonify({'test_id': test_id, 'interval': interval, 'periods': timeline})
+    if etag is not None:
+        response.set_etag(etag)
+    return response, 200
+
+
+@bp.route('/results/<test_id>/marks.npy', methods=['GET'])
+def marks_array(test_id):
+    """
+       The obtained marks, available marks and scan time of every result of a test, as a .npy file.
+
+       The file holds one app.marks.MARKS_DTYPE record per student in student_number order, read
+       from the cursor without building TestResults objects. Saved to disk, it can be opened
+       with np.load(path, mmap_mode='r') without reading it into memory.
+       """
+    etag = versioned_etag(test_id, 'marks')
+    if etag is not None and request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    # Imported on first use, so that numpy is not loaded when a worker starts
+    from app.marks import npy_bytes, read_marks
+    marks = read_marks(db.session, [test_id], current_app.config['EXPORT_BATCH_SIZE']).get(test_id)
+    if marks is None:
+        return jsonify({'error': 'No results found for test'}), 404
+    return marks_response(npy_bytes(marks), etag, f'{test_id}.npy'), 200
+
+
+@bp.route('/results/marks.npz', methods=['GET'])
+def marks_archive():
+    """
+       The marks of several tests as an uncompressed .npz archive, with one array per test.
+
+       The test_ids query parameter is a comma-separated list of up to MARKS_MAX_TESTS test IDs.
+       Each test with results is stored under its ID as in /results/<test_id>/marks.npy, and
+       tests without results are left out. The ETag changes whenever any of the tests does.
+       """
+    test_ids = list(dict.fromkeys(test_id for test_id in request.args.get('test_ids', '').split(',') if test_id))
+    max_tests = current_app.config['MARKS_MAX_TESTS']
+    if not 1 <= len(test_ids) <= max_tests:
+        return jsonify({'error': f'test_ids must list between 1 and {max_tests} test IDs'}), 400
+
+    etag = marks_etag(test_ids)
+    if etag is not None and request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    from app.marks import npz_bytes, read_marks
+    arrays = read_marks(db.session, test_ids, current_app.config['EXPORT_BATCH_SIZE'])
+    if not arrays:
+        return jsonify({'error': 'No results found for tests'}), 404
+    return marks_response(npz_bytes(arrays), etag, 'marks.npz'), 200
+
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+       Expose request, phase, import, admission, stream, cache and connection pool metrics in the Prometheus text format.
+       """
+    cache = aggregate_cache().stats()
+    # The cache keeps its own totals, which only ever increase
+    counters = [
+        ('markr_aggregate_cache_hits_total', 'Aggregate cache hits.', cache['hits']),
+        ('markr_aggregate_cache_misses_total', 'Aggregate cache misses.', cache['misses']),
+        ('markr_aggregate_cache_evictions_total', 'Aggregate cache evictions.', cache['evictions']),
+        ('markr_aggregate_cache_invalidations_total', 'Aggregate cache invalidations.', cache['invalidations']),
+    ]
+    gauges = [
+        ('markr_aggregate_cache_entries', 'Aggregate responses currently cached.', cache['entries']),
+        *pool_gauges(db.engine),
+        *import_admission().gauges(),
+        *aggregate_events().gauges(),
+    ]
+    body = current_app.extensions['markr_metrics'].render(gauges, counters)
+    return current_app.response_class(body, mimetype='text/plain; version=0.0.4'), 200
+
+
+@bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+       Report the aggregate cache counters, for sizing the cache.
+       """
+    return jsonify(aggregate_cache().stats()), 200
+
+
+@bp.route('/results/<test_id>/items', methods=['GET'])
+def item_results(test_id):
+    """
+       Per-question difficulty, discrimination and answer distribution for a given test ID.
+
+       Only the packed answers are read from the database; see app.items.item_analysis.
+       """
+
+    blobs = db.session.execute(
+        select(TestResults.answers).where(TestResults.test_id == test_id, TestResults.answers.isnot(None))
+    ).scalars().all()
+
+    if not blobs:
+        return jsonify({'error': 'No answers found for test'}), 404
+
+    # Imported on first use, so that numpy is not loaded when a worker starts
+    from app.items import item_analysis
+    return jsonify({'test_id': test_id, 'students': len(blobs), 'items': item_analysis(blobs)}), 200
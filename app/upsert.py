@@ -0,0 +1,220 @@
+# app/upsert.py
+from collections import defaultdict
+import hashlib
+import logging
+import time
+from sqlalchemy import null, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.aggregates import apply_changes, lock_aggregates
+from app.models import TestResults
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Dialects that support INSERT ... ON CONFLICT DO UPDATE
+INSERT_CONSTRUCTS = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert,
+}
+
+
+def _last_write_wins(current, new):
+    """
+        Resolve a duplicate by keeping the record seen last.
+        """
+    return new
+
+
+def _highest_marks(current, new):
+    """
+        Resolve a duplicate by keeping the record with the most obtained marks.
+        """
+    return new if new['obtained_marks'] > current['obtained_marks'] else current
+
+
+# Conflict rules, mapping a name to the function used to collapse duplicates inside a document
+# and a builder for the condition under which a stored row is replaced
+CONFLICT_RULES = {
+    'last-write-wins': (_last_write_wins, None),
+    'highest-marks': (_highest_marks, lambda table, excluded: excluded.obtained_marks > table.c.obtained_marks),
+}
+
+
+def key_of(record):
+    """
+        Return the primary key of a TestResults record dict.
+        """
+    return record['student_number'], record['test_id']
+
+
+def record_hash(record):
+    """
+        Hash the non-key columns of a TestResults record dict, to tell whether a stored row changes.
+
+        Returns:
+            bytes: A 16 byte BLAKE2b digest.
+        """
+    digest = hashlib.blake2b(digest_size=16)
+    scanned_on = record['scanned_on']
+    digest.update('\0'.join(str(value) for value in (
+        record['first_name'], record['last_name'], scanned_on.isoformat() if scanned_on else None,
+        record['available_marks'], record['obtained_marks'])).encode('utf-8'))
+    digest.update(b'\0' + (record.get('answers') or b''))
+    return digest.digest()
+
+
+class ResultUpserter:
+    """
+        Write TestResults records to the database in fixed-size, set-based batches.
+
+        Records are collapsed by primary key as they are added using the configured conflict
+        rule, and each full batch is written with a single INSERT ... ON CONFLICT DO UPDATE
+        statement. The test_aggregates table is corrected for every row that is inserted or
+        replaced. Each batch first locks the aggregate rows of its tests (see lock_aggregates)
+        and only then reads the rows it replaces, so concurrent imports of the same test are
+        applied one after the other. Nothing is committed; the caller owns the transaction.
+
+        With hash_records, each row is stored with its record_hash and a record whose hash
+        matches the stored row is skipped rather than rewritten, so re-sending an overlapping
+        document only writes the records that changed.
+
+        Attributes:
+            session (Session): The session the statements are executed in.
+            batch_size (int): The number of distinct records written per statement.
+            rule (str): The name of the conflict rule, a key of CONFLICT_RULES.
+            hash_records (bool): Store record hashes and skip unchanged records.
+            count (int): The number of records added so far.
+            unchanged (int): The number of records skipped because the stored row was identical.
+            test_ids (set): The tests whose results were inserted or replaced.
+            phases (dict): Seconds spent in the 'lookup', 'aggregates' and 'upsert' steps.
+        """
+
+    def __init__(self, session, batch_size=1000, rule='last-write-wins', phases=None, hash_records=False):
+        if rule not in CONFLICT_RULES:
+            raise ValueError(f'Unknown conflict rule: {rule}')
+        self.session = session
+        self.batch_size = batch_size
+        self.rule = rule
+        self.hash_records = hash_records
+        self.count = 0
+        self.unchanged = 0
+        self.test_ids = set()
+        self.phases = phases if phases is not None else defaultdict(float)
+        self._merge, self._where = CONFLICT_RULES[rule]
+        self._pending = {}
+
+    def add(self, record):
+        """
+            Queue a record, writing the current batch once it is full.
+
+            Args:
+                record (dict): The column values of the record.
+            """
+        self.count += 1
+        key = key_of(record)
+        current = self._pending.get(key)
+        self._pending[key] = record if current is None else self._merge(current, record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+            Write any queued records to the database.
+            """
+        if not self._pending:
+            return
+        # Written in key order, so that concurrent imports lock the rows they share in the same order
+        rows = sorted(self._pending.values(), key=key_of)
+        self._pending = {}
+        self._write(rows)
+
+    def _write(self, rows):
+        table = TestResults.__table__
+        dialect = self.session.get_bind().dialect.name
+        insert = INSERT_CONSTRUCTS.get(dialect)
+        clock = time.perf_counter
+        started = clock()
+
+        # Lock the aggregates first, so that no concurrent import of these tests changes the
+        # results between the lookup and the upsert
+        aggregates = lock_aggregates(self.session, {row['test_id'] for row in rows}, insert)
+        locked = clock()
+        self.phases['aggregates'] += locked - started
+
+        # Look up the scores (and hashes) this batch may replace with one query, to correct the aggregates
+        existing = dict(
+            ((student_number, test_id), (obtained_marks, stored_hash))
+            for student_number, test_id, obtained_marks, stored_hash in self.session.execute(
+                select(table.c.student_number, table.c.test_id, table.c.obtained_marks,
+                       table.c.record_hash if self.hash_records else null())
+                .where(tuple_(table.c.student_number, table.c.test_id).in_([key_of(row) for row in rows]))
+            )
+        )
+        changes = []
+        replaced = []
+        for row in rows:
+            key = key_of(row)
+            if self.hash_records:
+                row['record_hash'] = record_hash(row)
+            if key in existing:
+                old_marks, stored_hash = existing[key]
+                if stored_hash is not None and stored_hash == row.get('record_hash'):
+                    self.unchanged += 1
+                    continue
+                if self._merge({'obtained_marks': old_marks}, row) is not row:
+                    continue
+            else:
+                old_marks = None
+            changes.append((row['test_id'], old_marks, row['obtained_marks'], row['available_marks']))
+            replaced.append(row)
+        looked_up = clock()
+        self.phases['lookup'] += looked_up - locked
+
+        apply_changes(self.session, changes, aggregates)
+        self.test_ids.update(change[0] for change in changes)
+        aggregated = clock()
+        self.phases['aggregates'] += aggregated - looked_up
+
+        if not replaced:
+            self.phases['upsert'] += clock() - aggregated
+            return
+        if insert is None:
+            # Fall back to the ORM for databases without ON CONFLICT support
+            logger.warning(f"No bulk upsert support for {dialect}, merging rows individually")
+            for row in replaced:
+                self.session.merge(TestResults(**row))
+            self.phases['upsert'] += clock() - aggregated
+            return
+
+        # The statement is compiled once and executed with the whole batch as parameters, which
+        # SQLAlchemy sends as one multi-row INSERT on PostgreSQL and as executemany on SQLite.
+        # Rows that would not replace the stored one are left out.
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.student_number, table.c.test_id],
+            set_={column.name: stmt.excluded[column.name] for column in table.columns if not column.primary_key},
+            where=self._where(table, stmt.excluded) if self._where is not None else None,
+        )
+        self.session.execute(stmt, replaced)
+        self.phases['upsert'] += clock() - aggregated
+
+
+def upsert_results(session, records, batch_size=1000, rule='last-write-wins'):
+    """
+        Upsert an iterable of TestResults records.
+
+        Args:
+            session (Session): The session the statements are executed in.
+            records (iterable): The record dicts to write.
+            batch_size (int): The number of distinct records written per statement.
+            rule (str): The name of the conflict rule.
+
+        Returns:
+            int: The number of records processed.
+        """
+    upserter = ResultUpserter(session, batch_size=batch_size, rule=rule)
+    for record in records:
+        upserter.add(record)
+    upserter.flush()
+    return upserter.count
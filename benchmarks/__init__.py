@@ -0,0 +1,10 @@
+"""
+Benchmarks for Markr.
+
+- benchmarks.generate: synthetic Markr XML documents.
+- benchmarks.harness: import throughput, aggregate latency and connection pool use through the
+  Flask test client.
+- benchmarks.validation: the per-field record checks against validation with the compiled schema.
+- benchmarks.startup: the cold start time of a worker process.
+- benchmarks.compare: the difference between two harness reports.
+"""
@@ -0,0 +1,57 @@
+# benchmarks/compare.py
+import argparse
+import json
+
+# The metrics compared, and whether a higher value is an improvement
+METRICS = {
+    'rows_per_sec': True,
+    'requests_per_sec': True,
+    'mb_per_sec': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'peak_rss_mb': False,
+    'cold_start_ms': False,
+}
+
+
+def compare(baseline, candidate):
+    """
+        Compare two benchmark reports written by benchmarks.harness.
+
+        Returns:
+            list: Rows of (database, phase, metric, baseline value, candidate value, change in
+                percent, whether the change is an improvement), for every metric in both reports.
+        """
+    rows = []
+    for database, phases in candidate['results'].items():
+        for phase, metrics in phases.items():
+            before = baseline['results'].get(database, {}).get(phase, {})
+            for metric, higher_is_better in METRICS.items():
+                if metric in metrics and before.get(metric):
+                    change = (metrics[metric] - before[metric]) * 100 / before[metric]
+                    rows.append((database, phase, metric, before[metric], metrics[metric], change,
+                                 (change > 0) == higher_is_better))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two Markr benchmark reports.')
+    parser.add_argument('baseline', help='The report of the earlier commit.')
+    parser.add_argument('candidate', help='The report of the later commit.')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if baseline['parameters'] != candidate['parameters']:
+        print('Warning: the reports were run with different parameters')
+    print(f"{baseline['commit'] or '?'} -> {candidate['commit'] or '?'}")
+    for database, phase, metric, before, after, change, better in compare(baseline, candidate):
+        print(f"{database:<11} {phase:<15} {metric:<13} {before:>12.2f} {after:>12.2f} {change:>+8.1f}%"
+              f"{'' if abs(change) < 5 else ' better' if better else ' WORSE'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/generate.py
+import argparse
+from datetime import datetime, timedelta, timezone
+import random
+import sys
+
+# Mandatory fields that a malformed record may be missing
+MANDATORY_FIELDS = ['first-name', 'last-name', 'student-number', 'test-id']
+
+
+def generate_document(students=1000, tests=1, answers=20, duplicate_rate=0.0, malformed_rate=0.0, seed=0):
+    """
+        Generate a synthetic Markr XML document.
+
+        Every student sits every test, so the document holds students * tests records, plus
+        any duplicates. A duplicate repeats an earlier student and test with a new score, as a
+        rescan would. A malformed record is missing one mandatory field or its summary-marks.
+
+        Args:
+            students (int): The number of students.
+            tests (int): The number of tests, with IDs 'test-0', 'test-1', ...
+            answers (int): The number of answer elements per record.
+            duplicate_rate (float): The share of records that are followed by a duplicate.
+            malformed_rate (float): The share of records that are malformed.
+            seed (int): The random seed, so that runs are reproducible.
+
+        Returns:
+            bytes: The XML document.
+            dict: The number of records, duplicates and malformed records generated.
+        """
+    rng = random.Random(seed)
+    scanned_on = datetime(2017, 12, 4, 12, 0, tzinfo=timezone(timedelta(hours=11)))
+    choices = 'ABCD'
+    counts = {'records': 0, 'duplicates': 0, 'malformed': 0}
+    parts = ['<?xml version="1.0" encoding="UTF-8" ?>\n<mcq-test-results>\n']
+
+    def record(student, test, malformed):
+        awarded = [rng.random() < 0.6 for _ in range(answers)]
+        fields = {
+            'first-name': f'First{student}',
+            'last-name': f'Last{student}',
+            'student-number': f'{student:08d}',
+            'test-id': f'test-{test}',
+        }
+        missing = rng.choice(MANDATORY_FIELDS + ['summary-marks']) if malformed else None
+        lines = [f'\t<mcq-test-result scanned-on="{(scanned_on + timedelta(minutes=student % 600)).isoformat()}">']
+        lines.extend(f'\t\t<{name}>{value}</{name}>' for name, value in fields.items() if name != missing)
+        lines.extend(f'\t\t<answer question="{q}" marks-available="1" marks-awarded="{int(a)}">{rng.choice(choices)}</answer>'
+                     for q, a in enumerate(awarded))
+        if missing != 'summary-marks':
+            lines.append(f'\t\t<summary-marks available="{answers}" obtained="{sum(awarded)}" />')
+        lines.append('\t</mcq-test-result>\n')
+        return '\n'.join(lines)
+
+    for test in range(tests):
+        for student in range(students):
+            malformed = rng.random() < malformed_rate
+            counts['records'] += 1
+            counts['malformed'] += malformed
+            parts.append(record(student, test, malformed))
+            if rng.random() < duplicate_rate:
+                counts['records'] += 1
+                counts['duplicates'] += 1
+                parts.append(record(student, test, False))
+
+    parts.append('</mcq-test-results>\n')
+    return ''.join(parts).encode('utf-8'), counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic Markr XML document.')
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--tests', type=int, default=1)
+    parser.add_argument('--answers', type=int, default=20)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', default='-', help='The file to write, or - for stdout.')
+    args = parser.parse_args(argv)
+
+    document, counts = generate_document(args.students, args.tests, args.answers, args.duplicate_rate,
+                                         args.malformed_rate, args.seed)
+    if args.output == '-':
+        sys.stdout.buffer.write(document)
+    else:
+        with open(args.output, 'wb') as f:
+            f.write(document)
+    print(f"Generated {counts['records']} records ({counts['duplicates']} duplicates, "
+          f"{counts['malformed']} malformed), {len(document)} bytes", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
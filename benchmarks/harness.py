@@ -0,0 +1,224 @@
+# benchmarks/harness.py
+import argparse
+from collections import Counter
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app import create_app, db
+from app.models import TestResults
+from benchmarks.generate import generate_document
+from benchmarks.startup import measure_startup
+
+
+def peak_rss_mb():
+    """
+        Return the peak resident set size of this process so far, in MB.
+        """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+def latency_summary(latencies):
+    """
+        Summarize request latencies given in seconds.
+
+        Returns:
+            dict: The request count and the mean, p50, p99 and max latency in milliseconds.
+        """
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'mean_ms': float(latencies_ms.mean()),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'max_ms': float(latencies_ms.max()),
+    }
+
+
+def git_commit():
+    """
+        Return the commit being benchmarked, or None outside a git checkout.
+        """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(database_uri, students=1000, tests=5, answers=20, duplicate_rate=0.0, malformed_rate=0.0,
+                  imports=3, aggregate_requests=200, threads=8, seed=0):
+    """
+        Benchmark /import and /results/<test_id>/aggregate against one database.
+
+        The tables are recreated, then `imports` generated documents are posted (the first
+        inserts every row and the rest replace them), and finally the aggregate of a random
+        test is requested `aggregate_requests` times with the cache cleared before each request
+        (cold), then left warm, and then cold again from `threads` concurrent clients while
+        the connection pool is sampled to show how close it comes to saturation.
+
+        Throughput only counts the records of accepted imports; a document with malformed
+        records is rejected as a whole. The aggregate phases are skipped if no rows were
+        written, and fail if any aggregate request is not answered with 200.
+
+        Args:
+            database_uri (str): The SQLAlchemy URI of a database that may be wiped.
+            students, tests, answers, duplicate_rate, malformed_rate: See generate_document.
+            imports (int): The number of documents to import.
+            aggregate_requests (int): The number of aggregate requests per phase.
+            threads (int): The number of concurrent clients in the concurrent phase.
+            seed (int): The random seed.
+
+        Returns:
+            dict: The measurements of each phase.
+        """
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'IMPORT_ASYNC': False})
+    client = app.test_client()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    try:
+        results = {}
+
+        # Import phase
+        latencies, generated, records, payload_bytes, statuses = [], 0, 0, 0, Counter()
+        for i in range(imports):
+            document, counts = generate_document(students, tests, answers, duplicate_rate, malformed_rate, seed + i)
+            start = time.perf_counter()
+            response = client.post('/import', data=document, content_type='text/xml+markr')
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+            generated += counts['records']
+            if 200 <= response.status_code < 300:
+                records += counts['records']
+                payload_bytes += len(document)
+        with app.app_context():
+            rows_written = db.session.query(TestResults).count()
+        results['import'] = dict(latency_summary(latencies), generated_records=generated, records=records,
+                                 rows_written=rows_written, payload_bytes=payload_bytes,
+                                 rows_per_sec=records / sum(latencies), mb_per_sec=payload_bytes / sum(latencies) / 1e6,
+                                 status_codes={str(code): n for code, n in statuses.items()},
+                                 peak_rss_mb=peak_rss_mb())
+        results['startup'] = measure_startup(database_uri)
+        if not rows_written:
+            print('No rows were written, skipping the aggregate phases', file=sys.stderr)
+            return results
+
+        def check(phase, codes):
+            # Latencies of failed requests would not describe the aggregate endpoint
+            if set(codes) != {200}:
+                raise RuntimeError(f'{phase}: aggregate requests answered with {dict(codes)}')
+            return {str(code): n for code, n in codes.items()}
+
+        # Aggregate phases
+        rng = random.Random(seed)
+        cache = app.extensions['markr_aggregate_cache']
+        for phase, clear_cache in [('aggregate_cold', True), ('aggregate_warm', False)]:
+            latencies, codes = [], Counter()
+            for _ in range(aggregate_requests):
+                if clear_cache:
+                    cache.clear()
+                start = time.perf_counter()
+                codes[client.get(f'/results/test-{rng.randrange(tests)}/aggregate').status_code] += 1
+                latencies.append(time.perf_counter() - start)
+            results[phase] = dict(latency_summary(latencies), status_codes=check(phase, codes),
+                                  peak_rss_mb=peak_rss_mb())
+
+        # Concurrent phase, sampling the pool from a separate thread
+        with app.app_context():
+            pool = db.engine.pool
+        peak = [0]
+        done = threading.Event()
+
+        def sample_pool():
+            while not done.wait(0.001):
+                peak[0] = max(peak[0], pool.checkedout())
+
+        def request(test_id):
+            cache.clear()
+            start = time.perf_counter()
+            status = client.get(f'/results/{test_id}/aggregate').status_code
+            return time.perf_counter() - start, status
+
+        sampler = threading.Thread(target=sample_pool, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            responses = list(executor.map(request, [f'test-{rng.randrange(tests)}'
+                                                    for _ in range(aggregate_requests)]))
+        elapsed = time.perf_counter() - started
+        done.set()
+        sampler.join()
+        latencies = [latency for latency, _ in responses]
+        results['aggregate_concurrent'] = dict(
+            latency_summary(latencies), threads=threads, requests_per_sec=aggregate_requests / elapsed,
+            status_codes=check('aggregate_concurrent', Counter(status for _, status in responses)),
+            pool_peak_checked_out=peak[0],
+            pool_max_connections=pool.size() + pool._max_overflow if hasattr(pool, 'overflow') else None,
+            peak_rss_mb=peak_rss_mb())
+        return results
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Markr import throughput and aggregate latency.')
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--tests', type=int, default=5)
+    parser.add_argument('--answers', type=int, default=20)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--imports', type=int, default=3)
+    parser.add_argument('--aggregate-requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--postgres', default=os.environ.get('MARKR_BENCH_POSTGRES_URI'),
+                        help='A PostgreSQL URI to benchmark as well; its tables are dropped. '
+                             'Defaults to $MARKR_BENCH_POSTGRES_URI.')
+    parser.add_argument('--output', '-o', help='The JSON file to write the results to.')
+    args = parser.parse_args(argv)
+
+    parameters = {name: getattr(args, name) for name in
+                  ['students', 'tests', 'answers', 'duplicate_rate', 'malformed_rate', 'imports',
+                   'aggregate_requests', 'threads', 'seed']}
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        databases = {'sqlite': f"sqlite:///{os.path.join(directory, 'bench.db')}"}
+        if args.postgres:
+            databases['postgresql'] = args.postgres
+        for name, uri in databases.items():
+            print(f'Benchmarking {name}...', file=sys.stderr)
+            report['results'][name] = run_benchmark(uri, **parameters)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/startup.py
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Run in a fresh interpreter: load the WSGI app as a worker would and serve one request
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from wsgi import app
+loaded = time.perf_counter()
+from app import post_fork
+post_fork(app)
+response = app.test_client().get('/metrics')
+served = time.perf_counter()
+print(json.dumps({'create_app_ms': (loaded - started) * 1000, 'first_request_ms': (served - loaded) * 1000,
+                  'status': response.status_code, 'numpy_loaded': 'numpy' in sys.modules,
+                  'alembic_loaded': 'alembic' in sys.modules}))
+"""
+
+
+def measure_startup(database_uri, runs=5):
+    """
+        Measure the cold start of a worker process.
+
+        Each run starts a new interpreter that imports wsgi.app and serves a first request, which
+        is what a worker pays when it is not forked from a preloaded master.
+
+        Args:
+            database_uri (str): The SQLAlchemy URI of the database to serve.
+            runs (int): The number of interpreters started.
+
+        Returns:
+            dict: The median create_app, first request and total cold start times in
+                milliseconds, and whether the heavy optional modules were loaded.
+        """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=database_uri, IMPORT_ASYNC='false')
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', CHILD], cwd=root, env=env, capture_output=True,
+                                text=True, check=True).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+    create_app_ms = statistics.median(sample['create_app_ms'] for sample in samples)
+    first_request_ms = statistics.median(sample['first_request_ms'] for sample in samples)
+    return {
+        'runs': runs,
+        'create_app_ms': create_app_ms,
+        'first_request_ms': first_request_ms,
+        'cold_start_ms': statistics.median(sample['create_app_ms'] + sample['first_request_ms']
+                                           for sample in samples),
+        'numpy_loaded': samples[-1]['numpy_loaded'],
+        'alembic_loaded': samples[-1]['alembic_loaded'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the cold start of a Markr worker process.')
+    parser.add_argument('database_uri', nargs='?', default='sqlite://')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps(measure_startup(args.database_uri, args.runs), indent=2))
+
+
+if __name__ == '__main__':
+    main()
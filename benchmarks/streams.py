@@ -0,0 +1,253 @@
+# benchmarks/streams.py
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from app import create_app, db
+from benchmarks.harness import latency_summary
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+        <student-number>{student}</student-number>
+        <test-id>stream-0</test-id>
+        <summary-marks available="20" obtained="{obtained}" />
+    </mcq-test-result>
+</mcq-test-results>"""
+
+
+def free_port():
+    """
+        Return a TCP port that is free on the loopback interface.
+        """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(port, method, path, body=None, headers=None):
+    """
+        Send a request to the server and read the whole response.
+
+        Returns:
+            int: The response status.
+            bytes: The response body.
+        """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+class Subscriber(threading.Thread):
+    """
+        A client following /results/stream-0/stream, recording when it received each version.
+
+        Attributes:
+            received (dict): The time.perf_counter at which each version arrived, keyed by version.
+            status (int): The response status.
+        """
+
+    def __init__(self, port):
+        super().__init__(daemon=True)
+        self.port = port
+        self.received = {}
+        self.status = None
+        self.connected = threading.Event()
+        self._condition = threading.Condition()
+        self._connection = None
+
+    def run(self):
+        self._connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            self._connection.request('GET', '/results/stream-0/stream')
+            response = self._connection.getresponse()
+            self.status = response.status
+            if response.status != 200:
+                return
+            for line in response:
+                if line.startswith(b'id: '):
+                    with self._condition:
+                        self.received[line[4:].strip().decode()] = time.perf_counter()
+                        self._condition.notify_all()
+                    self.connected.set()
+        except OSError:
+            pass
+        finally:
+            self.connected.set()
+
+    def wait_for(self, version, timeout):
+        """
+            Wait until a version is received.
+
+            Returns:
+                float: The time.perf_counter at which it arrived, or None after the timeout.
+            """
+        with self._condition:
+            self._condition.wait_for(lambda: version in self.received, timeout)
+            return self.received.get(version)
+
+    def close(self):
+        if self._connection is not None and self._connection.sock is not None:
+            self._connection.sock.shutdown(socket.SHUT_RDWR)
+
+
+def process_status(pid):
+    """
+        Read the resident set size in MB and the thread count of a process from /proc.
+
+        Returns:
+            dict: The rss_mb and threads of the process, empty where /proc is not available.
+        """
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            fields = dict(line.split(':', 1) for line in f)
+    except OSError:
+        return {}
+    return {'rss_mb': int(fields['VmRSS'].split()[0]) / 1024, 'threads': int(fields['Threads'])}
+
+
+def worker_pid(master_pid):
+    """
+        Return the PID of the only worker of a gunicorn master, or None where /proc does not list it.
+        """
+    try:
+        with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+            children = f.read().split()
+    except OSError:
+        return None
+    return int(children[0]) if children else None
+
+
+def run_streams(subscribers=500, reads=50, interval=0.5, database_uri=None):
+    """
+        Serve aggregate streams from one gunicorn worker and measure how they behave.
+
+        The server is started with gunicorn.conf.py and STREAM_MAX_SUBSCRIBERS set to the
+        requested number of streams, which gives the worker a thread for each. Once every
+        subscriber has received the current aggregate, one more stream is opened, which must be
+        rejected, aggregate requests are timed while the streams are open, and a result is
+        imported, timing how long after the import was sent it reaches every subscriber.
+
+        Args:
+            subscribers (int): The number of streams opened.
+            reads (int): The number of aggregate requests timed while the streams are open.
+            interval (float): STREAM_INTERVAL, the shortest time between two stream updates.
+            database_uri (str): The database to serve, a temporary SQLite file by default. Its
+                tables are created and dropped.
+
+        Returns:
+            dict: The measurements.
+        """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    directory = tempfile.TemporaryDirectory()
+    database_uri = database_uri or f"sqlite:///{os.path.join(directory.name, 'streams.db')}"
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri})
+    with app.app_context():
+        db.create_all()
+    # The request threads, plus the thread of every stream
+    threads = app.config['REQUEST_THREADS'] + subscribers
+    port = free_port()
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=database_uri, WEB_CONCURRENCY='1',
+               GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_ACCESS_LOG=os.devnull, STREAM_INTERVAL=str(interval),
+               STREAM_MAX_SUBSCRIBERS=str(subscribers), IMPORT_ASYNC='false', GUNICORN_GRACEFUL_TIMEOUT='2')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], cwd=root,
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    clients = []
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                request(port, 'GET', '/metrics')
+                break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.1)
+        status, _ = request(port, 'POST', '/import', DOCUMENT.format(student=1, obtained=10),
+                            {'Content-Type': 'text/xml+markr'})
+        assert status == 200, status
+        idle = process_status(worker_pid(server.pid))
+
+        # Open every stream and wait for each to receive the current aggregate
+        started = time.perf_counter()
+        clients = [Subscriber(port) for _ in range(subscribers)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.connected.wait(60)
+        opened = time.perf_counter() - started
+        streaming = sum(client.status == 200 and bool(client.received) for client in clients)
+        rejected, _ = request(port, 'GET', '/results/stream-0/stream')
+
+        # Time aggregate requests while the streams are open
+        latencies = []
+        for _ in range(reads):
+            started = time.perf_counter()
+            status, _ = request(port, 'GET', '/results/stream-0/aggregate')
+            latencies.append(time.perf_counter() - started)
+            assert status == 200, status
+        loaded = process_status(worker_pid(server.pid))
+
+        # Import a result and time its arrival at every subscriber
+        version = str(max(int(version) for client in clients for version in client.received) + 1)
+        started = time.perf_counter()
+        status, _ = request(port, 'POST', '/import', DOCUMENT.format(student=2, obtained=15),
+                            {'Content-Type': 'text/xml+markr'})
+        assert status == 200, status
+        imported = time.perf_counter()
+        arrivals = [client.wait_for(version, 30) for client in clients]
+        # Subscribers are updated once the import commits, which may be before its response arrives
+        delivered = [arrival - started for arrival in arrivals if arrival is not None]
+
+        return {
+            'subscribers': subscribers,
+            'gunicorn_threads': threads,
+            'streaming': streaming,
+            'open_seconds': opened,
+            'extra_stream_status': rejected,
+            'aggregate_while_streaming': latency_summary(latencies),
+            'import_ms': (imported - started) * 1000,
+            'delivered': len(delivered),
+            'delivery': latency_summary(delivered) if delivered else None,
+            'worker_idle': idle,
+            'worker_streaming': loaded,
+        }
+    finally:
+        for client in clients:
+            try:
+                client.close()
+            except OSError:
+                pass
+        server.terminate()
+        server.wait(30)
+        with app.app_context():
+            db.drop_all()
+            db.engine.dispose()
+        directory.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure aggregate streams served by a gunicorn worker.')
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--reads', type=int, default=50)
+    parser.add_argument('--interval', type=float, default=0.5)
+    parser.add_argument('--database-uri', help='The database to serve; its tables are dropped. '
+                                                'A temporary SQLite database by default.')
+    args = parser.parse_args(argv)
+    print(json.dumps(run_streams(args.subscribers, args.reads, args.interval, args.database_uri), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/validation.py
+import argparse
+from io import BytesIO
+import json
+import time
+from lxml import etree
+from app.parser import check_result, schema, validate_result
+from benchmarks.generate import generate_document
+
+
+def _validate(document, check):
+    # Parse the document as iter_results does, validating each record with check
+    started = time.perf_counter()
+    invalid = 0
+    for _, element in etree.iterparse(BytesIO(document), events=('end',), tag='mcq-test-result'):
+        invalid += bool(check(element))
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+    return time.perf_counter() - started, invalid
+
+
+def measure_validation(students=100000, answers=20, malformed_rate=0.0, seed=0):
+    """
+        Compare the field checks of check_result with validation against the compiled schema.
+
+        The parse alone is timed as well, so that the validation cost of each can be read off.
+
+        Args:
+            students (int): The number of records in the document.
+            answers (int): The number of answer elements per record.
+            malformed_rate (float): The share of records that are malformed.
+            seed (int): The random seed of the document.
+
+        Returns:
+            dict: The parse, field check and schema times in seconds, the records per second of
+                each and the number of invalid records each found.
+        """
+    document, counts = generate_document(students, 1, answers, malformed_rate=malformed_rate, seed=seed)
+    validate = schema().validate
+    report = {'records': counts['records'], 'bytes': len(document)}
+    for name, check in (('parse', lambda element: False), ('check_result', check_result),
+                        ('schema', lambda element: validate_result(element, validate))):
+        seconds, invalid = _validate(document, check)
+        report[name] = {'seconds': seconds, 'records_per_sec': counts['records'] / seconds, 'invalid': invalid}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the per-field record checks with schema validation.')
+    parser.add_argument('--students', type=int, default=100000)
+    parser.add_argument('--answers', type=int, default=20)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    print(json.dumps(measure_validation(args.students, args.answers, args.malformed_rate, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
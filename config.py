@@ -1,12 +1,111 @@
+import os
+
+
 class Config:
     """
     Configuration class for the Flask application.
 
     Attributes:
-        SQLALCHEMY_DATABASE_URI (str): The URI for connecting to the PostgreSQL database.
+        SQLALCHEMY_DATABASE_URI (str): The URI for connecting to the PostgreSQL database. Can be
+            overridden with the SQLALCHEMY_DATABASE_URI environment variable, e.g. 'sqlite://'
+            to run the tests without PostgreSQL.
         SQLALCHEMY_TRACK_MODIFICATIONS (bool): Controls whether Flask-SQLAlchemy
             should track modifications of objects and emit signals.
             Set to False to suppress warnings.
+        IMPORT_BATCH_SIZE (int): The number of records written per bulk upsert statement.
+        IMPORT_CONFLICT_RULE (str): How a record replaces an existing one with the same student
+            number and test ID, either 'last-write-wins' or 'highest-marks'.
+        IMPORT_ASYNC (bool): Queue imports for the background workers and return 202 with a
+            job ID, instead of importing in the request.
+        IMPORT_WORKERS (int): The number of background import worker threads per process.
+        IMPORT_SPOOL_DIR (str): Where queued payloads are stored, the instance folder by default.
+        IMPORT_POLL_INTERVAL (float): Seconds between checks of the job queue by idle workers.
+        IMPORT_JOB_TIMEOUT (int): Seconds after which a running job is assumed to be abandoned
+            and is picked up again.
+        IMPORT_LEDGER (bool): Record the fingerprint of every imported payload, and answer a
+            re-sent payload with 200 without parsing it again.
+        IMPORT_LEDGER_RETENTION (float): Seconds that imported payloads are remembered for.
+        IMPORT_SPOOL_MEMORY (int): The size up to which a payload is held in memory while it is
+            fingerprinted; larger payloads are spooled to a temporary file.
+        IMPORT_RECORD_HASHES (bool): Store a hash of each record and skip records that are
+            identical to the stored row, instead of rewriting them.
+        IMPORT_MAX_CONCURRENT (int): The most imports running at once in each process.
+        IMPORT_MAX_INFLIGHT_BYTES (int): The most payload bytes (by Content-Length) of the imports
+            running in each process, 0 for no limit. A larger payload is only admitted alone.
+        IMPORT_QUEUE_SIZE (int): The most imports waiting for capacity in each process; beyond it
+            imports are rejected with 429.
+        IMPORT_QUEUE_TIMEOUT (float): Seconds an import waits for capacity before it is rejected
+            with 503.
+        IMPORT_RETRY_AFTER (int): The Retry-After seconds sent with rejected imports.
+        REQUEST_THREADS (int): The threads serving requests in each process, GUNICORN_THREADS
+            under gunicorn.
+        READ_RESERVED_SLOTS (int): Request threads and pooled connections that imports may not
+            use, so that the read endpoints stay responsive under import load (see
+            app.admission.import_limits).
+        AGGREGATE_CACHE_SIZE (int): The number of tests whose aggregate responses are cached.
+        AGGREGATE_CACHE_TTL (float): Seconds a cached aggregate is served for, which bounds how
+            long an import made by another process can go unseen on databases other than
+            PostgreSQL, where imports are notified to every process.
+        BATCH_AGGREGATE_CHUNK_SIZE (int): The number of tests read per query by the batch
+            aggregate endpoint.
+        EXPORT_BATCH_SIZE (int): The number of rows fetched from the cursor and written to the
+            response at a time by the export endpoint. The marks array endpoints fetch rows in
+            batches of the same size.
+        MARKS_MAX_TESTS (int): The most tests requested at once from /results/marks.npz.
+        STREAM_INTERVAL (float): The shortest time between two updates of the aggregate streams,
+            over which bursts of imports are coalesced.
+        STREAM_KEEPALIVE (float): Seconds after which an idle aggregate stream is sent a comment.
+        STREAM_MAX_SUBSCRIBERS (int): The most aggregate streams open in each process. Every
+            stream holds a thread of its own, which gunicorn.conf.py adds to GUNICORN_THREADS, so
+            open streams never take the threads of reads and imports.
+        SLOW_REQUEST_SECONDS (float): Requests taking at least this long are logged with their
+            phase breakdown. 0 disables the slow request log.
+        DB_POOL_SIZE (int): The number of connections kept open per process.
+        DB_MAX_OVERFLOW (int): The number of extra connections opened when the pool is exhausted.
+        DB_POOL_TIMEOUT (float): Seconds a request waits for a connection before failing.
+        DB_POOL_RECYCLE (int): Seconds after which a connection is replaced, -1 to never replace.
+        DB_POOL_PRE_PING (bool): Test each connection when it is checked out, so that connections
+            dropped by the server are replaced instead of failing a request.
+        PREFORK (bool): The app is loaded once in a pre-fork server's master process (see
+            gunicorn.conf.py). Background import workers are then started in each worker process
+            by post_fork rather than by create_app.
+        LOAD_MIGRATIONS (bool): Register Flask-Migrate for the `flask db` commands. Serving does
+            not need it, and skipping it avoids importing alembic.
     """
-    SQLALCHEMY_DATABASE_URI = 'postgresql://postgres:root@db/markr?gssencmode=disable'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI',
+                                             'postgresql+psycopg2://postgres:root@db/markr?gssencmode=disable')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+    IMPORT_CONFLICT_RULE = os.environ.get('IMPORT_CONFLICT_RULE', 'last-write-wins')
+    IMPORT_ASYNC = os.environ.get('IMPORT_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 2))
+    IMPORT_SPOOL_DIR = os.environ.get('IMPORT_SPOOL_DIR')
+    IMPORT_POLL_INTERVAL = float(os.environ.get('IMPORT_POLL_INTERVAL', 1.0))
+    IMPORT_JOB_TIMEOUT = int(os.environ.get('IMPORT_JOB_TIMEOUT', 3600))
+    IMPORT_LEDGER = os.environ.get('IMPORT_LEDGER', 'true').lower() in ('1', 'true', 'yes')
+    IMPORT_LEDGER_RETENTION = float(os.environ.get('IMPORT_LEDGER_RETENTION', 7 * 24 * 3600))
+    IMPORT_SPOOL_MEMORY = int(os.environ.get('IMPORT_SPOOL_MEMORY', 16 * 1024 * 1024))
+    IMPORT_RECORD_HASHES = os.environ.get('IMPORT_RECORD_HASHES', 'false').lower() in ('1', 'true', 'yes')
+    IMPORT_MAX_CONCURRENT = int(os.environ.get('IMPORT_MAX_CONCURRENT', 2))
+    IMPORT_MAX_INFLIGHT_BYTES = int(os.environ.get('IMPORT_MAX_INFLIGHT_BYTES', 256 * 1024 * 1024))
+    IMPORT_QUEUE_SIZE = int(os.environ.get('IMPORT_QUEUE_SIZE', 4))
+    IMPORT_QUEUE_TIMEOUT = float(os.environ.get('IMPORT_QUEUE_TIMEOUT', 10))
+    IMPORT_RETRY_AFTER = int(os.environ.get('IMPORT_RETRY_AFTER', 5))
+    REQUEST_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+    READ_RESERVED_SLOTS = int(os.environ.get('READ_RESERVED_SLOTS', 2))
+    AGGREGATE_CACHE_SIZE = int(os.environ.get('AGGREGATE_CACHE_SIZE', 1024))
+    AGGREGATE_CACHE_TTL = float(os.environ.get('AGGREGATE_CACHE_TTL', 60))
+    BATCH_AGGREGATE_CHUNK_SIZE = int(os.environ.get('BATCH_AGGREGATE_CHUNK_SIZE', 1000))
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 2000))
+    MARKS_MAX_TESTS = int(os.environ.get('MARKS_MAX_TESTS', 100))
+    STREAM_INTERVAL = float(os.environ.get('STREAM_INTERVAL', 1.0))
+    STREAM_KEEPALIVE = float(os.environ.get('STREAM_KEEPALIVE', 15))
+    STREAM_MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 500))
+    SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 1.0))
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    PREFORK = os.environ.get('PREFORK', 'false').lower() in ('1', 'true', 'yes')
+    LOAD_MIGRATIONS = os.environ.get('LOAD_MIGRATIONS', 'true').lower() in ('1', 'true', 'yes')
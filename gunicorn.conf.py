@@ -0,0 +1,40 @@
+# gunicorn.conf.py
+"""
+    Gunicorn settings for serving Markr in production, overridable through the environment.
+
+    The app is preloaded in the master process so that each worker starts without importing
+    and configuring it again. Every worker holds its own connection pool of up to
+    DB_POOL_SIZE + DB_MAX_OVERFLOW connections (see config.py), so keep GUNICORN_THREADS within
+    that and workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) within the database's connection limit.
+    GUNICORN_THREADS is also read by config.py (REQUEST_THREADS), so that imports are admitted
+    only while READ_RESERVED_SLOTS threads are left for the read endpoints.
+
+    Open aggregate streams (/results/<test_id>/stream) each hold a thread until the client
+    disconnects, but no connection. Each worker therefore gets STREAM_MAX_SUBSCRIBERS threads
+    on top of GUNICORN_THREADS, and refuses streams beyond that, so streams never take the
+    threads of reads and imports. The thread pool only starts threads as requests need them, so
+    the stream threads cost nothing until streams are opened (python -m benchmarks.streams
+    measures 500 of them).
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8)) + int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 500))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+preload_app = True
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+
+def post_fork(server, worker):
+    """
+        Give the worker its own connection pool and start its background import workers.
+        """
+    from app import post_fork as prepare_worker
+    prepare_worker(server.app.wsgi())
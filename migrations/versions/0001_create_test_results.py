@@ -0,0 +1,36 @@
+"""Create test_results
+
+Revision ID: 0001
+Revises: 
+Create Date: 2024-05-10 00:00:00
+
+Databases created by db.create_all() before migrations were introduced already have this
+table and should be marked as being at this revision with `flask db stamp 0001`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'test_results',
+        sa.Column('student_number', sa.String(length=20), nullable=False),
+        sa.Column('test_id', sa.String(length=20), nullable=False),
+        sa.Column('scanned_on', sa.DateTime(), nullable=True),
+        sa.Column('first_name', sa.String(length=50), nullable=True),
+        sa.Column('last_name', sa.String(length=50), nullable=True),
+        sa.Column('available_marks', sa.Integer(), nullable=True),
+        sa.Column('obtained_marks', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('student_number', 'test_id')
+    )
+
+
+def downgrade():
+    op.drop_table('test_results')
@@ -0,0 +1,58 @@
+"""Add packed answers, test_aggregates and import_jobs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+test_aggregates starts empty; fill it with `flask markr rebuild-aggregates` after upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('test_results', sa.Column('answers', sa.LargeBinary(), nullable=True))
+
+    op.create_table(
+        'test_aggregates',
+        sa.Column('test_id', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('sum_marks', sa.BigInteger(), nullable=False),
+        sa.Column('sum_squares', sa.BigInteger(), nullable=False),
+        sa.Column('min_marks', sa.Integer(), nullable=True),
+        sa.Column('max_marks', sa.Integer(), nullable=True),
+        sa.Column('available_marks', sa.Integer(), nullable=True),
+        sa.Column('histogram', sa.JSON(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('test_id')
+    )
+
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('payload_path', sa.String(length=255), nullable=False),
+        sa.Column('payload_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('records', sa.Integer(), nullable=True),
+        sa.Column('incomplete_records', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_import_jobs_status', 'import_jobs', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_import_jobs_status', table_name='import_jobs')
+    op.drop_table('import_jobs')
+    op.drop_table('test_aggregates')
+    op.drop_column('test_results', 'answers')
@@ -0,0 +1,33 @@
+"""Add a test_id index covering the marks
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+The primary key is (student_number, test_id), so it cannot serve lookups by test_id. On
+PostgreSQL the index includes obtained_marks and available_marks so that per-test aggregates
+are index-only scans, and it is built concurrently so that imports are not blocked while it is
+created on a large table.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_test_results_test_id', 'test_results', ['test_id'],
+                            postgresql_include=['obtained_marks', 'available_marks'],
+                            postgresql_concurrently=True)
+    else:
+        op.create_index('ix_test_results_test_id', 'test_results', ['test_id'])
+
+
+def downgrade():
+    op.drop_index('ix_test_results_test_id', table_name='test_results')
@@ -0,0 +1,28 @@
+"""Record the content type and encoding of queued imports
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+Queued payloads are spooled as sent, so a worker needs the headers to decompress them and to
+split multipart bodies. Jobs queued before this revision are single, uncompressed documents.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('import_jobs', sa.Column('content_type', sa.String(length=255), nullable=True))
+    op.add_column('import_jobs', sa.Column('content_encoding', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    op.drop_column('import_jobs', 'content_encoding')
+    op.drop_column('import_jobs', 'content_type')
@@ -0,0 +1,45 @@
+"""Key the test_id index by student_number
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+Exports page through a test's results in student_number order. Adding student_number to the
+test_id index lets each page start with an index seek and be read in order without sorting,
+while the index still serves lookups by test_id and, on PostgreSQL, index-only aggregates.
+The new index is built before the old one is dropped, concurrently on PostgreSQL.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_test_results_test_id_student_number', 'test_results',
+                            ['test_id', 'student_number'],
+                            postgresql_include=['obtained_marks', 'available_marks'],
+                            postgresql_concurrently=True)
+            op.drop_index('ix_test_results_test_id', table_name='test_results', postgresql_concurrently=True)
+    else:
+        op.create_index('ix_test_results_test_id_student_number', 'test_results', ['test_id', 'student_number'])
+        op.drop_index('ix_test_results_test_id', table_name='test_results')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_test_results_test_id', 'test_results', ['test_id'],
+                            postgresql_include=['obtained_marks', 'available_marks'],
+                            postgresql_concurrently=True)
+            op.drop_index('ix_test_results_test_id_student_number', table_name='test_results',
+                          postgresql_concurrently=True)
+    else:
+        op.create_index('ix_test_results_test_id', 'test_results', ['test_id'])
+        op.drop_index('ix_test_results_test_id_student_number', table_name='test_results')
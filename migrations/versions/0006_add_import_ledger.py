@@ -0,0 +1,40 @@
+"""Add the ledger of imported payloads and per-record hashes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+Re-sent payloads are recognised by their fingerprint in imported_payloads and answered without
+being parsed again. test_results.record_hash lets imports skip records that have not changed.
+Existing rows have no hash, so they are rewritten once by the next import that includes them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'imported_payloads',
+        sa.Column('digest', sa.String(length=64), nullable=False),
+        sa.Column('payload_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('records', sa.Integer(), nullable=False),
+        sa.Column('imported_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('digest'),
+    )
+    op.create_index('ix_imported_payloads_imported_at', 'imported_payloads', ['imported_at'])
+    op.add_column('import_jobs', sa.Column('payload_digest', sa.String(length=64), nullable=True))
+    op.add_column('test_results', sa.Column('record_hash', sa.LargeBinary(length=16), nullable=True))
+
+
+def downgrade():
+    op.drop_column('test_results', 'record_hash')
+    op.drop_column('import_jobs', 'payload_digest')
+    op.drop_index('ix_imported_payloads_imported_at', table_name='imported_payloads')
+    op.drop_table('imported_payloads')
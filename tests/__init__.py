@@ -1 +1,19 @@
 from .test_routes import *
+from .test_parser import *
+from .test_upsert import *
+from .test_aggregates import *
+from .test_jobs import *
+from .test_items import *
+from .test_cache import *
+from .test_batch_aggregate import *
+from .test_benchmarks import *
+from .test_metrics import *
+from .test_loader import *
+from .test_payloads import *
+from .test_wsgi import *
+from .test_export import *
+from .test_ledger import *
+from .test_distributions import *
+from .test_admission import *
+from .test_events import *
+from .test_marks import *
@@ -0,0 +1,172 @@
+import threading
+import time
+import unittest
+from app import create_app, db
+from app.admission import AdmissionRejected, ImportAdmission, import_limits
+
+DOCUMENT = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+        <student-number>2394</student-number>
+        <test-id>9863</test-id>
+        <summary-marks available="20" obtained="17" />
+    </mcq-test-result>
+</mcq-test-results>"""
+
+
+class TestAdmission(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and initialize the database.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_limits(self):
+        """
+        Test case to check that imports are admitted up to the count and byte limits, then queued, then rejected.
+
+        Steps:
+        1. Admit imports up to the concurrency limit and assert that the next one is queued.
+        2. Assert that the queued import is admitted once a running import finishes.
+        3. Assert that imports beyond the queue are rejected with 429 and timed out ones with 503.
+        4. Assert that the byte limit holds back a second large payload but not a lone one.
+
+        Returns:
+            None
+        """
+        # Step 1: Fill the running slots and queue an import
+        admission = ImportAdmission(max_concurrent=2, max_bytes=100, queue_size=1, queue_timeout=5)
+        admission.acquire(10)
+        admission.acquire(10)
+        admitted = threading.Event()
+
+        def queued():
+            admission.acquire(10)
+            admitted.set()
+
+        thread = threading.Thread(target=queued)
+        thread.start()
+        while admission.waiting == 0:
+            time.sleep(0.001)
+
+        # Step 2: Finish an import and assert that the queued one is admitted
+        with self.assertRaises(AdmissionRejected) as rejected:
+            admission.acquire(10)
+        self.assertEqual((rejected.exception.status, rejected.exception.reason), (429, 'concurrency'))
+        admission.release(10)
+        self.assertTrue(admitted.wait(5))
+        thread.join()
+        self.assertEqual((admission.active, admission.waiting, admission.inflight_bytes), (2, 0, 20))
+
+        # Step 3: Assert that a queued import times out
+        admission.queue_timeout = 0.01
+        with self.assertRaises(AdmissionRejected) as rejected:
+            admission.acquire(10)
+        self.assertEqual((rejected.exception.status, rejected.exception.reason), (503, 'timeout'))
+
+        # Step 4: Assert the byte limit
+        admission.release(10)
+        admission.queue_size = 0
+        with self.assertRaises(AdmissionRejected) as rejected:
+            admission.acquire(95)
+        self.assertEqual(rejected.exception.reason, 'bytes')
+        admission.release(10)
+        admission.acquire(500)
+        self.assertEqual(admission.inflight_bytes, 500)
+
+    def test_reserved_capacity(self):
+        """
+        Test case to check that the import limits leave the reserved threads and connections to reads.
+
+        Returns:
+            None
+        """
+        config = dict(self.app.config, REQUEST_THREADS=8, READ_RESERVED_SLOTS=2, IMPORT_MAX_CONCURRENT=4,
+                      IMPORT_QUEUE_SIZE=10, IMPORT_ASYNC=False)
+        self.assertEqual(import_limits(config), (4, 2))
+        config.update(SQLALCHEMY_DATABASE_URI='postgresql+psycopg2://localhost/markr', DB_POOL_SIZE=3,
+                      DB_MAX_OVERFLOW=1)
+        self.assertEqual(import_limits(config), (2, 4))
+        config.update(REQUEST_THREADS=1)
+        self.assertEqual(import_limits(config), (1, 0))
+
+    def test_default_limits(self):
+        """
+        Test case to check that the default settings queue imports, and that lowered limits are logged.
+
+        Steps:
+        1. Assert that the default threads let two imports run and four wait.
+        2. Create an app asking for more imports than its threads allow.
+        3. Assert that the lowered limit is logged as a warning.
+
+        Returns:
+            None
+        """
+        # Step 1: Assert the default limits
+        self.assertEqual(import_limits(self.app.config), (2, 4))
+
+        # Step 2: Ask for more imports than the threads allow
+        with self.assertLogs('app', level='WARNING') as logs:
+            app = create_app({'IMPORT_MAX_CONCURRENT': 10})
+
+        # Step 3: Assert the warning
+        self.assertEqual(app.extensions['markr_import_admission'].max_concurrent, 6)
+        self.assertTrue(any('IMPORT_MAX_CONCURRENT=10 lowered to 6' in line for line in logs.output))
+
+    def test_saturated_import_endpoint(self):
+        """
+        Test case to check the responses of /import while imports are saturated.
+
+        Steps:
+        1. Take every import slot and post a document.
+        2. Assert that it is rejected with 429 and Retry-After, and that reads are still served.
+        3. Assert that the rejection and admission state appear in /metrics.
+        4. Free the slots and assert that the document is imported.
+
+        Returns:
+            None
+        """
+        # Step 1: Take every import slot and post a document
+        admission = self.app.extensions['markr_import_admission']
+        admission.queue_size = 0
+        for _ in range(admission.max_concurrent):
+            admission.acquire(0)
+        response = self.client.post('/import', data=DOCUMENT, content_type='text/xml+markr')
+
+        # Step 2: Assert the rejection, and that reads are unaffected
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], str(self.app.config['IMPORT_RETRY_AFTER']))
+        self.assertEqual(self.client.get('/results/9863/aggregate').status_code, 404)
+
+        # Step 3: Assert the metrics
+        metrics = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('markr_import_rejections_total{reason="concurrency",status="429"} 1', metrics)
+        self.assertIn(f'markr_import_active {admission.max_concurrent}', metrics)
+        self.assertIn('markr_import_queue_depth 0', metrics)
+
+        # Step 4: Free the slots and import the document
+        for _ in range(admission.max_concurrent):
+            admission.release(0)
+        response = self.client.post('/import', data=DOCUMENT, content_type='text/xml+markr')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((admission.active, admission.inflight_bytes), (0, 0))
@@ -0,0 +1,169 @@
+import unittest
+import numpy as np
+from sqlalchemy import event
+from app import create_app, db
+from app.aggregates import summarize
+from app.models import TestResults, TestAggregate
+
+
+def make_document(marks, test_id='9863'):
+    records = ''.join(
+        f"""<mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Sample</first-name>
+                <last-name>Student</last-name>
+                <student-number>{student_number}</student-number>
+                <test-id>{test_id}</test-id>
+                <summary-marks available="20" obtained="{obtained}" />
+            </mcq-test-result>"""
+        for student_number, obtained in marks)
+    return f'<mcq-test-results>{records}</mcq-test-results>'.encode('utf-8')
+
+
+class TestAggregates(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and initialize the database.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def import_marks(self, marks):
+        response = self.client.post('/import', data=make_document(marks), content_type='text/xml+markr')
+        self.assertEqual(response.status_code, 200)
+
+    def test_corrections_match_stored_results(self):
+        """
+        Test case to check that the maintained aggregate matches the stored results after scores are replaced.
+
+        Steps:
+        1. Import a set of results, then re-import some students with new scores.
+        2. Calculate the expected statistics from the stored results with numpy.
+        3. Assert that the aggregate endpoint returns the expected statistics.
+
+        Returns:
+            None
+        """
+        # Step 1: Import results, then replace some of them
+        self.import_marks([('1', 4), ('2', 9), ('3', 13), ('4', 20)])
+        self.import_marks([('1', 11), ('4', 2), ('5', 17)])
+
+        # Step 2: Calculate the expected statistics from the stored results
+        with self.app.app_context():
+            marks = [result.obtained_marks for result in TestResults.query.filter_by(test_id='9863')]
+        p25, p50, p75 = np.percentile(marks, [25, 50, 75]) * 100 / 20
+
+        # Step 3: Assert that the aggregate matches
+        data = self.client.get('/results/9863/aggregate').get_json()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual((data['min'], data['max']), (2, 17))
+        self.assertAlmostEqual(data['mean'], np.mean(marks))
+        self.assertAlmostEqual(data['stddev'], np.std(marks))
+        self.assertAlmostEqual(data['p25'], p25)
+        self.assertAlmostEqual(data['p50'], p50)
+        self.assertAlmostEqual(data['p75'], p75)
+
+    def test_rebuild_command(self):
+        """
+        Test case to check that the rebuild-aggregates command restores a lost aggregate.
+
+        Steps:
+        1. Import a set of results and record the aggregate.
+        2. Delete the test_aggregates rows and run `flask markr rebuild-aggregates`.
+        3. Assert that the rebuilt aggregate is the same as the maintained one.
+
+        Returns:
+            None
+        """
+        # Step 1: Import results and record the aggregate
+        self.import_marks([('1', 4), ('2', 9), ('3', 9), ('4', 20)])
+        with self.app.app_context():
+            expected = summarize(db.session.get(TestAggregate, '9863'))
+
+            # Step 2: Delete the aggregates and rebuild them
+            TestAggregate.query.delete()
+            db.session.commit()
+        result = self.app.test_cli_runner().invoke(args=['markr', 'rebuild-aggregates'])
+        self.assertIn('Rebuilt aggregates for 1 test(s)', result.output)
+
+        # Step 3: Assert that the rebuilt aggregate is the same
+        with self.app.app_context():
+            self.assertEqual(summarize(db.session.get(TestAggregate, '9863')), expected)
+
+    def test_unknown_test(self):
+        """
+        Test case to check that aggregating a test without results returns 404.
+
+        Returns:
+            None
+        """
+        response = self.client.get('/results/unknown/aggregate')
+        self.assertEqual(response.status_code, 404)
+
+    def test_reads_do_not_write(self):
+        """
+        Test case to check that aggregate reads of tests without an aggregate row do not write.
+
+        Steps:
+        1. Store results directly, without going through the importer.
+        2. Request the aggregate and stream of that test and of an unknown test, recording the SQL.
+        3. Assert that the stored test is aggregated from its results and the unknown test returns 404.
+        4. Assert that no statement wrote to the database and no aggregate row was created.
+
+        Returns:
+            None
+        """
+        # Step 1: Store results directly
+        with self.app.app_context():
+            for student_number, obtained in [('1', 10), ('2', 14)]:
+                db.session.add(TestResults(student_number=student_number, test_id='9863', first_name='A',
+                                           last_name='B', available_marks=20, obtained_marks=obtained))
+            db.session.commit()
+            engine = db.engine
+
+        # Step 2: Request the aggregates, recording the SQL
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get('/results/9863/aggregate')
+            stream = self.client.get('/results/9863/stream', buffered=False)
+            first_event = next(iter(stream.response))
+            stream.close()
+            unknown = self.client.get('/results/unknown/aggregate')
+            unknown_stream = self.client.get('/results/unknown/stream')
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+        # Step 3: Assert the responses
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.get_json()['count'], response.get_json()['mean']), (2, 12))
+        self.assertIsNone(response.headers.get('ETag'))
+        self.assertTrue(first_event.startswith(b'id: 0\nevent: aggregate\ndata: '))
+        self.assertEqual((unknown.status_code, unknown_stream.status_code), (404, 404))
+
+        # Step 4: Assert that nothing was written
+        self.assertFalse([statement for statement in statements
+                          if statement.lstrip().split()[0].upper() in ('INSERT', 'UPDATE', 'DELETE')])
+        with self.app.app_context():
+            self.assertEqual(TestAggregate.query.count(), 0)
+
@@ -0,0 +1,97 @@
+from datetime import datetime
+import unittest
+import numpy as np
+from app import create_app, db
+from app.models import TestResults
+
+XML = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+        <student-number>1</student-number>
+        <test-id>a</test-id>
+        <summary-marks available="20" obtained="17" />
+    </mcq-test-result>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Jane</first-name>
+        <last-name>Jane</last-name>
+        <student-number>2</student-number>
+        <test-id>a</test-id>
+        <summary-marks available="20" obtained="9" />
+    </mcq-test-result>
+</mcq-test-results>"""
+
+
+class TestBatchAggregate(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application with results for two tests.
+
+        Test 'a' is imported, so it has an aggregate row. Test 'b' is written directly to
+        test_results, so it has to be calculated with the grouped query.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            for i, obtained_marks in enumerate([65, 70, 75, 80, 85, 85]):
+                db.session.add(TestResults(first_name='Sample', last_name='Student', student_number=str(i),
+                                           test_id='b', available_marks=100, obtained_marks=obtained_marks,
+                                           scanned_on=datetime.now()))
+            db.session.commit()
+        self.client.post('/import', data=XML, content_type='text/xml+markr')
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_requested_tests(self):
+        """
+        Test case to check the batch endpoint against numpy for stored and computed aggregates.
+
+        Steps:
+        1. Request the aggregates of 'a', 'b' and an unknown test in one call.
+        2. Assert that every requested test is in the response, with null for the unknown one.
+        3. Assert that the statistics match a numpy calculation.
+
+        Returns:
+            None
+        """
+        # Step 1: Request the aggregates
+        data = self.client.get('/results/aggregate?test_ids=a,b,unknown,a').get_json()
+
+        # Step 2: Assert that every requested test is present
+        self.assertEqual(set(data), {'a', 'b', 'unknown'})
+        self.assertIsNone(data['unknown'])
+
+        # Step 3: Assert that the statistics match numpy
+        for test_id, marks, available in [('a', [17, 9], 20), ('b', [65, 70, 75, 80, 85, 85], 100)]:
+            p25, p50, p75 = np.percentile(marks, [25, 50, 75]) * 100 / available
+            expected = {'mean': np.mean(marks), 'stddev': np.std(marks), 'min': min(marks), 'max': max(marks),
+                        'p25': p25, 'p50': p50, 'p75': p75, 'count': len(marks)}
+            self.assertEqual(set(data[test_id]), set(expected))
+            for field, value in expected.items():
+                self.assertAlmostEqual(data[test_id][field], value)
+
+    def test_all_tests(self):
+        """
+        Test case to check that every test is aggregated when no test IDs are given.
+
+        Returns:
+            None
+        """
+        data = self.client.get('/results/aggregate').get_json()
+        self.assertEqual(set(data), {'a', 'b'})
+        self.assertEqual((data['a']['count'], data['b']['count']), (2, 6))
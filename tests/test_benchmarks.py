@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from app.routes import validate_xml
+from benchmarks.generate import generate_document
+from benchmarks.harness import run_benchmark
+from benchmarks.streams import run_streams
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generate_document(self):
+        """
+        Test case to check that generated documents have the requested shape and are reproducible.
+
+        Steps:
+        1. Generate a document with duplicates and malformed records.
+        2. Assert that it holds the reported number of records and answers.
+        3. Assert that validate_xml reports one error per malformed record.
+        4. Assert that the same seed generates the same document.
+
+        Returns:
+            None
+        """
+        # Step 1: Generate a document with duplicates and malformed records
+        document, counts = generate_document(students=200, tests=2, answers=5, duplicate_rate=0.2,
+                                             malformed_rate=0.1, seed=1)
+
+        # Step 2: Assert the number of records and answers
+        self.assertEqual(document.count(b'<mcq-test-result '), counts['records'])
+        self.assertEqual(document.count(b'<answer '), counts['records'] * 5)
+        self.assertEqual(counts['records'], 400 + counts['duplicates'])
+        self.assertGreater(counts['duplicates'], 0)
+
+        # Step 3: Assert that every malformed record is reported
+        is_valid, errors = validate_xml(document)
+        self.assertFalse(is_valid)
+        self.assertEqual(len(errors), counts['malformed'])
+
+        # Step 4: Assert that generation is reproducible
+        self.assertEqual(generate_document(students=200, tests=2, answers=5, duplicate_rate=0.2,
+                                           malformed_rate=0.1, seed=1)[0], document)
+
+    def test_streams_under_gunicorn(self):
+        """
+        Test case to check that a gunicorn worker serves as many streams as it has spare threads.
+
+        Steps:
+        1. Open 50 streams on a gunicorn worker sized for them.
+        2. Assert that all of them received the aggregate and one more stream was rejected.
+        3. Assert that aggregate requests were served and the import reached every subscriber.
+
+        Returns:
+            None
+        """
+        # Step 1: Open the streams
+        results = run_streams(subscribers=50, reads=5, interval=0.1)
+
+        # Step 2: Assert that every stream was served and the limit enforced
+        self.assertEqual(results['streaming'], 50)
+        self.assertEqual(results['extra_stream_status'], 503)
+
+        # Step 3: Assert that reads and updates went through
+        self.assertEqual(results['aggregate_while_streaming']['requests'], 5)
+        self.assertEqual(results['delivered'], 50)
+
+    def test_rejected_imports(self):
+        """
+        Test case to check that rejected imports do not count towards throughput.
+
+        Steps:
+        1. Benchmark documents with malformed records, which are rejected as a whole.
+        2. Assert that no records or rows are counted and the rejections are reported.
+        3. Assert that the aggregate phases were skipped.
+
+        Returns:
+            None
+        """
+        # Step 1: Benchmark rejected documents
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_benchmark(f"sqlite:///{os.path.join(directory, 'bench.db')}", students=50, tests=2,
+                                    answers=2, malformed_rate=0.1, imports=2, aggregate_requests=5)
+
+        # Step 2: Assert that nothing was counted
+        self.assertEqual(results['import']['generated_records'], 200)
+        self.assertEqual((results['import']['records'], results['import']['rows_written']), (0, 0))
+        self.assertEqual(results['import']['rows_per_sec'], 0)
+        self.assertEqual(results['import']['status_codes'], {'400': 2})
+
+        # Step 3: Assert that the aggregate phases were skipped
+        self.assertNotIn('aggregate_cold', results)
+
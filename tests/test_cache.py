@@ -0,0 +1,162 @@
+import unittest
+from app import create_app, db
+from app.cache import AggregateCache
+
+XML = """<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+        <student-number>{student_number}</student-number>
+        <test-id>{test_id}</test-id>
+        <summary-marks available="20" obtained="17" />
+    </mcq-test-result>
+</mcq-test-results>"""
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and initialize the database.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def import_result(self, student_number, test_id):
+        response = self.client.post('/import', data=XML.format(student_number=student_number, test_id=test_id),
+                                    content_type='text/xml+markr')
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_and_invalidation(self):
+        """
+        Test case to check conditional requests and that only the imported test is invalidated.
+
+        Steps:
+        1. Import results for two tests and fetch both aggregates.
+        2. Assert that a repeated request with the ETag returns 304 from the cache.
+        3. Import another result for the first test.
+        4. Assert that the first test has a new ETag while the second is still cached.
+
+        Returns:
+            None
+        """
+        # Step 1: Import results for two tests and fetch both aggregates
+        self.import_result('1', 'a')
+        self.import_result('1', 'b')
+        etag_a = self.client.get('/results/a/aggregate').headers['ETag']
+        etag_b = self.client.get('/results/b/aggregate').headers['ETag']
+
+        # Step 2: Assert that a conditional request returns 304
+        response = self.client.get('/results/a/aggregate', headers={'If-None-Match': etag_a})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag_a)
+
+        # Step 3: Import another result for the first test
+        self.import_result('2', 'a')
+
+        # Step 4: Assert that only the first test was invalidated
+        response = self.client.get('/results/a/aggregate', headers={'If-None-Match': etag_a})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], 2)
+        self.assertNotEqual(response.headers['ETag'], etag_a)
+        self.assertEqual(self.client.get('/results/b/aggregate', headers={'If-None-Match': etag_b}).status_code, 304)
+
+        stats = self.client.get('/cache/stats').get_json()
+        self.assertEqual((stats['hits'], stats['misses'], stats['invalidations']), (2, 3, 1))
+
+    def test_lru_and_ttl(self):
+        """
+        Test case to check that the least recently used entry is evicted and expired entries are not served.
+
+        Returns:
+            None
+        """
+        cache = AggregateCache(max_entries=2, ttl=60)
+        cache.put('a', 'a-1', b'{}')
+        cache.put('b', 'b-1', b'{}')
+        cache.get('a')
+        cache.put('c', 'c-1', b'{}')
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        expired = AggregateCache(ttl=0)
+        expired.put('a', 'a-1', b'{}')
+        self.assertIsNone(expired.get('a'))
+
+    def test_stale_put_dropped(self):
+        """
+        Test case to check that a response read before an import is not cached after it.
+
+        Steps:
+        1. Import a result, then take the generation as a request about to read the aggregate would.
+        2. Import a second result for the same test and put the response read before it.
+        3. Assert that the stale response was not cached and the aggregate counts both results.
+        4. Assert that a put for a test that was not invalidated is cached.
+
+        Returns:
+            None
+        """
+        # Step 1: Import a result and take the generation
+        self.import_result('1', 'a')
+        cache = self.app.extensions['markr_aggregate_cache']
+        generation = cache.generation()
+
+        # Step 2: Import a second result and put the stale response
+        self.import_result('2', 'a')
+        cache.put('a', 'a-1', b'{"count": 1}', generation)
+
+        # Step 3: Assert that the stale response was not cached
+        response = self.client.get('/results/a/aggregate')
+        self.assertEqual(response.get_json()['count'], 2)
+
+        # Step 4: Assert that other tests are still cached
+        cache.put('b', 'b-1', b'{}', generation)
+        self.assertIsNotNone(cache.get('b'))
+
+    def test_invalidation_generations(self):
+        """
+        Test case to check that puts are dropped once the generations they depend on are forgotten.
+
+        Steps:
+        1. Invalidate more tests than the cache remembers.
+        2. Assert that a put taken before the forgotten invalidation is dropped, and a later one is cached.
+        3. Clear the cache and assert that a put taken before is dropped.
+
+        Returns:
+            None
+        """
+        # Step 1: Invalidate more tests than the cache remembers
+        cache = AggregateCache(max_entries=2, ttl=60)
+        generation = cache.generation()
+        cache.invalidate(['a'])
+        cache.invalidate(['b', 'c'])
+
+        # Step 2: Assert that a put from before the forgotten invalidation is dropped
+        cache.put('d', 'd-1', b'{}', generation)
+        self.assertIsNone(cache.get('d'))
+        cache.put('d', 'd-1', b'{}', cache.generation())
+        self.assertIsNotNone(cache.get('d'))
+
+        # Step 3: Clear the cache and assert that an earlier put is dropped
+        generation = cache.generation()
+        cache.clear()
+        cache.put('d', 'd-1', b'{}', generation)
+        self.assertIsNone(cache.get('d'))
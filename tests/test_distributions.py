@@ -0,0 +1,102 @@
+from collections import Counter
+from datetime import datetime
+import unittest
+from app import create_app, db
+from app.models import TestResults
+
+
+class TestDistributions(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and import the sample results.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+        with open('sample_results.xml', 'rb') as f:
+            self.client.post('/import', data=f.read(), content_type='text/xml+markr')
+        with self.app.app_context():
+            self.results = [(result.obtained_marks, result.available_marks, result.scanned_on)
+                            for result in TestResults.query.filter_by(test_id='9863')]
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_histogram(self):
+        """
+        Test case to check the histogram of a test against counts calculated in Python.
+
+        Steps:
+        1. Request the histogram of test 9863 with the default and a custom number of bins.
+        2. Assert that every bin holds the results whose percentage falls in it.
+        3. Assert that a repeated request with the ETag is answered with 304.
+        4. Assert that invalid bins and unknown tests are rejected.
+
+        Returns:
+            None
+        """
+        for bins in (10, 7):
+            # Step 1: Request the histogram
+            response = self.client.get('/results/9863/histogram' + ('' if bins == 10 else f'?bins={bins}'))
+            self.assertEqual(response.status_code, 200)
+            histogram = response.get_json()['bins']
+
+            # Step 2: Assert the counts of each bin, with full scores in the last bin
+            expected = Counter(min(marks * bins // available, bins - 1) for marks, available, _ in self.results)
+            self.assertEqual([b['count'] for b in histogram], [expected[i] for i in range(bins)])
+            self.assertEqual((histogram[0]['lower'], histogram[-1]['upper']), (0, 100))
+
+        # Step 3: Assert that the ETag is honoured
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get('/results/9863/histogram?bins=7',
+                                         headers={'If-None-Match': etag}).status_code, 304)
+
+        # Step 4: Assert that invalid requests are rejected
+        self.assertEqual(self.client.get('/results/9863/histogram?bins=0').status_code, 400)
+        self.assertEqual(self.client.get('/results/unknown/histogram').status_code, 404)
+
+    def test_timeline(self):
+        """
+        Test case to check the timeline of a test against periods calculated in Python.
+
+        Steps:
+        1. Request the timeline of test 9863 by day and by hour.
+        2. Assert that each period holds the count, mean, min and max of its results.
+        3. Assert that unknown intervals and tests are rejected.
+
+        Returns:
+            None
+        """
+        for interval, truncate in [('day', {'hour': 0, 'minute': 0, 'second': 0}),
+                                   ('hour', {'minute': 0, 'second': 0})]:
+            # Step 1: Request the timeline
+            response = self.client.get(f'/results/9863/timeline?interval={interval}')
+            self.assertEqual(response.status_code, 200)
+            periods = response.get_json()['periods']
+
+            # Step 2: Assert the statistics of each period
+            groups = {}
+            for marks, _, scanned_on in self.results:
+                groups.setdefault(scanned_on.replace(microsecond=0, **truncate), []).append(marks)
+            self.assertEqual([datetime.fromisoformat(period['start']) for period in periods], sorted(groups))
+            for period in periods:
+                marks = groups[datetime.fromisoformat(period['start'])]
+                self.assertEqual((period['count'], period['min'], period['max']), (len(marks), min(marks), max(marks)))
+                self.assertAlmostEqual(period['mean'], sum(marks) / len(marks))
+
+        # Step 3: Assert that invalid requests are rejected
+        self.assertEqual(self.client.get('/results/9863/timeline?interval=week').status_code, 400)
+        self.assertEqual(self.client.get('/results/unknown/timeline').status_code, 404)
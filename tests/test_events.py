@@ -0,0 +1,123 @@
+import json
+import unittest
+from app import create_app, db
+from app.models import TestAggregate
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+        <student-number>{student}</student-number>
+        <test-id>9863</test-id>
+        <summary-marks available="20" obtained="{obtained}" />
+    </mcq-test-result>
+</mcq-test-results>"""
+
+
+class TestEvents(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application with a short stream interval and import a first result.
+
+        Returns:
+            None
+        """
+        self.app = create_app({'STREAM_INTERVAL': 0.2, 'STREAM_KEEPALIVE': 0.05})
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+        self.post('1', 10)
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def post(self, student, obtained):
+        response = self.client.post('/import', data=DOCUMENT.format(student=student, obtained=obtained),
+                                    content_type='text/xml+markr')
+        self.assertEqual(response.status_code, 200)
+
+    def next_event(self, body):
+        # Skip keepalive comments until the next event, returning its ID and data
+        for chunk in body:
+            if not chunk.startswith(b':'):
+                fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+                self.assertEqual(fields['event'], 'aggregate')
+                return fields['id'], json.loads(fields['data'])
+
+    def test_stream(self):
+        """
+        Test case to check that a stream sends the current aggregate, then one event per coalesced batch of imports.
+
+        Steps:
+        1. Open a stream and assert that the current aggregate is sent first.
+        2. Import several results in a burst and assert that the stream catches up with all of them.
+        3. Assert that the burst was coalesced into fewer events than imports.
+        4. Close the stream and assert that the subscription ends.
+
+        Returns:
+            None
+        """
+        events = self.app.extensions['markr_aggregate_events']
+
+        # Step 1: Open a stream
+        response = self.client.get('/results/9863/stream', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        body = iter(response.response)
+        version, aggregate = self.next_event(body)
+        self.assertEqual(aggregate['count'], 1)
+        self.assertEqual(events.subscribers, 1)
+
+        # Step 2: Import a burst of results and follow the stream until it has seen them all
+        for student in range(2, 7):
+            self.post(str(student), 10 + student)
+        received = 0
+        while aggregate['count'] < 6:
+            version, aggregate = self.next_event(body)
+            received += 1
+        self.assertEqual(aggregate['max'], 16)
+
+        # Step 3: Assert that the imports were coalesced
+        self.assertLess(received, 5)
+
+        # Step 4: Close the stream
+        response.close()
+        self.assertEqual(events.subscribers, 0)
+        self.assertIn('markr_stream_updates', self.client.get('/metrics').get_data(as_text=True))
+
+    def test_stream_limits(self):
+        """
+        Test case to check reconnection, unknown tests and the subscriber limit.
+
+        Steps:
+        1. Reconnect with the current version as Last-Event-ID and assert that only a keepalive is sent.
+        2. Assert that unknown tests are rejected with 404.
+        3. Assert that streams beyond STREAM_MAX_SUBSCRIBERS are rejected with 503.
+
+        Returns:
+            None
+        """
+        # Step 1: Reconnect with the current version
+        with self.app.app_context():
+            version = str(db.session.get(TestAggregate, '9863').version)
+        response = self.client.get('/results/9863/stream', headers={'Last-Event-ID': version}, buffered=False)
+        self.assertEqual(next(iter(response.response)), b': keepalive\n\n')
+        response.close()
+
+        # Step 2: Assert that unknown tests are rejected
+        self.assertEqual(self.client.get('/results/unknown/stream').status_code, 404)
+
+        # Step 3: Assert the subscriber limit
+        self.app.extensions['markr_aggregate_events'].max_subscribers = 0
+        response = self.client.get('/results/9863/stream')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
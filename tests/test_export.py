@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+import unittest
+from app import create_app, db
+from app.models import TestResults
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and import the sample results.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.app.config['EXPORT_BATCH_SIZE'] = 7
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+        with open('sample_results.xml', 'rb') as f:
+            self.client.post('/import', data=f.read(), content_type='text/xml+markr')
+        with self.app.app_context():
+            self.expected = [(result.student_number, result.obtained_marks) for result in
+                             TestResults.query.filter_by(test_id='9863').order_by(TestResults.student_number)]
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_export_formats(self):
+        """
+        Test case to check that every result of a test is exported as CSV and NDJSON.
+
+        Steps:
+        1. Export test 9863 as CSV and as NDJSON, in batches smaller than the test.
+        2. Assert that both hold every result in student_number order.
+        3. Assert that unknown tests and formats are rejected.
+
+        Returns:
+            None
+        """
+        # Step 1: Export the test in both formats
+        response = self.client.get('/results/9863/export')
+        self.assertEqual(response.mimetype, 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        response = self.client.get('/results/9863/export?format=ndjson')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        objects = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        # Step 2: Assert that every result was exported in order
+        self.assertEqual([(row['student_number'], int(row['obtained_marks'])) for row in rows], self.expected)
+        self.assertEqual([(row['student_number'], row['obtained_marks']) for row in objects], self.expected)
+        self.assertEqual(objects[0]['scanned_on'], rows[0]['scanned_on'])
+        self.assertEqual(objects[0]['test_id'], '9863')
+
+        # Step 3: Assert that unknown tests and formats are rejected
+        self.assertEqual(self.client.get('/results/unknown/export').status_code, 404)
+        self.assertEqual(self.client.get('/results/9863/export?format=xml').status_code, 400)
+        self.assertEqual(self.client.get('/results/9863/export?limit=0').status_code, 400)
+
+    def test_keyset_pagination(self):
+        """
+        Test case to check that following the next links pages through every result once.
+
+        Steps:
+        1. Request the first page of 10 rows.
+        2. Follow the Link header until the last page.
+        3. Assert that the pages hold every result once, with the CSV header only on the first.
+
+        Returns:
+            None
+        """
+        # Step 1: Request the first page
+        url = '/results/9863/export?limit=10'
+        body = ''
+        pages = 0
+
+        # Step 2: Follow the next links
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            body += response.get_data(as_text=True)
+            pages += 1
+            link = response.headers.get('Link')
+            url = link[1:link.index('>')] if link else None
+
+        # Step 3: Assert that every result was exported once
+        self.assertEqual(pages, (len(self.expected) + 9) // 10)
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([(row['student_number'], int(row['obtained_marks'])) for row in rows], self.expected)
@@ -0,0 +1,108 @@
+import unittest
+import numpy as np
+from app import create_app, db
+from app.items import item_analysis, ANSWER_DTYPE
+
+
+def pack(rows):
+    answers = np.zeros(len(rows), dtype=ANSWER_DTYPE)
+    answers['question'], answers['available'], answers['awarded'], answers['choice'] = zip(*rows)
+    return answers.tobytes()
+
+
+class TestItems(unittest.TestCase):
+
+    def test_item_analysis(self):
+        """
+        Test case to check item_analysis against a direct calculation for each question.
+
+        Steps:
+        1. Pack the answers of four students to three questions, with one question left unanswered.
+        2. Call item_analysis with the packed answers.
+        3. Assert that difficulty, discrimination and distribution match a per-question calculation.
+
+        Returns:
+            None
+        """
+        # Step 1: Pack the answers, student 3 has no answer to question 2
+        scores = np.array([[1, 2, 0], [0, 2, 1], [1, 0, 1], [1, 1, 0]])
+        blobs = [pack([(0, 1, s[0], b'A'), (1, 2, s[1], b'B'), (2, 1, s[2], b'C')]) for s in scores[:3]]
+        blobs.append(pack([(0, 1, 1, b'D'), (1, 2, 1, b'B')]))
+
+        # Step 2: Call item_analysis
+        items = item_analysis(blobs)
+
+        # Step 3: Assert that the statistics match
+        self.assertEqual([item['question'] for item in items], [0, 1, 2])
+        self.assertEqual([item['answered'] for item in items], [4, 4, 3])
+        self.assertEqual([item['marks_available'] for item in items], [1, 2, 1])
+        self.assertEqual(items[0]['distribution'], {'A': 3, 'D': 1})
+        self.assertAlmostEqual(items[1]['difficulty'], 5 / 8)
+        self.assertAlmostEqual(items[2]['difficulty'], 2 / 3)
+        for question in range(3):
+            rest = scores.sum(axis=1) - scores[:, question]
+            expected = np.corrcoef(scores[:, question], rest)[0, 1]
+            self.assertAlmostEqual(items[question]['discrimination'], expected)
+
+    def test_sparse_and_repeated_questions(self):
+        """
+        Test case to check item_analysis with large question numbers, repeated answers and negative marks.
+
+        Steps:
+        1. Pack answers numbered 5 and 60000, with a student answering question 5 twice and a negative mark.
+        2. Call item_analysis with the packed answers.
+        3. Assert that each question is reported once, with the last answer of each student counted.
+
+        Returns:
+            None
+        """
+        # Step 1: Pack the answers, student 0 changed their answer to question 5
+        blobs = [pack([(5, 1, 0, b'A'), (60000, 2, -1, b'C'), (5, 1, 1, b'B')]),
+                 pack([(5, 1, 1, b'B'), (60000, 2, 2, b'D')])]
+
+        # Step 2: Call item_analysis
+        items = item_analysis(blobs)
+
+        # Step 3: Assert the statistics
+        self.assertEqual([item['question'] for item in items], [5, 60000])
+        self.assertEqual([item['answered'] for item in items], [2, 2])
+        self.assertEqual(items[0]['distribution'], {'B': 2})
+        self.assertAlmostEqual(items[0]['difficulty'], 1.0)
+        self.assertAlmostEqual(items[1]['difficulty'], 1 / 4)
+
+    def test_items_endpoint(self):
+        """
+        Test case to check that imported answers are stored and analysed by the items endpoint.
+
+        Steps:
+        1. Import the sample results.
+        2. Request the item analysis of test 9863.
+        3. Assert that every question of every stored student was analysed.
+
+        Returns:
+            None
+        """
+        app = create_app()
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+        try:
+            # Step 1: Import the sample results
+            with open('sample_results.xml', 'rb') as f:
+                response = client.post('/import', data=f.read(), content_type='text/xml+markr')
+            self.assertEqual(response.status_code, 200)
+
+            # Step 2: Request the item analysis
+            data = client.get('/results/9863/items').get_json()
+
+            # Step 3: Assert that every question was analysed
+            count = client.get('/results/9863/aggregate').get_json()['count']
+            self.assertEqual(data['students'], count)
+            self.assertEqual(len(data['items']), 20)
+            for item in data['items']:
+                self.assertEqual(sum(item['distribution'].values()), count)
+            self.assertEqual(client.get('/results/unknown/items').status_code, 404)
+        finally:
+            with app.app_context():
+                db.session.remove()
+                db.drop_all()
@@ -0,0 +1,142 @@
+from datetime import timedelta
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.jobs import process_next_job, utcnow
+from app.models import ImportJob, TestResults
+
+VALID_XML = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+        <student-number>2394</student-number>
+        <test-id>9863</test-id>
+        <summary-marks available="20" obtained="17" />
+    </mcq-test-result>
+</mcq-test-results>"""
+
+INVALID_XML = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+    </mcq-test-result>
+</mcq-test-results>"""
+
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application with asynchronous imports enabled.
+
+        Jobs are run explicitly with process_next_job rather than by worker threads.
+
+        Returns:
+            None
+        """
+        self.spool = tempfile.TemporaryDirectory()
+        self.app = create_app()
+        self.app.config.update(IMPORT_ASYNC=True, IMPORT_SPOOL_DIR=self.spool.name)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database and spool directory after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        self.spool.cleanup()
+
+    def submit(self, data):
+        response = self.client.post('/import', data=data, content_type='text/xml+markr')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers['Location'], f"/imports/{response.get_json()['job_id']}")
+        return response.get_json()['job_id']
+
+    def test_job_lifecycle(self):
+        """
+        Test case to check that a queued import is reported, run and cleaned up.
+
+        Steps:
+        1. Submit a valid document and assert that it is queued and spooled.
+        2. Run the next job.
+        3. Assert that the job succeeded, the record was imported and the payload removed.
+
+        Returns:
+            None
+        """
+        # Step 1: Submit a valid document
+        job_id = self.submit(VALID_XML)
+        self.assertEqual(self.client.get(f'/imports/{job_id}').get_json()['status'], 'queued')
+        self.assertEqual(len(os.listdir(self.spool.name)), 1)
+
+        # Step 2: Run the next job
+        with self.app.app_context():
+            self.assertEqual(process_next_job().id, job_id)
+            self.assertIsNone(process_next_job())
+
+        # Step 3: Assert that the job succeeded
+        status = self.client.get(f'/imports/{job_id}').get_json()
+        self.assertEqual((status['status'], status['records']), ('succeeded', 1))
+        with self.app.app_context():
+            self.assertEqual(TestResults.query.count(), 1)
+        self.assertEqual(os.listdir(self.spool.name), [])
+
+    def test_invalid_job(self):
+        """
+        Test case to check that the validation errors of a rejected job are reported.
+
+        Returns:
+            None
+        """
+        job_id = self.submit(INVALID_XML)
+        with self.app.app_context():
+            process_next_job()
+
+        status = self.client.get(f'/imports/{job_id}').get_json()
+        self.assertEqual(status['status'], 'invalid')
+        self.assertEqual(status['incomplete_records'], [{'error': 'Missing fields: student-number, test-id', 'line': 3, 'student_number': None}])
+
+    def test_abandoned_job_is_reclaimed(self):
+        """
+        Test case to check that a job left running by a dead worker is picked up again.
+
+        Steps:
+        1. Submit a document and mark its job as running since before the job timeout.
+        2. Run the next job.
+        3. Assert that the abandoned job was run.
+
+        Returns:
+            None
+        """
+        # Step 1: Submit a document and mark it as abandoned
+        job_id = self.submit(VALID_XML)
+        with self.app.app_context():
+            job = db.session.get(ImportJob, job_id)
+            job.status = 'running'
+            job.started_at = utcnow() - timedelta(seconds=self.app.config['IMPORT_JOB_TIMEOUT'] + 1)
+            db.session.commit()
+
+            # Step 2: Run the next job
+            process_next_job()
+
+            # Step 3: Assert that the job was run
+            self.assertEqual(db.session.get(ImportJob, job_id).status, 'succeeded')
+
+    def test_unknown_job(self):
+        """
+        Test case to check that an unknown job ID returns 404.
+
+        Returns:
+            None
+        """
+        self.assertEqual(self.client.get('/imports/unknown').status_code, 404)
@@ -0,0 +1,227 @@
+from datetime import timedelta
+import tempfile
+import unittest
+from app import create_app, db
+from app.jobs import process_next_job, utcnow
+from app.models import ImportedPayload, ImportJob, TestAggregate, TestResults
+from app.upsert import ResultUpserter
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+        <student-number>2394</student-number>
+        <test-id>9863</test-id>
+        <summary-marks available="20" obtained="{obtained}" />
+    </mcq-test-result>
+</mcq-test-results>"""
+
+
+def document(obtained=17):
+    return DOCUMENT.format(obtained=obtained).encode()
+
+
+def record(student_number, obtained_marks):
+    return {'student_number': student_number, 'test_id': '9863', 'first_name': 'Bob', 'last_name': 'Bob',
+            'scanned_on': None, 'available_marks': 20, 'obtained_marks': obtained_marks, 'answers': None}
+
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and initialize the database.
+
+        Returns:
+            None
+        """
+        self.spool = tempfile.TemporaryDirectory()
+        self.app = create_app()
+        self.app.config.update(IMPORT_SPOOL_DIR=self.spool.name)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database and spool directory after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        self.spool.cleanup()
+
+    def post(self, data):
+        return self.client.post('/import', data=data, content_type='text/xml+markr')
+
+    def stored_marks(self):
+        with self.app.app_context():
+            return db.session.get(TestResults, ('2394', '9863')).obtained_marks
+
+    def test_resent_payload_is_not_imported(self):
+        """
+        Test case to check that an exact re-send is answered from the ledger without being imported.
+
+        Steps:
+        1. Import a document and change the stored result behind the importer's back.
+        2. Re-send the same document and assert that it is acknowledged but not imported.
+        3. Send a different document and assert that it is imported.
+
+        Returns:
+            None
+        """
+        # Step 1: Import a document and change the stored result
+        self.assertEqual(self.post(document()).status_code, 200)
+        with self.app.app_context():
+            db.session.get(TestResults, ('2394', '9863')).obtained_marks = 5
+            db.session.commit()
+
+        # Step 2: Re-send the document
+        response = self.post(document())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'Results already imported')
+        self.assertEqual(self.stored_marks(), 5)
+
+        # Step 3: Send a different document
+        self.assertEqual(self.post(document(obtained=18)).get_data(as_text=True), 'Results imported successfully')
+        self.assertEqual(self.stored_marks(), 18)
+        with self.app.app_context():
+            self.assertEqual([entry.records for entry in ImportedPayload.query.all()], [1, 1])
+
+    def test_invalid_payload_is_not_recorded(self):
+        """
+        Test case to check that rejected payloads are not added to the ledger, so they can be fixed and re-sent.
+
+        Returns:
+            None
+        """
+        invalid = document().replace(b'<test-id>9863</test-id>', b'')
+        self.assertEqual(self.post(invalid).status_code, 400)
+        self.assertEqual(self.post(invalid).status_code, 400)
+        with self.app.app_context():
+            self.assertEqual(ImportedPayload.query.count(), 0)
+
+    def test_retention(self):
+        """
+        Test case to check that ledger entries older than the retention are pruned.
+
+        Steps:
+        1. Import a document and age its ledger entry beyond the retention.
+        2. Import another document and assert that only its entry is left.
+        3. Re-send the first document and assert that it is imported again.
+
+        Returns:
+            None
+        """
+        # Step 1: Import a document and age its ledger entry
+        self.post(document())
+        with self.app.app_context():
+            entry = ImportedPayload.query.one()
+            entry.imported_at = utcnow() - timedelta(seconds=self.app.config['IMPORT_LEDGER_RETENTION'] + 60)
+            db.session.commit()
+
+        # Step 2: Import another document
+        self.post(document(obtained=18))
+        with self.app.app_context():
+            self.assertEqual(ImportedPayload.query.count(), 1)
+
+        # Step 3: Re-send the first document
+        self.assertEqual(self.post(document()).get_data(as_text=True), 'Results imported successfully')
+        self.assertEqual(self.stored_marks(), 17)
+
+    def test_expired_entry_before_pruning(self):
+        """
+        Test case to check that an expired ledger entry is ignored before any later import prunes it.
+
+        Steps:
+        1. Import a document and age its ledger entry beyond the retention.
+        2. Re-send the same document with no import in between.
+        3. Assert that it is imported again and its entry is renewed.
+
+        Returns:
+            None
+        """
+        # Step 1: Import a document and age its ledger entry
+        self.post(document())
+        expired = utcnow() - timedelta(seconds=self.app.config['IMPORT_LEDGER_RETENTION'] + 60)
+        with self.app.app_context():
+            ImportedPayload.query.one().imported_at = expired
+            db.session.commit()
+
+        # Step 2: Re-send the document
+        response = self.post(document())
+
+        # Step 3: Assert that it was imported and its entry renewed
+        self.assertEqual(response.get_data(as_text=True), 'Results imported successfully')
+        with self.app.app_context():
+            self.assertGreater(ImportedPayload.query.one().imported_at, expired)
+
+    def test_queued_resend(self):
+        """
+        Test case to check re-sends of asynchronous imports.
+
+        Steps:
+        1. Queue the same document twice before either is run.
+        2. Run both jobs and assert that both succeed and the ledger holds one entry.
+        3. Re-send the document and assert that it is acknowledged without being queued.
+
+        Returns:
+            None
+        """
+        self.app.config.update(IMPORT_ASYNC=True)
+
+        # Step 1: Queue the document twice
+        job_ids = [self.post(document()).get_json()['job_id'] for _ in range(2)]
+
+        # Step 2: Run both jobs
+        with self.app.app_context():
+            process_next_job()
+            process_next_job()
+            jobs = [db.session.get(ImportJob, job_id) for job_id in job_ids]
+            self.assertEqual([(job.status, job.records) for job in jobs], [('succeeded', 1), ('succeeded', 1)])
+            self.assertEqual(ImportedPayload.query.count(), 1)
+
+        # Step 3: Re-send the document
+        response = self.post(document())
+        self.assertEqual((response.status_code, response.data), (200, b'Results already imported'))
+        with self.app.app_context():
+            self.assertEqual(ImportJob.query.count(), 2)
+
+    def test_unchanged_records_are_skipped(self):
+        """
+        Test case to check that with record hashes only the records that changed are rewritten.
+
+        Steps:
+        1. Write two records with hashes.
+        2. Write an overlapping batch with one unchanged, one changed and one new record.
+        3. Assert that only the unchanged record was skipped and the aggregate is correct.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            # Step 1: Write two records with hashes
+            upserter = ResultUpserter(db.session, hash_records=True)
+            for values in [('1', 10), ('2', 12)]:
+                upserter.add(record(*values))
+            upserter.flush()
+            db.session.commit()
+
+            # Step 2: Write an overlapping batch
+            upserter = ResultUpserter(db.session, hash_records=True)
+            for values in [('1', 10), ('2', 14), ('3', 16)]:
+                upserter.add(record(*values))
+            upserter.flush()
+            db.session.commit()
+
+            # Step 3: Assert that only the unchanged record was skipped
+            self.assertEqual(upserter.unchanged, 1)
+            self.assertEqual(upserter.test_ids, {'9863'})
+            aggregate = db.session.get(TestAggregate, '9863')
+            self.assertEqual((aggregate.count, aggregate.sum_marks), (3, 40))
+            self.assertEqual([result.obtained_marks for result in TestResults.query.order_by('student_number')],
+                             [10, 14, 16])
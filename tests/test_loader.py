@@ -0,0 +1,170 @@
+from io import BytesIO
+import json
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.aggregates import grouped_aggregates, summarize
+from app.loader import merge_staged, staging_table
+from app.models import TestAggregate, TestResults
+from app.parser import iter_results
+from benchmarks.generate import generate_document
+
+
+def write_file(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+class TestLoader(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application, a CLI runner and a directory of XML files.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.runner = self.app.test_cli_runner()
+        self.directory = tempfile.TemporaryDirectory()
+        self.state = os.path.join(self.directory.name, 'state.json')
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database and the XML files after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        self.directory.cleanup()
+
+    def load(self, *args):
+        return self.runner.invoke(args=['markr', 'load', '--jobs', '2', '--chunk-files', '1',
+                                        '--state', self.state, *args])
+
+    def test_load_files(self):
+        """
+        Test case to check that a bulk load merges duplicates across files and skips invalid files.
+
+        Steps:
+        1. Write two documents rescanning the same students and one malformed document.
+        2. Load them with a glob pattern, one file per chunk.
+        3. Assert that the later scans are stored, the aggregates match and the invalid file is reported.
+
+        Returns:
+            None
+        """
+        # Step 1: Write the documents
+        first, _ = generate_document(students=20, tests=2, seed=1)
+        second, _ = generate_document(students=20, tests=2, seed=2)
+        write_file(self.directory.name, 'a.xml', first)
+        write_file(self.directory.name, 'b.xml', second)
+        write_file(self.directory.name, 'c.xml', b'<mcq-test-results><mcq-test-result></mcq-test-result>')
+
+        # Step 2: Load them
+        result = self.load(os.path.join(self.directory.name, '*.xml'))
+
+        # Step 3: Assert that the later scans are stored
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('Loaded 80 records (80 rows written) from 2 file(s)', result.output)
+        self.assertIn('Skipped invalid file', result.output)
+        reference = create_app()
+        with reference.app_context():
+            db.create_all()
+        try:
+            reference.test_client().post('/import', data=second, content_type='text/xml+markr')
+            with self.app.app_context():
+                self.assertEqual(TestResults.query.count(), 40)
+            for test_id in ['test-0', 'test-1']:
+                self.assertEqual(self.app.test_client().get(f'/results/{test_id}/aggregate').get_json(),
+                                 reference.test_client().get(f'/results/{test_id}/aggregate').get_json())
+        finally:
+            with reference.app_context():
+                db.session.remove()
+                db.drop_all()
+
+    def test_resume(self):
+        """
+        Test case to check that a load skips the files recorded in its state file unless restarted.
+
+        Steps:
+        1. Load one document.
+        2. Load it again along with a second document.
+        3. Assert that only the second document was loaded, and that --restart loads both.
+
+        Returns:
+            None
+        """
+        # Step 1: Load one document
+        first, _ = generate_document(students=10, seed=1)
+        second, _ = generate_document(students=10, tests=2, seed=2)
+        path = write_file(self.directory.name, 'a.xml', first)
+        self.assertEqual(self.load(path).exit_code, 0)
+        with open(self.state) as f:
+            self.assertEqual(list(json.load(f)), [os.path.abspath(path)])
+
+        # Step 2: Load it again with a second document
+        other = write_file(self.directory.name, 'b.xml', second)
+        result = self.load(path, other)
+
+        # Step 3: Assert that only the second document was loaded
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Loaded 20 records (20 rows written) from 1 file(s)', result.output)
+        self.assertIn('1 already loaded', result.output)
+        result = self.load('--restart', path, other)
+        self.assertIn('Loaded 30 records (30 rows written) from 2 file(s)', result.output)
+
+    def test_merge_staged(self):
+        """
+        Test case to check that merging staged records corrects the aggregates by the rows that change.
+
+        Steps:
+        1. Import a document through /import.
+        2. Stage the records of a rescan of the same students, as the COPY path does on PostgreSQL.
+        3. Merge them with the highest-marks rule.
+        4. Assert that the higher scores are stored and the aggregates match the stored results.
+
+        Returns:
+            None
+        """
+        # Step 1: Import a document
+        first, _ = generate_document(students=20, tests=2, seed=1)
+        second, _ = generate_document(students=20, tests=2, seed=2)
+        self.assertEqual(self.app.test_client().post('/import', data=first, content_type='text/xml+markr')
+                         .status_code, 200)
+
+        with self.app.app_context():
+            expected = {(row.student_number, row.test_id): row.obtained_marks for row in TestResults.query}
+            versions = {aggregate.test_id: aggregate.version for aggregate in TestAggregate.query}
+
+            # Step 2: Stage the rescanned records
+            records = list(iter_results(BytesIO(second), []))
+            for record in records:
+                key = (record['student_number'], record['test_id'])
+                expected[key] = max(expected.get(key, record['obtained_marks']), record['obtained_marks'])
+            staging = staging_table()
+            connection = db.session.connection()
+            staging.create(connection)
+            connection.execute(staging.insert(), records)
+
+            # Step 3: Merge them
+            merge_staged(db.session, staging, {record['test_id'] for record in records}, 'highest-marks')
+            db.session.commit()
+
+            # Step 4: Assert that the higher scores are stored and the aggregates match
+            self.assertEqual({(row.student_number, row.test_id): row.obtained_marks for row in TestResults.query},
+                             expected)
+            recalculated = grouped_aggregates(db.session)
+            for aggregate in TestAggregate.query:
+                self.assertEqual(aggregate.version, versions[aggregate.test_id] + 1)
+                summary = summarize(aggregate)
+                for field, value in recalculated[aggregate.test_id].items():
+                    self.assertAlmostEqual(summary[field], value)
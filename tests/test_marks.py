@@ -0,0 +1,135 @@
+from io import BytesIO
+import os
+import tempfile
+import unittest
+import numpy as np
+from app import create_app, db
+from app.marks import MARKS_DTYPE
+from app.models import TestResults
+
+
+class TestMarks(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and import the sample results.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+        with open('sample_results.xml', 'rb') as f:
+            self.client.post('/import', data=f.read(), content_type='text/xml+markr')
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def expected(self, test_id):
+        with self.app.app_context():
+            results = TestResults.query.filter_by(test_id=test_id).order_by(TestResults.student_number)
+            return [(result.obtained_marks, result.available_marks, np.datetime64(result.scanned_on, 'us'))
+                    for result in results]
+
+    def test_marks_array(self):
+        """
+        Test case to check the marks of a test served as a .npy file.
+
+        Steps:
+        1. Request the marks of test 9863.
+        2. Assert that the array holds each result in student_number order.
+        3. Assert that the saved file can be memory-mapped.
+        4. Assert that the ETag is honoured until the test is imported again, and that unknown tests are not found.
+
+        Returns:
+            None
+        """
+        # Step 1: Request the marks
+        response = self.client.get('/results/9863/marks.npy')
+        self.assertEqual(response.status_code, 200)
+
+        # Step 2: Assert the array
+        marks = np.load(BytesIO(response.data))
+        self.assertEqual(marks.dtype, MARKS_DTYPE)
+        self.assertEqual(marks.tolist(), [(obtained, available, scanned_on.item())
+                                          for obtained, available, scanned_on in self.expected('9863')])
+
+        # Step 3: Memory-map the saved file
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, '9863.npy')
+            with open(path, 'wb') as f:
+                f.write(response.data)
+            mapped = np.load(path, mmap_mode='r')
+            self.assertIsInstance(mapped, np.memmap)
+            self.assertEqual(int(mapped['obtained_marks'].sum()), int(marks['obtained_marks'].sum()))
+            del mapped
+
+        # Step 4: Assert the ETag, which changes with a new import
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get('/results/9863/marks.npy', headers={'If-None-Match': etag}).status_code, 304)
+        document = b"""<?xml version="1.0" encoding="UTF-8" ?>
+        <mcq-test-results>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>New</first-name>
+                <last-name>Student</last-name>
+                <student-number>99999</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="20" obtained="3" />
+            </mcq-test-result>
+        </mcq-test-results>"""
+        self.client.post('/import', data=document, content_type='text/xml+markr')
+        response = self.client.get('/results/9863/marks.npy', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(np.load(BytesIO(response.data))), len(marks) + 1)
+        self.assertEqual(self.client.get('/results/unknown/marks.npy').status_code, 404)
+
+    def test_marks_archive(self):
+        """
+        Test case to check the marks of several tests served as a .npz archive.
+
+        Steps:
+        1. Import a second test and request the marks of both and of an unknown test.
+        2. Assert that the archive holds an array per test with results.
+        3. Assert that the ETag is honoured and that invalid or unknown requests are rejected.
+
+        Returns:
+            None
+        """
+        # Step 1: Import a second test and request the archive
+        document = b"""<?xml version="1.0" encoding="UTF-8" ?>
+        <mcq-test-results>
+            <mcq-test-result scanned-on="2017-12-05T01:00:00Z">
+                <first-name>Jo</first-name>
+                <last-name>Student</last-name>
+                <student-number>2301</student-number>
+                <test-id>file</test-id>
+                <summary-marks available="10" obtained="4" />
+            </mcq-test-result>
+        </mcq-test-results>"""
+        self.client.post('/import', data=document, content_type='text/xml+markr')
+        response = self.client.get('/results/marks.npz?test_ids=9863,file,unknown,9863')
+        self.assertEqual(response.status_code, 200)
+
+        # Step 2: Assert the arrays
+        with np.load(BytesIO(response.data)) as archive:
+            self.assertEqual(sorted(archive.files), ['9863', 'file'])
+            self.assertEqual(archive['9863']['obtained_marks'].tolist(), [marks for marks, _, _ in self.expected('9863')])
+            self.assertEqual(archive['file'].tolist(), [(4, 10, np.datetime64('2017-12-05T01:00:00', 'us').item())])
+
+        # Step 3: Assert the ETag and the rejected requests
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get('/results/marks.npz?test_ids=9863,file,unknown',
+                                         headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.client.get('/results/marks.npz').status_code, 400)
+        self.assertEqual(self.client.get('/results/marks.npz?test_ids=' + ','.join(map(str, range(1000)))).status_code, 400)
+        self.assertEqual(self.client.get('/results/marks.npz?test_ids=unknown').status_code, 404)
@@ -0,0 +1,83 @@
+import unittest
+from app import create_app, db
+from app.metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application that logs every request as slow.
+
+        Returns:
+            None
+        """
+        self.app = create_app({'SLOW_REQUEST_SECONDS': 1e-9})
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_import_metrics(self):
+        """
+        Test case to check that an import is timed by phase, counted and logged as slow.
+
+        Steps:
+        1. Import the sample results, capturing the slow request log.
+        2. Assert that the log lists the import phases.
+        3. Assert that /metrics reports the phases, rows, payload bytes and statements.
+
+        Returns:
+            None
+        """
+        # Step 1: Import the sample results
+        with open('sample_results.xml', 'rb') as f:
+            data = f.read()
+        with self.assertLogs('app.metrics', level='WARNING') as logs:
+            self.client.post('/import', data=data, content_type='text/xml+markr')
+
+        # Step 2: Assert that the log lists the import phases
+        self.assertIn('Slow request POST /import -> 200', logs.output[0])
+        for phase in ['parse', 'validate', 'extract', 'lookup', 'aggregates', 'upsert', 'commit']:
+            self.assertIn(f'{phase}=', logs.output[0])
+
+        # Step 3: Assert that /metrics reports the import
+        response = self.client.get('/metrics')
+        self.assertEqual(response.mimetype, 'text/plain')
+        body = response.get_data(as_text=True)
+        self.assertIn('markr_requests_total{endpoint="main.import_results",status="200"} 1', body)
+        self.assertIn('markr_phase_seconds_total{endpoint="main.import_results",phase="upsert"}', body)
+        self.assertIn('markr_import_rows_total 100', body)
+        self.assertIn(f'markr_import_payload_bytes_total {len(data)}', body)
+        self.assertRegex(body, r'markr_sql_statements_total\{endpoint="main.import_results"\} [1-9]')
+        self.assertIn('# TYPE markr_aggregate_cache_invalidations_total counter', body)
+        self.assertIn('# TYPE markr_aggregate_cache_entries gauge', body)
+
+    def test_render(self):
+        """
+        Test case to check the Prometheus text rendering of counters and histograms.
+
+        Returns:
+            None
+        """
+        metrics = Metrics()
+        metrics.inc('markr_requests_total', (('endpoint', 'a"b'), ('status', '200')))
+        metrics.observe('markr_import_rows', 50, (10, 100))
+        body = metrics.render([('markr_test_gauge', 'A gauge.', 3)], [('markr_test_total', 'A counter.', 4)])
+        self.assertIn('markr_requests_total{endpoint="a\\"b",status="200"} 1', body)
+        self.assertIn('markr_import_rows_bucket{le="10"} 0', body)
+        self.assertIn('markr_import_rows_bucket{le="100"} 1', body)
+        self.assertIn('markr_import_rows_bucket{le="+Inf"} 1', body)
+        self.assertIn('markr_import_rows_sum 50', body)
+        self.assertIn('# TYPE markr_test_gauge gauge\nmarkr_test_gauge 3', body)
+        self.assertIn('# TYPE markr_test_total counter\nmarkr_test_total 4', body)
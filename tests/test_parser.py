@@ -0,0 +1,292 @@
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+import unittest
+from app.parser import ANSWER_STRUCT, iter_results
+
+
+class TestParser(unittest.TestCase):
+
+    def test_errors_reported_in_document_order(self):
+        """
+        Test case to check that iter_results reports every invalid record and stops yielding after the first one.
+
+        Steps:
+        1. Create XML content with a valid record followed by two invalid records and another valid one.
+        2. Consume iter_results over the XML content.
+        3. Assert that only the record before the first error was yielded.
+        4. Assert that the errors for both invalid records were collected in order.
+
+        Returns:
+            None
+        """
+        # Step 1: Create XML content with valid and invalid records
+        xml_content = b"""<?xml version="1.0" encoding="UTF-8" ?>
+        <mcq-test-results>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>KJ</first-name>
+                <last-name>Alysander</last-name>
+                <student-number>002299</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="20" obtained="13" />
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Jimmy</first-name>
+                <last-name>Student</last-name>
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Jane</first-name>
+                <last-name>Student</last-name>
+                <student-number>2300</student-number>
+                <test-id>9863</test-id>
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Bob</first-name>
+                <last-name>Student</last-name>
+                <student-number>2301</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="20" obtained="10" />
+            </mcq-test-result>
+        </mcq-test-results>"""
+
+        # Step 2: Consume iter_results
+        errors = []
+        records = list(iter_results(BytesIO(xml_content), errors))
+
+        # Step 3: Assert that only the first record was yielded
+        self.assertEqual([record['student_number'] for record in records], ['002299'])
+        self.assertEqual(records[0]['obtained_marks'], 13)
+
+        # Step 4: Assert that the errors were collected in order
+        self.assertEqual(errors, [{'error': 'Missing fields: student-number, test-id', 'line': 10, 'student_number': None},
+                                  {'error': 'Missing summary-marks element', 'line': 14, 'student_number': '2300'}])
+
+    def test_syntax_error_replaces_report(self):
+        """
+        Test case to check that a syntax error part way through a document replaces any earlier errors.
+
+        Steps:
+        1. Create truncated XML content containing an incomplete record.
+        2. Consume iter_results over the XML content.
+        3. Assert that the only error reported is the syntax error.
+
+        Returns:
+            None
+        """
+        # Step 1: Create truncated XML content
+        xml_content = b"""<?xml version="1.0" encoding="UTF-8" ?>
+        <mcq-test-results>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Jimmy</first-name>
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">"""
+
+        # Step 2: Consume iter_results
+        errors = []
+        list(iter_results(BytesIO(xml_content), errors))
+
+        # Step 3: Assert that only the syntax error is reported
+        self.assertEqual(errors, [{'error': 'Invalid XML syntax', 'line': 6}])
+
+    def test_schema_errors(self):
+        """
+        Test case to check that violations of the schema not covered by the field checks are reported.
+
+        Steps:
+        1. Create XML content with malformed and out of range scanned-on timestamps and non-integer marks.
+        2. Consume iter_results over the XML content.
+        3. Assert that nothing was yielded and each record is reported with the schema's message
+           naming the cause, rather than the key constraint that follows from it.
+
+        Returns:
+            None
+        """
+        # Step 1: Create XML content with schema violations
+        xml_content = b"""<?xml version="1.0" encoding="UTF-8" ?>
+        <mcq-test-results>
+            <mcq-test-result scanned-on="04/12/2017">
+                <first-name>KJ</first-name>
+                <last-name>Alysander</last-name>
+                <student-number>002299</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="20" obtained="13" />
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Jane</first-name>
+                <last-name>Student</last-name>
+                <student-number>2300</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="20" obtained="ten" />
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Jo</first-name>
+                <last-name>Student</last-name>
+                <student-number>2301</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="x" obtained="10" />
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-13-04T12:12:10+1100">
+                <first-name>Al</first-name>
+                <last-name>Student</last-name>
+                <student-number>2302</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="20" obtained="10" />
+            </mcq-test-result>
+        </mcq-test-results>"""
+
+        # Step 2: Consume iter_results
+        errors = []
+        records = list(iter_results(BytesIO(xml_content), errors))
+
+        # Step 3: Assert that every record was rejected
+        self.assertEqual(records, [])
+        self.assertEqual([(error['line'], error['student_number']) for error in errors],
+                         [(3, '002299'), (10, '2300'), (17, '2301'), (24, '2302')])
+        self.assertTrue(all(error['error'].startswith('Invalid record: ') for error in errors))
+        self.assertIn('scanned-on', errors[0]['error'])
+        self.assertIn('obtained', errors[1]['error'])
+        self.assertIn("attribute 'available': 'x' is not a valid value", errors[2]['error'])
+        self.assertIn('month must be in 1..12', errors[3]['error'])
+
+    def test_unknown_children_ignored(self):
+        """
+        Test case to check that unknown child elements of a record are accepted and ignored.
+
+        Steps:
+        1. Create XML content whose record has an unknown element among its fields.
+        2. Consume iter_results over the XML content.
+        3. Assert that the record is valid and its fields are read.
+
+        Returns:
+            None
+        """
+        # Step 1: Create XML content with an unknown element
+        xml_content = b"""<?xml version="1.0" encoding="UTF-8" ?>
+        <mcq-test-results>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>KJ</first-name>
+                <scanner-notes>Smudged<page number="2"/></scanner-notes>
+                <last-name>Alysander</last-name>
+                <student-number>002299</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="20" obtained="13" />
+            </mcq-test-result>
+        </mcq-test-results>"""
+
+        # Step 2: Consume iter_results
+        errors = []
+        records = list(iter_results(BytesIO(xml_content), errors))
+
+        # Step 3: Assert that the record was read
+        self.assertEqual(errors, [])
+        self.assertEqual([(record['student_number'], record['obtained_marks']) for record in records], [('002299', 13)])
+
+    def test_extract_result(self):
+        """
+        Test case to check the values extracted from each record in one pass.
+
+        Steps:
+        1. Create XML content with two records sharing a timestamp, written with and without a colon in
+           the offset, one with answers and a 'Z' offset on the other.
+        2. Consume iter_results over the XML content.
+        3. Assert the timestamps, the packed answers and the marks of each record.
+
+        Returns:
+            None
+        """
+        # Step 1: Create XML content
+        xml_content = b"""<?xml version="1.0" encoding="UTF-8" ?>
+        <mcq-test-results>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>KJ</first-name>
+                <last-name>Alysander</last-name>
+                <student-number>002299</student-number>
+                <test-id>9863</test-id>
+                <answer question="1" marks-available="1" marks-awarded="1">A</answer>
+                <answer marks-available="1" marks-awarded="0"> C </answer>
+                <answer question="3" marks-available="1" marks-awarded="0"/>
+                <summary-marks available="20" obtained="13" />
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+1100">
+                <first-name>Jane</first-name>
+                <last-name>Student</last-name>
+                <student-number>2300</student-number>
+                <test-id>9863</test-id>
+                <summary-marks available="20" obtained="17" />
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-05T01:00:00Z">
+                <first-name>Jo</first-name>
+                <last-name>Student</last-name>
+                <student-number>2301</student-number>
+                <test-id>9864</test-id>
+                <summary-marks available="10" obtained="4" />
+            </mcq-test-result>
+        </mcq-test-results>"""
+
+        # Step 2: Consume iter_results
+        errors = []
+        records = list(iter_results(BytesIO(xml_content), errors))
+        self.assertEqual((errors, len(records)), ([], 3))
+
+        # Step 3: Assert the records
+        self.assertEqual(records[1]['scanned_on'], records[0]['scanned_on'])
+        self.assertEqual(records[0]['scanned_on'], datetime(2017, 12, 4, 12, 12, 10, tzinfo=timezone(timedelta(hours=11))))
+        self.assertEqual(records[2]['scanned_on'], datetime(2017, 12, 5, 1, tzinfo=timezone.utc))
+        self.assertEqual(records[0]['answers'], ANSWER_STRUCT.pack(1, 1, 1, b'A') + ANSWER_STRUCT.pack(1, 1, 0, b'C')
+                         + ANSWER_STRUCT.pack(3, 1, 0, b'\0'))
+        self.assertIsNone(records[1]['answers'])
+        self.assertEqual([record['obtained_marks'] for record in records], [13, 17, 4])
+
+
+    def test_answer_errors(self):
+        """
+        Test case to check that answers which do not fit the packed layout are reported per record.
+
+        Steps:
+        1. Create XML content with a negatively marked answer, a non-integer question and an out of range question.
+        2. Consume iter_results over the XML content.
+        3. Assert that the negative mark is accepted and the other two records are reported with their answer.
+
+        Returns:
+            None
+        """
+        # Step 1: Create XML content with unusual answers
+        xml_content = b"""<?xml version="1.0" encoding="UTF-8" ?>
+        <mcq-test-results>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>KJ</first-name>
+                <last-name>Alysander</last-name>
+                <student-number>002299</student-number>
+                <test-id>9863</test-id>
+                <answer question="1" marks-available="1" marks-awarded="-1">B</answer>
+                <summary-marks available="20" obtained="13" />
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Jane</first-name>
+                <last-name>Student</last-name>
+                <student-number>2300</student-number>
+                <test-id>9863</test-id>
+                <answer question="x" marks-available="1" marks-awarded="1">A</answer>
+                <summary-marks available="20" obtained="17" />
+            </mcq-test-result>
+            <mcq-test-result scanned-on="2017-12-04T12:12:10+11:00">
+                <first-name>Jo</first-name>
+                <last-name>Student</last-name>
+                <student-number>2301</student-number>
+                <test-id>9863</test-id>
+                <answer question="70000" marks-available="1" marks-awarded="1">A</answer>
+                <summary-marks available="20" obtained="4" />
+            </mcq-test-result>
+        </mcq-test-results>"""
+
+        # Step 2: Consume iter_results
+        errors = []
+        records = list(iter_results(BytesIO(xml_content), errors))
+
+        # Step 3: Assert the accepted record and the errors
+        self.assertEqual([record['answers'] for record in records], [ANSWER_STRUCT.pack(1, 1, -1, b'B')])
+        self.assertEqual(errors, [
+            {'error': 'Invalid answer on line 16: question "x" must be an integer from 0 to 65535',
+             'line': 11, 'student_number': '2300'},
+            {'error': 'Invalid answer on line 24: question "70000" must be an integer from 0 to 65535',
+             'line': 19, 'student_number': '2301'},
+        ])
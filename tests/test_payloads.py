@@ -0,0 +1,193 @@
+import gzip
+import tempfile
+import unittest
+from app import create_app, db
+from app.jobs import process_next_job
+from app.models import ImportJob, TestResults
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+        <last-name>Bob</last-name>
+        <student-number>{student}</student-number>
+        <test-id>9863</test-id>
+        <summary-marks available="20" obtained="17" />
+    </mcq-test-result>
+</mcq-test-results>"""
+
+INVALID_XML = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<mcq-test-results>
+    <mcq-test-result scanned-on="2017-12-04T13:47:10+11:00">
+        <first-name>Bob</first-name>
+    </mcq-test-result>
+</mcq-test-results>"""
+
+BOUNDARY = 'markr-boundary'
+
+
+def document(student):
+    return DOCUMENT.format(student=student).encode()
+
+
+def multipart(*parts):
+    """
+    Build a multipart/form-data body from (filename, content, content_encoding) parts.
+    """
+    body = b''
+    for filename, content, content_encoding in parts:
+        body += f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode()
+        if content_encoding:
+            body += f'Content-Encoding: {content_encoding}\r\n'.encode()
+        body += b'Content-Type: text/xml+markr\r\n\r\n' + content + b'\r\n'
+    return body + f'--{BOUNDARY}--\r\n'.encode()
+
+
+class TestPayloads(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and initialize the database.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def post_multipart(self, body, **headers):
+        return self.client.post('/import', data=body, headers=headers,
+                                content_type=f'multipart/form-data; boundary={BOUNDARY}')
+
+    def stored_students(self):
+        with self.app.app_context():
+            return sorted(result.student_number for result in TestResults.query.all())
+
+    def test_gzip_document(self):
+        """
+        Test case to check that a gzip-encoded document is imported and corrupt gzip data is rejected.
+
+        Steps:
+        1. Post gzip-compressed documents with Content-Encoding: gzip, GZIP and x-gzip.
+        2. Post a truncated gzip document and one with an unsupported encoding.
+        3. Assert that only the compressed documents were imported.
+
+        Returns:
+            None
+        """
+        # Step 1: Post a compressed document
+        response = self.client.post('/import', data=gzip.compress(document('1')), content_type='text/xml+markr',
+                                    headers={'Content-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        for student, content_encoding in [('4', 'GZIP'), ('5', 'x-gzip')]:
+            response = self.client.post('/import', data=gzip.compress(document(student)),
+                                        content_type='text/xml+markr', headers={'Content-Encoding': content_encoding})
+            self.assertEqual(response.status_code, 200)
+
+        # Step 2: Post corrupt and unsupported payloads
+        response = self.client.post('/import', data=gzip.compress(document('2'))[:-20],
+                                    content_type='text/xml+markr', headers={'Content-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'Invalid gzip data'})
+        response = self.client.post('/import', data=document('3'), content_type='text/xml+markr',
+                                    headers={'Content-Encoding': 'br'})
+        self.assertEqual(response.status_code, 415)
+
+        # Step 3: Assert that only the compressed documents were imported
+        self.assertEqual(self.stored_students(), ['1', '4', '5'])
+
+    def test_multipart_documents(self):
+        """
+        Test case to check that the documents of a multipart body are imported together.
+
+        Steps:
+        1. Post a plain document, gzip-encoded documents and a duplicate in one multipart body.
+        2. Assert that each document is reported and every record is stored.
+
+        Returns:
+            None
+        """
+        # Step 1: Post the multipart body, with the whole body compressed
+        body = multipart(('a.xml', document('1'), None), ('b.xml', gzip.compress(document('2')), 'gzip'),
+                         ('c.xml', document('1'), None), ('d.xml', gzip.compress(document('3')), 'X-Gzip'))
+        response = self.post_multipart(gzip.compress(body), **{'Content-Encoding': 'gzip'})
+
+        # Step 2: Assert that every document was imported
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['records'], 4)
+        self.assertEqual([(d['document'], d['name'], d['records']) for d in data['documents']],
+                         [(0, 'a.xml', 1), (1, 'b.xml', 1), (2, 'c.xml', 1), (3, 'd.xml', 1)])
+        self.assertEqual(self.stored_students(), ['1', '2', '3'])
+
+    def test_multipart_invalid_document(self):
+        """
+        Test case to check that one invalid document rolls back every document of a multipart body.
+
+        Steps:
+        1. Post a valid document, an incomplete document and a document with invalid syntax.
+        2. Assert that the errors of each document are reported and nothing is stored.
+        3. Post a truncated multipart body and assert that it is rejected.
+
+        Returns:
+            None
+        """
+        # Step 1: Post the documents
+        response = self.post_multipart(multipart(('a.xml', document('1'), None), ('b.xml', INVALID_XML, None),
+                                                 ('c.xml', b'<mcq-test-results>', None)))
+
+        # Step 2: Assert that each document was validated and nothing was stored
+        self.assertEqual(response.status_code, 400)
+        documents = response.get_json()['documents']
+        self.assertEqual([d['incomplete_records'] for d in documents],
+                         [[], [{'error': 'Missing fields: last-name, student-number, test-id', 'line': 3,
+                                 'student_number': None}],
+                          [{'error': 'Invalid XML syntax', 'line': 1}]])
+        self.assertEqual(self.stored_students(), [])
+
+        # Step 3: Post a truncated multipart body
+        response = self.post_multipart(multipart(('a.xml', document('1'), None))[:-30])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'Invalid multipart body'})
+
+    def test_async_multipart(self):
+        """
+        Test case to check that queued multipart payloads are decoded by the import workers.
+
+        Steps:
+        1. Enable asynchronous imports and post a gzip-encoded multipart body.
+        2. Run the queued job.
+        3. Assert that the job succeeded and both documents were stored.
+
+        Returns:
+            None
+        """
+        with tempfile.TemporaryDirectory() as spool:
+            # Step 1: Queue the payload
+            self.app.config.update(IMPORT_ASYNC=True, IMPORT_SPOOL_DIR=spool)
+            body = multipart(('a.xml', document('1'), None), ('b.xml', document('2'), None))
+            response = self.post_multipart(gzip.compress(body), **{'Content-Encoding': 'gzip'})
+            self.assertEqual(response.status_code, 202)
+
+            # Step 2: Run the job
+            with self.app.app_context():
+                process_next_job()
+
+                # Step 3: Assert that the job succeeded
+                job = db.session.get(ImportJob, response.get_json()['job_id'])
+                self.assertEqual(job.status, 'succeeded')
+                self.assertEqual(job.records, 2)
+            self.assertEqual(self.stored_students(), ['1', '2'])
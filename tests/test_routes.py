@@ -85,7 +85,7 @@ class TestRoutes(unittest.TestCase):
         self.assertFalse(result)
 
         # Step 4: Assert that the error contains the expected message
-        self.assertIn({'error': 'Missing fields: student-number, test-id'}, errors)
+        self.assertIn({'error': 'Missing fields: student-number, test-id', 'line': 3, 'student_number': None}, errors)
 
     def test_missing_values(self):
         """
@@ -120,7 +120,8 @@ class TestRoutes(unittest.TestCase):
         self.assertFalse(result)
 
         # Step 4: Assert that the error contains the expected message
-        self.assertIn({'error': 'Missing values for fields: first-name, test-id'}, errors)
+        self.assertIn({'error': 'Missing values for fields: first-name, test-id', 'line': 3, 'student_number': '99999999'},
+                      errors)
 
     def setUp(self):
         """
@@ -0,0 +1,157 @@
+from datetime import datetime
+import os
+import tempfile
+import threading
+import time
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app import create_app, db
+from app.models import TestAggregate, TestResults
+from app.upsert import upsert_results
+
+
+def make_record(student_number, obtained_marks, test_id='9863'):
+    return {'student_number': student_number, 'test_id': test_id, 'first_name': 'Sample',
+            'last_name': 'Student', 'available_marks': 20, 'obtained_marks': obtained_marks,
+            'scanned_on': datetime(2017, 12, 4, 12, 12, 10)}
+
+
+class TestUpsert(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up method to create a Flask application for testing and initialize the database.
+
+        Returns:
+            None
+        """
+        self.app = create_app()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """
+        Tear down method to clean up the database after testing.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def stored_marks(self):
+        return {result.student_number: result.obtained_marks for result in TestResults.query.all()}
+
+    def test_last_write_wins(self):
+        """
+        Test case to check that the last-write-wins rule keeps the latest record within and across batches.
+
+        Steps:
+        1. Store an existing record.
+        2. Upsert duplicates of it in batches of two, along with new records.
+        3. Assert that the last record for each student is stored.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            # Step 1: Store an existing record
+            upsert_results(db.session, [make_record('1', 5)])
+            db.session.commit()
+
+            # Step 2: Upsert duplicates in small batches
+            records = [make_record('1', 15), make_record('2', 10), make_record('1', 3), make_record('2', 12)]
+            count = upsert_results(db.session, records, batch_size=2)
+            db.session.commit()
+
+            # Step 3: Assert that the last records are stored
+            self.assertEqual(count, 4)
+            self.assertEqual(self.stored_marks(), {'1': 3, '2': 12})
+
+    def test_highest_marks(self):
+        """
+        Test case to check that the highest-marks rule never replaces a record with a lower score.
+
+        Steps:
+        1. Store an existing record.
+        2. Upsert lower and higher scoring duplicates with the highest-marks rule.
+        3. Assert that the highest score for each student is stored.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            # Step 1: Store an existing record
+            upsert_results(db.session, [make_record('1', 15)])
+            db.session.commit()
+
+            # Step 2: Upsert lower and higher scoring duplicates
+            records = [make_record('1', 10), make_record('2', 12), make_record('2', 8), make_record('3', 4)]
+            upsert_results(db.session, records, batch_size=2, rule='highest-marks')
+            db.session.commit()
+
+            # Step 3: Assert that the highest scores are stored
+            self.assertEqual(self.stored_marks(), {'1': 15, '2': 12, '3': 4})
+
+    def test_unknown_rule(self):
+        """
+        Test case to check that an unknown conflict rule is rejected.
+
+        Returns:
+            None
+        """
+        with self.app.app_context():
+            with self.assertRaises(ValueError):
+                upsert_results(db.session, [], rule='first-write-wins')
+
+    def test_concurrent_imports(self):
+        """
+        Test case to check that two sessions importing the same student at once count the student once.
+
+        Steps:
+        1. Open two sessions on a database file, as two workers would.
+        2. Upsert a record in the first session, and the same student in the second from another thread.
+        3. Assert that the second session waits for the first to commit.
+        4. Repeat for a second student, now that the test has an aggregate row.
+        5. Assert that the aggregate counts each student once, with the marks written last.
+
+        Returns:
+            None
+        """
+        # Step 1: Open two sessions on a database file
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'markr.db')}", connect_args={'timeout': 10})
+            db.metadata.create_all(engine)
+            first, second = Session(engine), Session(engine)
+            try:
+                for student_number in ('1', '2'):
+                    # Steps 2 and 4: Upsert the same student in both sessions
+                    upsert_results(first, [make_record(student_number, 5)])
+                    finished = threading.Event()
+
+                    def concurrent_import():
+                        upsert_results(second, [make_record(student_number, 15)])
+                        second.commit()
+                        finished.set()
+
+                    thread = threading.Thread(target=concurrent_import)
+                    thread.start()
+
+                    # Step 3: Assert that the second session waits for the first
+                    time.sleep(0.3)
+                    self.assertFalse(finished.is_set())
+                    first.commit()
+                    thread.join(10)
+                    self.assertTrue(finished.is_set())
+
+                # Step 5: Assert the aggregate
+                with Session(engine) as session:
+                    aggregate = session.get(TestAggregate, '9863')
+                    self.assertEqual((aggregate.count, aggregate.sum_marks, aggregate.histogram), (2, 30, {'15': 2}))
+                    self.assertEqual([result.obtained_marks for result in session.query(TestResults)], [15, 15])
+            finally:
+                first.close()
+                second.close()
+                engine.dispose()
@@ -0,0 +1,11 @@
+# wsgi.py
+"""
+    WSGI entry point for production servers, e.g. `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+    The app is created once in the server's master process and shared by the forked workers,
+    which then call app.post_fork (see gunicorn.conf.py). Flask-Migrate is not loaded; apply
+    migrations with `flask db upgrade` before starting the server.
+"""
+from app import create_app
+
+app = create_app({'PREFORK': True, 'LOAD_MIGRATIONS': False})